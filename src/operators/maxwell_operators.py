@@ -80,9 +80,15 @@ class MaxwellOperators(SystemOperators):
 
     
 
-    def essential_boundary_conditions(self, problem: Problem, time: fdrk.Constant):
-        
-        bc_dictionary = problem.get_boundary_conditions(time)
+    def essential_boundary_conditions(self, problem: Problem, time: fdrk.Constant, separable=False):
+        """
+        If separable is True the value of the boundary conditions is the list of
+        separable terms given by problem.get_separable_boundary_conditions
+        """
+        if separable:
+            bc_dictionary = problem.get_separable_boundary_conditions()
+        else:
+            bc_dictionary = problem.get_boundary_conditions(time)
 
         if self.formulation=="primal":
             
@@ -113,8 +119,11 @@ class MaxwellOperators(SystemOperators):
         return dict_essential_bc
 
 
-    def natural_boundary_conditions(self, problem: Problem, time: fdrk.Constant):
-        bc_dictionary = problem.get_boundary_conditions(time)
+    def natural_boundary_conditions(self, problem: Problem, time: fdrk.Constant, separable=False):
+        if separable:
+            bc_dictionary = problem.get_separable_boundary_conditions()
+        else:
+            bc_dictionary = problem.get_boundary_conditions(time)
 
         if self.formulation=="primal":
             natural_bc = bc_dictionary["electric"][1]
@@ -212,7 +221,7 @@ class MaxwellOperators(SystemOperators):
 
     
 
-    def project_NED_facet(self, variable_to_project, broken):
+    def project_NED_facet(self, variable_to_project, broken, projected_variable=None):
 
         if self.discretization!="hybrid":
             PETSc.Sys.Print("Formulation is not hybrid. Function not available")
@@ -222,12 +231,14 @@ class MaxwellOperators(SystemOperators):
         if broken:
             trial_function = fdrk.TrialFunction(self.brokenfacet_NED_space)
             test_function = fdrk.TestFunction(self.brokenfacet_NED_space)
-            projected_variable = fdrk.Function(self.brokenfacet_NED_space)
+            if projected_variable is None:
+                projected_variable = fdrk.Function(self.brokenfacet_NED_space)
 
         else:
             trial_function = fdrk.TrialFunction(self.facet_NED_space)
             test_function = fdrk.TestFunction(self.facet_NED_space)
-            projected_variable = fdrk.Function(self.facet_NED_space)
+            if projected_variable is None:
+                projected_variable = fdrk.Function(self.facet_NED_space)
 
         a_integrand = fdrk.inner(fdrk.cross(test_function, self.normal_versor), \
                                  fdrk.cross(trial_function, self.normal_versor))
@@ -245,8 +256,7 @@ class MaxwellOperators(SystemOperators):
         if broken:
             A_matrix = fdrk.Tensor(a_operator)
             b_vector = fdrk.Tensor(l_functional)
-            coeff_projected = fdrk.assemble(A_matrix.inv * b_vector).vector().get_local()
-            projected_variable.vector().set_local(coeff_projected)
+            fdrk.assemble(A_matrix.inv * b_vector, tensor=projected_variable)
         else:
             A_mat = fdrk.assemble(a_operator)
             b_vec = fdrk.assemble(l_functional)
@@ -255,6 +265,19 @@ class MaxwellOperators(SystemOperators):
         return projected_variable
 
 
+    def boundary_projection_integrands(self, test_function, trial_function, variable_to_project):
+        """
+        Integrands of the L2 projection on the global trace space, used for the 
+        essential boundary conditions
+        """
+        a_integrand = fdrk.inner(fdrk.cross(test_function, self.normal_versor), \
+                                 fdrk.cross(trial_function, self.normal_versor))
+        l_integrand = fdrk.inner(fdrk.cross(test_function, self.normal_versor), \
+                                 fdrk.cross(variable_to_project, self.normal_versor))
+
+        return a_integrand, l_integrand
+
+
     def trace_norm_NED(self, variable):
 
         boundary_integrand = self.cell_diameter * fdrk.cross(variable, self.normal_versor) ** 2
@@ -61,11 +61,29 @@ class SystemOperators(ABC):
         pass
 
 
+    @abstractmethod
+    def boundary_projection_integrands():
+        pass
+
+
     @abstractmethod
     def control():
         pass
 
 
+    def staggered_indices(self):
+        """
+        Indices of the fields in the hybrid formulation
+        Returns:
+            weak_index (int) : field whose equation is in weak form (coupled to the traces)
+            strong_index (int) : field whose equation is in strong form (cell local)
+        """
+        if self.formulation=="primal":
+            return 1, 0
+        else:
+            return 0, 1
+
+
     def operator_implicit_midpoint(self, time_step, testfunctions, trialfunctions):
         """
         Construct operators arising from the implicit midpoint discretization
@@ -83,10 +101,11 @@ class SystemOperators(ABC):
 
         mass_functional, dynamics_functional = self.dynamics(testfunctions, functions)
 
-        natural_control = self.control(testfunctions, control)
+        rhs_functional = mass_functional + 0.5 * time_step * dynamics_functional
 
-        rhs_functional = mass_functional + 0.5 * time_step * dynamics_functional \
-                                    + time_step * natural_control
+        # The control is None when its contribution is assembled separately
+        if control is not None:
+            rhs_functional += time_step * self.control(testfunctions, control)
         
         return rhs_functional
     
@@ -13,3 +13,28 @@ def facet_form(integrand, extruded):
     return facet_form
 
 
+
+
+def boundary_form(integrand, list_id, extruded):
+    """
+    Integral of the integrand over the boundary facets with the given ids
+    ("on_boundary", integer markers and "top", "bottom" for extruded meshes)
+    """
+    if not extruded and "on_boundary" in list_id:
+        return integrand * fdrk.ds
+
+    boundary_form = 0
+    for id_bc in list_id:
+        if extruded:
+            if id_bc == "on_boundary":
+                boundary_form += integrand * fdrk.ds_v
+            elif id_bc == "top":
+                boundary_form += integrand * fdrk.ds_t
+            elif id_bc == "bottom":
+                boundary_form += integrand * fdrk.ds_b
+            else:
+                boundary_form += integrand * fdrk.ds_v(id_bc)
+        else:
+            boundary_form += integrand * fdrk.ds(id_bc)
+
+    return boundary_form
@@ -96,9 +96,15 @@ class WaveOperators(SystemOperators):
             return (pressure, velocity)
 
     
-    def essential_boundary_conditions(self, problem: Problem, time: fdrk.Constant):
-        
-        bc_dictionary = problem.get_boundary_conditions(time)
+    def essential_boundary_conditions(self, problem: Problem, time: fdrk.Constant, separable=False):
+        """
+        If separable is True the value of the boundary conditions is the list of
+        separable terms given by problem.get_separable_boundary_conditions
+        """
+        if separable:
+            bc_dictionary = problem.get_separable_boundary_conditions()
+        else:
+            bc_dictionary = problem.get_boundary_conditions(time)
 
         if self.formulation=="primal":
             
@@ -134,8 +140,11 @@ class WaveOperators(SystemOperators):
         return dict_essential_bc
     
 
-    def natural_boundary_conditions(self, problem: Problem, time: fdrk.Constant):
-        bc_dictionary = problem.get_boundary_conditions(time)
+    def natural_boundary_conditions(self, problem: Problem, time: fdrk.Constant, separable=False):
+        if separable:
+            bc_dictionary = problem.get_separable_boundary_conditions()
+        else:
+            bc_dictionary = problem.get_boundary_conditions(time)
 
         if self.formulation=="primal":
             natural_bc = bc_dictionary["dirichlet"][1]
@@ -235,7 +244,7 @@ class WaveOperators(SystemOperators):
         return natural_control
 
 
-    def project_CG_facet(self, variable_to_project, broken):
+    def project_CG_facet(self, variable_to_project, broken, projected_variable=None):
         # project normal trace of u_e onto Vnor or Vtan for the Lagrange space
         if self.discretization!="hybrid":
             PETSc.Sys.Print("Formulation is not hybrid. Function not available")
@@ -244,12 +253,14 @@ class WaveOperators(SystemOperators):
         if broken:
             trial_function = fdrk.TrialFunction(self.brokenfacet_CG_space)
             test_function = fdrk.TestFunction(self.brokenfacet_CG_space)
-            projected_variable = fdrk.Function(self.brokenfacet_CG_space)
+            if projected_variable is None:
+                projected_variable = fdrk.Function(self.brokenfacet_CG_space)
 
         else:
             trial_function = fdrk.TrialFunction(self.facet_CG_space)
             test_function = fdrk.TestFunction(self.facet_CG_space)
-            projected_variable = fdrk.Function(self.facet_CG_space)
+            if projected_variable is None:
+                projected_variable = fdrk.Function(self.facet_CG_space)
 
         a_integrand = fdrk.inner(test_function, trial_function)
 
@@ -264,8 +275,7 @@ class WaveOperators(SystemOperators):
         if broken:
             A_matrix = fdrk.Tensor(a_operator)
             b_vector = fdrk.Tensor(l_functional)
-            coeff_projected = fdrk.assemble(A_matrix.inv * b_vector).vector().get_local()
-            projected_variable.vector().set_local(coeff_projected)
+            fdrk.assemble(A_matrix.inv * b_vector, tensor=projected_variable)
         else:
             A_mat = fdrk.assemble(a_operator)
             b_vec = fdrk.assemble(l_functional)
@@ -274,7 +284,7 @@ class WaveOperators(SystemOperators):
         return projected_variable
     
 
-    def project_RT_facet(self, variable_to_project, broken):
+    def project_RT_facet(self, variable_to_project, broken, projected_variable=None):
         # project normal trace of u_e onto Vnor or Vtan for the Raviart Thomas space
         if self.discretization!="hybrid":
             PETSc.Sys.Print("Formulation is not hybrid. Function not available")
@@ -283,12 +293,14 @@ class WaveOperators(SystemOperators):
         if broken:
             trial_function = fdrk.TrialFunction(self.brokenfacet_RT_space)
             test_function = fdrk.TestFunction(self.brokenfacet_RT_space)
-            projected_variable = fdrk.Function(self.brokenfacet_RT_space)
+            if projected_variable is None:
+                projected_variable = fdrk.Function(self.brokenfacet_RT_space)
 
         else:
             trial_function = fdrk.TrialFunction(self.facet_RT_space)
             test_function = fdrk.TestFunction(self.facet_RT_space)
-            projected_variable = fdrk.Function(self.facet_RT_space)
+            if projected_variable is None:
+                projected_variable = fdrk.Function(self.facet_RT_space)
 
         a_integrand = fdrk.inner(test_function, self.normal_versor)*fdrk.inner(trial_function, self.normal_versor)
 
@@ -303,8 +315,7 @@ class WaveOperators(SystemOperators):
         if broken:
             A_matrix = fdrk.Tensor(a_operator)
             b_vector = fdrk.Tensor(l_functional)
-            coeff_projected = fdrk.assemble(A_matrix.inv * b_vector).vector().get_local()
-            projected_variable.vector().set_local(coeff_projected)
+            fdrk.assemble(A_matrix.inv * b_vector, tensor=projected_variable)
         else:
             A_mat = fdrk.assemble(a_operator)
             b_vec = fdrk.assemble(l_functional)
@@ -313,6 +324,21 @@ class WaveOperators(SystemOperators):
         return projected_variable
 
 
+    def boundary_projection_integrands(self, test_function, trial_function, variable_to_project):
+        """
+        Integrands of the L2 projection on the global trace space, used for the 
+        essential boundary conditions
+        """
+        if self.formulation=="primal":
+            a_integrand = fdrk.inner(test_function, self.normal_versor)*fdrk.inner(trial_function, self.normal_versor)
+            l_integrand = fdrk.inner(test_function, self.normal_versor)*fdrk.inner(variable_to_project, self.normal_versor)
+        else:
+            a_integrand = fdrk.inner(test_function, trial_function)
+            l_integrand = fdrk.inner(test_function, variable_to_project)
+
+        return a_integrand, l_integrand
+
+
     def trace_norm_CG(self, variable):
         if self.discretization!="hybrid":
             PETSc.Sys.Print("Formulation is not hybrid. Function not available")
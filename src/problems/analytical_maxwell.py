@@ -1,11 +1,13 @@
 from src.problems.problem import Problem
 from math import pi
+import math
 import firedrake as fdrk
 from firedrake.petsc import PETSc
 
 class AnalyticalMaxwell(Problem):
     "Maxwell eigenproblem"
-    def __init__(self, n_elements_x, n_elements_y, n_elements_z, bc_type="mixed", quad = False, manufactured=False):
+    def __init__(self, n_elements_x, n_elements_y, n_elements_z, bc_type="mixed", quad = False, manufactured=False, \
+                 comm=fdrk.COMM_WORLD):
         """Generate a mesh of a cube
         The boundary surfaces are numbered as follows:
 
@@ -15,6 +17,8 @@ class AnalyticalMaxwell(Problem):
         * 4: plane y == L
         * 5: plane z == 0
         * 6: plane z == L
+
+        The mesh is distributed on the communicator comm
         """
 
         self.dim=3
@@ -22,12 +26,13 @@ class AnalyticalMaxwell(Problem):
 
         if quad:
             quad_mesh = fdrk.UnitSquareMesh(nx=n_elements_x, \
-                                        ny=n_elements_y, quadrilateral=True)
+                                        ny=n_elements_y, quadrilateral=True, comm=comm)
             self.domain = fdrk.ExtrudedMesh(quad_mesh, layers=n_elements_z)
         else:
             self.domain = fdrk.UnitCubeMesh(nx=n_elements_x, \
                                             ny=n_elements_y, \
-                                            nz=n_elements_z)
+                                            nz=n_elements_z, \
+                                            comm=comm)
         
         
         self.x, self.y, self.z = fdrk.SpatialCoordinate(self.domain)
@@ -59,16 +64,7 @@ class AnalyticalMaxwell(Problem):
             omega_time = omega_space*fdrk.sqrt(self.dim)
             ft, dft = self._get_eigensolution_time_function(time, omega_time)
 
-
-        potential_y = - fdrk.cos(omega_space*self.x) * fdrk.sin(omega_space*self.y) * fdrk.cos(omega_space*self.z)
-
-        g_x = - potential_y.dx(2)
-        g_y = fdrk.Constant(0)
-        g_z = + potential_y.dx(0)
-
-        g_fun = fdrk.as_vector([g_x, g_y, g_z])
-
-        curl_g = fdrk.as_vector([g_z.dx(1), g_x.dx(2) - g_z.dx(0), -g_x.dx(1)])
+        g_fun, curl_g = self._get_spatial_function(omega_space)
 
         exact_electric = g_fun * dft
         exact_magnetic = -curl_g * ft
@@ -85,6 +81,45 @@ class AnalyticalMaxwell(Problem):
         # Quadratic polynomial
         ft, dft = self._get_manufactured_time_function(time)
         
+        g_fun, curl_g = self._get_spatial_function(omega_space)
+
+        exact_electric = g_fun * dft
+        exact_magnetic = -curl_g * ft
+
+        
+        force_electric = g_fun - fdrk.curl(exact_magnetic)
+        force_magnetic = -curl_g * dft + fdrk.curl(exact_electric)
+
+        return (force_electric, force_magnetic)
+    
+
+    def get_separable_exact_solution(self):
+        omega_space = 1
+
+        if self.manufactured:
+            ft, dft = self._get_separable_time_functions()
+        else:
+            ft, dft = self._get_separable_time_functions(omega_space*math.sqrt(self.dim))
+
+        g_fun, curl_g = self._get_spatial_function(omega_space)
+
+        return ([(g_fun, dft)], [(-curl_g, ft)])
+    
+
+    def get_separable_forcing(self):
+        omega_space = 1
+
+        ft, dft = self._get_separable_time_functions()
+
+        g_fun, curl_g = self._get_spatial_function(omega_space)
+
+        force_electric = [(g_fun, lambda time: 1), (fdrk.curl(curl_g), ft)]
+        force_magnetic = [(fdrk.curl(g_fun) - curl_g, dft)]
+
+        return (force_electric, force_magnetic)
+    
+
+    def _get_spatial_function(self, omega_space):
         potential_y = - fdrk.cos(omega_space*self.x) * fdrk.sin(omega_space*self.y) * fdrk.cos(omega_space*self.z)
 
         g_x = - potential_y.dx(2)
@@ -95,14 +130,7 @@ class AnalyticalMaxwell(Problem):
 
         curl_g = fdrk.as_vector([g_z.dx(1), g_x.dx(2) - g_z.dx(0), -g_x.dx(1)])
 
-        exact_electric = g_fun * dft
-        exact_magnetic = -curl_g * ft
-
-        
-        force_electric = g_fun - fdrk.curl(exact_magnetic)
-        force_magnetic = -curl_g * dft + fdrk.curl(exact_electric)
-
-        return (force_electric, force_magnetic)
+        return g_fun, curl_g
     
 
     def get_initial_conditions(self):
@@ -122,6 +150,17 @@ class AnalyticalMaxwell(Problem):
         exact_electric, exact_magnetic = self.get_exact_solution(time)
 
         null_bc = fdrk.Constant((0,0,0))
+
+        return self._get_boundary_dictionary(exact_electric, exact_magnetic, null_bc)
+    
+
+    def get_separable_boundary_conditions(self):
+        exact_electric, exact_magnetic = self.get_separable_exact_solution()
+
+        return self._get_boundary_dictionary(exact_electric, exact_magnetic, [])
+
+
+    def _get_boundary_dictionary(self, exact_electric, exact_magnetic, null_bc):
         if self.bc_type == "electric":
             bd_dict = {"electric": (["on_boundary"], exact_electric), "magnetic":([], null_bc)} 
 
@@ -1,11 +1,13 @@
 from src.problems.problem import Problem
 from math import pi
+import math
 import firedrake as fdrk
 from firedrake.petsc import PETSc
 
 class AnalyticalWave(Problem):
     "Maxwell eigenproblem"
-    def __init__(self, n_elements_x, n_elements_y, n_elements_z, bc_type="mixed", dim=3, quad=False, manufactured=False):
+    def __init__(self, n_elements_x, n_elements_y, n_elements_z, bc_type="mixed", dim=3, quad=False, manufactured=False, \
+                 comm=fdrk.COMM_WORLD, homogeneous=False):
         """Generate a mesh of a cube
         The boundary surfaces are numbered as follows:
 
@@ -15,7 +17,17 @@ class AnalyticalWave(Problem):
         * 4: plane y == L
         * 5: plane z == 0
         * 6: plane z == L
+
+        The mesh is distributed on the communicator comm.
+        If homogeneous is True the solution is the standing wave with homogeneous Dirichlet 
+        conditions, pressure g cos(omega t) with g = sin(pi x) sin(pi y) (sin(pi z)) and 
+        zero initial velocity (it requires bc_type="dirichlet")
         """
+        if homogeneous and (bc_type!="dirichlet" or manufactured):
+            raise ValueError("The homogeneous solution requires Dirichlet conditions and no manufactured forcing")
+        self.homogeneous = homogeneous
+        # Spatial frequency of the eigensolution
+        self.omega_space = pi if homogeneous else 1
 
         self.dim=dim
         self.quad = quad
@@ -23,13 +35,14 @@ class AnalyticalWave(Problem):
         if dim==3:
             if quad:
                 PETSc.Sys.Print("Hexahedral mesh requested")
-                quad_mesh = fdrk.UnitSquareMesh(n_elements_x, n_elements_y, quadrilateral=quad)
+                quad_mesh = fdrk.UnitSquareMesh(n_elements_x, n_elements_y, quadrilateral=quad, comm=comm)
                 self.domain = fdrk.ExtrudedMesh(quad_mesh, layers=n_elements_z)
 
             else:
                 self.domain = fdrk.UnitCubeMesh(nx=n_elements_x, 
                                             ny=n_elements_y, 
-                                            nz=n_elements_z)
+                                            nz=n_elements_z,
+                                            comm=comm)
             
             self.x, self.y, self.z = fdrk.SpatialCoordinate(self.domain)
         elif dim==2:
@@ -38,7 +51,8 @@ class AnalyticalWave(Problem):
 
             self.domain = fdrk.UnitSquareMesh(nx=n_elements_x, 
                                               ny=n_elements_y, 
-                                              quadrilateral=quad)
+                                              quadrilateral=quad,
+                                              comm=comm)
             
             self.x, self.y = fdrk.SpatialCoordinate(self.domain)
         else:
@@ -62,19 +76,18 @@ class AnalyticalWave(Problem):
 
 
     def get_exact_solution(self, time: fdrk.Constant):
-        omega_space = 1
+        omega_space = self.omega_space
 
         if self.manufactured:
             ft, dft = self._get_manufactured_time_function(time)
+        elif self.homogeneous:
+            omega_time = omega_space*math.sqrt(self.dim)
+            ft, dft = fdrk.sin(omega_time*time)/omega_time, fdrk.cos(omega_time*time)
         else:
             omega_time = omega_space*fdrk.sqrt(self.dim)
             ft, dft = self._get_eigensolution_time_function(time, omega_time)
 
-        if self.dim==3:
-            g_fun = fdrk.sin(omega_space * self.x) * fdrk.sin(omega_space * self.y) * fdrk.sin(omega_space * self.z)
-        else:
-            g_fun = fdrk.sin(omega_space * self.x) * fdrk.sin(omega_space * self.y)
-        grad_g = fdrk.grad(g_fun)
+        g_fun, grad_g = self._get_spatial_function(omega_space)
 
         exact_pressure = g_fun * dft
         exact_velocity = grad_g * ft
@@ -90,11 +103,7 @@ class AnalyticalWave(Problem):
 
         ft, dft = self._get_manufactured_time_function(time)
 
-        if self.dim==3:
-            g_fun = fdrk.sin(omega_space * self.x) * fdrk.sin(omega_space * self.y) * fdrk.sin(omega_space * self.z)
-        else:
-            g_fun = fdrk.sin(omega_space * self.x) * fdrk.sin(omega_space * self.y)
-        grad_g = fdrk.grad(g_fun)
+        g_fun, grad_g = self._get_spatial_function(omega_space)
 
         exact_pressure = g_fun * dft
         exact_velocity = grad_g * ft
@@ -107,6 +116,46 @@ class AnalyticalWave(Problem):
         return (force_pressure, force_velocity)
     
 
+    def get_separable_exact_solution(self):
+        omega_space = self.omega_space
+
+        if self.manufactured:
+            ft, dft = self._get_separable_time_functions()
+        elif self.homogeneous:
+            omega_time = omega_space*math.sqrt(self.dim)
+            ft, dft = lambda time: math.sin(omega_time*time)/omega_time, lambda time: math.cos(omega_time*time)
+        else:
+            ft, dft = self._get_separable_time_functions(omega_space*math.sqrt(self.dim))
+
+        g_fun, grad_g = self._get_spatial_function(omega_space)
+
+        return ([(g_fun, dft)], [(grad_g, ft)])
+    
+
+    def get_separable_forcing(self):
+        omega_space = 1
+
+        ft, dft = self._get_separable_time_functions()
+
+        g_fun, grad_g = self._get_spatial_function(omega_space)
+
+        force_pressure = [(g_fun, lambda time: 1), (-fdrk.div(grad_g), ft)]
+
+        force_velocity = [(grad_g - fdrk.grad(g_fun), dft)]
+
+        return (force_pressure, force_velocity)
+    
+
+    def _get_spatial_function(self, omega_space):
+        if self.dim==3:
+            g_fun = fdrk.sin(omega_space * self.x) * fdrk.sin(omega_space * self.y) * fdrk.sin(omega_space * self.z)
+        else:
+            g_fun = fdrk.sin(omega_space * self.x) * fdrk.sin(omega_space * self.y)
+        grad_g = fdrk.grad(g_fun)
+
+        return g_fun, grad_g
+    
+
     def get_initial_conditions(self):
         pressure_field, velocity_field = self.get_exact_solution(time = fdrk.Constant(0))
 
@@ -121,12 +170,28 @@ class AnalyticalWave(Problem):
         Returns:
             bd_dict : dictionary of boundary conditions for the problem at hand
         """
-        exact_pressure, exact_velocity = self.get_exact_solution(time)
-
         null_bc = fdrk.Constant(0)
 
         null_bc_vec = fdrk.Constant((0,) * self.dim)
 
+        if self.homogeneous:
+            return self._get_boundary_dictionary(null_bc, null_bc_vec, null_bc, null_bc_vec)
+
+        exact_pressure, exact_velocity = self.get_exact_solution(time)
+
+        return self._get_boundary_dictionary(exact_pressure, exact_velocity, null_bc, null_bc_vec)
+    
+
+    def get_separable_boundary_conditions(self):
+        if self.homogeneous:
+            return self._get_boundary_dictionary([], [], [], [])
+
+        exact_pressure, exact_velocity = self.get_separable_exact_solution()
+
+        return self._get_boundary_dictionary(exact_pressure, exact_velocity, [], [])
+    
+
+    def _get_boundary_dictionary(self, exact_pressure, exact_velocity, null_bc, null_bc_vec):
         if self.bc_type == "dirichlet":
             if self.dim==3 and self.quad:
                 bd_dict = {"dirichlet": (["on_boundary", "top", "bottom"], exact_pressure), "neumann":([], null_bc_vec)} 
@@ -154,4 +219,6 @@ class AnalyticalWave(Problem):
     
 
     def __str__(self):
+        if self.homogeneous:
+            return f"standing_wave_{self.dim}d"
         return f"eigensolution_wave_{self.dim}d_bc_{self.bc_type}"
\ No newline at end of file
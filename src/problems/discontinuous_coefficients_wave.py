@@ -4,7 +4,7 @@ import firedrake as fdrk
 
 class DiscontinuousWave(Problem):
     "Maxwell eigenproblem"
-    def __init__(self, n_elements_x, n_elements_y, quad=False):
+    def __init__(self, n_elements_x, n_elements_y, quad=False, comm=fdrk.COMM_WORLD):
         """Generate a mesh of a cube
         The boundary surfaces are numbered as follows:
 
@@ -14,17 +14,20 @@ class DiscontinuousWave(Problem):
         * 4: plane y == L
         * 5: plane z == 0
         * 6: plane z == L
+
+        The mesh is distributed on the communicator comm
         """
 
         self.quad = quad
         self.dim = 2
-        self.domain = fdrk.RectangleMesh(nx=n_elements_x, ny=n_elements_y, Lx=3, Ly=2,  quadrilateral=quad)
+        self.domain = fdrk.RectangleMesh(nx=n_elements_x, ny=n_elements_y, Lx=3, Ly=2,  quadrilateral=quad, comm=comm)
             
         self.x, self.y = fdrk.SpatialCoordinate(self.domain)
         
         self.normal_versor = fdrk.FacetNormal(self.domain)
 
         self.forcing = True
+        self.t_end_forcing = 0.2
         self.material_coefficients = True
 
 
@@ -44,10 +47,27 @@ class DiscontinuousWave(Problem):
     def get_forcing(self, time):
         assert isinstance(time, fdrk.Constant)
 
-        force_pressure =  fdrk.conditional(fdrk.And(fdrk.And(fdrk.gt(self.x, 1.2), fdrk.lt(self.x, 1.4)), fdrk.lt(time, 0.2)), 1, 0) 
+        force_pressure =  fdrk.conditional(fdrk.And(fdrk.And(fdrk.gt(self.x, 1.2), fdrk.lt(self.x, 1.4)), fdrk.lt(time, self.t_end_forcing)), 1, 0) 
         return (force_pressure, fdrk.Constant((0,) * self.dim))
     
 
+    def get_separable_forcing(self):
+        force_pressure = [(self._get_source_indicator(), lambda time: 1 if time < self.t_end_forcing else 0)]
+        return (force_pressure, None)
+    
+
+    def get_piecewise_constant_forcing(self):
+        return [(0, self.t_end_forcing, (self._get_source_indicator(), None))]
+    
+
+    def get_forcing_time_support(self):
+        return (0, self.t_end_forcing)
+    
+
+    def _get_source_indicator(self):
+        return fdrk.conditional(fdrk.And(fdrk.gt(self.x, 1.2), fdrk.lt(self.x, 1.4)), 1, 0)
+    
+
     def get_initial_conditions(self):
         pressure_field, velocity_field = fdrk.Constant(0), fdrk.Constant((0, 0))
 
@@ -72,5 +92,9 @@ class DiscontinuousWave(Problem):
         return bd_dict
     
 
+    def get_separable_boundary_conditions(self):
+        return {"dirichlet": (["on_boundary"], []), "neumann":([], [])}
+    
+
     def __str__(self):
         return f"wave_discontinuous"
\ No newline at end of file
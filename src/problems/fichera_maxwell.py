@@ -1,6 +1,7 @@
 from src.problems.problem import Problem
 from math import pi
 import firedrake as fdrk
+import math
 from firedrake.petsc import PETSc
 from src.meshing.fischera_corner import fichera_corner
 
@@ -55,6 +56,30 @@ class MaxwellFichera(Problem):
         return (exact_current, fdrk.Constant((0,0,0)))
     
 
+    def get_separable_exact_solution(self):
+        # sin(2t - 3s) = sin(2t) cos(3s) - cos(2t) sin(3s)
+        sin_2t = lambda time: math.sin(2*time)
+        cos_2t = lambda time: math.cos(2*time)
+
+        exact_electric = [(self._get_spatial_vector(fdrk.cos, self.z, self.x, self.y), sin_2t), 
+                          (-self._get_spatial_vector(fdrk.sin, self.z, self.x, self.y), cos_2t)]
+        exact_magnetic = [(self._get_spatial_vector(fdrk.cos, self.y, self.z, self.x), sin_2t), 
+                          (-self._get_spatial_vector(fdrk.sin, self.y, self.z, self.x), cos_2t)]
+
+        return (exact_electric, exact_magnetic)
+    
+
+    def get_separable_forcing(self):
+        # cos(2t - 3s) = cos(2t) cos(3s) + sin(2t) sin(3s)
+        exact_current = [(self._get_spatial_vector(fdrk.cos, self.z, self.x, self.y), lambda time: math.cos(2*time)), 
+                         (self._get_spatial_vector(fdrk.sin, self.z, self.x, self.y), lambda time: math.sin(2*time))]
+        return (exact_current, None)
+    
+
+    def _get_spatial_vector(self, function, *coordinates):
+        return fdrk.as_vector([function(3*coordinate) for coordinate in coordinates])
+    
+
     def get_initial_conditions(self):
         electric_field, magnetic_field = self.get_exact_solution(time = fdrk.Constant(0))
 
@@ -75,6 +100,12 @@ class MaxwellFichera(Problem):
         bd_dict = {"electric": (["on_boundary"], exact_electric), "magnetic":([], null_bc)} 
 
         return bd_dict
+    
+
+    def get_separable_boundary_conditions(self):
+        exact_electric, _ = self.get_separable_exact_solution()
+
+        return {"electric": (["on_boundary"], exact_electric), "magnetic":([], [])}
 
 
     def __str__(self):
@@ -1,6 +1,7 @@
 import firedrake as fdrk
 from abc import ABC, abstractmethod
 from math import pi
+import math
 
 class Problem(ABC):
     def __init__(self):
@@ -37,6 +38,50 @@ class Problem(ABC):
     def get_boundary_conditions(self, time: fdrk.Constant):
         pass
 
+    def get_separable_exact_solution(self):
+        """
+        Exact solution written as a sum of spatial fields times scalar time functions
+        Returns:
+            tuple of lists of terms (spatial expression, time function of a float),
+            None if the solution is not separable
+        """
+        return None
+    
+
+    def get_separable_forcing(self):
+        """
+        Forcing written as a sum of spatial fields times scalar time functions
+        (same format as get_separable_exact_solution), None if not separable
+        """
+        return None
+    
+
+    def get_piecewise_constant_forcing(self):
+        """
+        Forcing constant in time on a list of windows (zero outside of them)
+        Returns:
+            list of tuples (t_start, t_end, tuple of spatial forcing terms or None),
+            None if the forcing is not piecewise constant
+        """
+        return None
+    
+
+    def get_forcing_time_support(self):
+        """
+        Time interval (t_start, t_end) out of which the forcing is zero, 
+        None if the forcing is active at all times
+        """
+        return None
+    
+
+    def get_separable_boundary_conditions(self):
+        """
+        Boundary conditions dictionary (same keys as get_boundary_conditions) where 
+        the values are lists of separable terms, None if not separable
+        """
+        return None
+    
+
     def _get_manufactured_time_function(self, time: fdrk.Constant):
         f_time = 1/2*time**2
 
@@ -49,4 +94,19 @@ class Problem(ABC):
 
         df_dtime = omega*fdrk.cos(omega*time) - omega*fdrk.sin(omega*time)
         return f_time, df_dtime
-    
\ No newline at end of file
+    
+    
+
+    def _get_separable_time_functions(self, omega=None):
+        """
+        Time functions of the manufactured (if omega is None) or eigen solution 
+        as functions of a float
+        """
+        if omega is None:
+            f_time = lambda time: 1/2*time**2
+            df_dtime = lambda time: time
+        else:
+            f_time = lambda time: math.sin(omega*time) + math.cos(omega*time)
+            df_dtime = lambda time: omega*math.cos(omega*time) - omega*math.sin(omega*time)
+
+        return f_time, df_dtime
@@ -0,0 +1,172 @@
+import firedrake as fdrk
+from src.problems.problem import Problem
+from .hamiltonian_solver import HamiltonianWaveSolver
+from firedrake.petsc import PETSc
+import numpy as np
+
+
+class AdaptiveTimeStepper:
+    def __init__(self,
+                 problem: Problem,
+                 system,
+                 time_step,
+                 tol,
+                 pol_degree=1,
+                 discretization="hybrid",
+                 formulation="primal",
+                 solver_parameters={},
+                 rebuild_threshold=0.2,
+                 safety=0.9,
+                 factor_min=0.2,
+                 factor_max=2,
+                 time_step_min=0,
+                 time_step_max=np.inf,
+                 verbose=False,
+                 **solver_options
+                ):
+        """
+        Adaptive time stepping of the implicit midpoint with Richardson error estimation.
+        A step of size dt is compared with two steps of size dt/2 (two solvers, each one
+        with its own assembled operator). The local error is estimated as
+            err = |x_dt/2 - x_dt| / (3 |x_dt/2|)
+        on the physical fields. The step is accepted if err <= tol, the accepted state is
+        the one of the two half steps. The new time step is dt (tol/err)^(1/3) times
+        the safety factor, within [factor_min, factor_max] dt. To avoid refactorizations
+        the operators are retargeted after an accepted step only if the relative change of dt 
+        reaches rebuild_threshold. A rejected step is repeated with a time step reduced at least 
+        by the factor 1 - rebuild_threshold
+        Parameters:
+            problem (Problem) : a problem instance
+            system (string) : "Wave" or "Maxwell"
+            time_step (float) : the initial time step
+            tol (float) : tolerance on the relative local error
+            rebuild_threshold (float) : minimal relative change of the time step
+            safety (float) : safety factor of the step size control
+            factor_min, factor_max (float) : bounds of the ratio between two time steps
+            time_step_min, time_step_max (float) : bounds of the time step
+            solver_options : other options of HamiltonianWaveSolver (constant_operator
+                is True by default)
+        """
+
+        self.problem = problem
+        self.time_step = time_step
+        self.tol = tol
+        self.rebuild_threshold = rebuild_threshold
+        self.safety = safety
+        self.factor_min = factor_min
+        self.factor_max = factor_max
+        self.time_step_min = time_step_min
+        self.time_step_max = time_step_max
+        self.verbose = verbose
+
+        solver_options.setdefault("constant_operator", True)
+
+        self.full_solver, self.half_solver = [HamiltonianWaveSolver(problem, system, dt, pol_degree=pol_degree, \
+                                                    discretization=discretization, formulation=formulation, \
+                                                    solver_parameters=solver_parameters, **solver_options) \
+                                              for dt in [time_step, time_step/2]]
+
+        # Accepted state and time
+        self.state = fdrk.Function(self.half_solver.space_operators)
+        self.state.assign(self.half_solver.state_old)
+        self.time = 0
+
+        # The error is measured on the fields, without the traces of the hybrid discretization
+        self.n_fields = 2
+
+        self.n_accepted = 0
+        self.n_rejected = 0
+        self.n_rebuilds = 0
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Adaptive time stepper set")
+
+
+    def step(self):
+        """
+        Attempts a time step from the accepted state.
+        Returns:
+            accepted (bool) : True if the step is accepted (the state and the time are updated)
+        """
+        time_step = self.time_step
+        for solver in (self.full_solver, self.half_solver):
+            self.state.dat.copy(solver.state_old.dat)
+            solver._set_time(self.time)
+
+        self.full_solver._solve_step()
+        self.half_solver.integrate_n(2)
+
+        error = self._estimate_error(self.full_solver.state_new, self.half_solver.state_old)
+        accepted = error <= self.tol
+
+        if accepted:
+            self.half_solver.state_old.dat.copy(self.state.dat)
+            self.time += time_step
+            self.n_accepted += 1
+        else:
+            if time_step <= self.time_step_min:
+                raise RuntimeError(f"Step rejected with the minimal time step {self.time_step_min}")
+            self.n_rejected += 1
+
+        if error > 0:
+            factor = self.safety*(self.tol/error)**(1/3)
+        else:
+            factor = self.factor_max
+        factor = min(self.factor_max, max(self.factor_min, factor))
+        if not accepted:
+            # A rejected step is always repeated with a smaller time step
+            factor = min(factor, 1 - self.rebuild_threshold)
+
+        new_time_step = min(self.time_step_max, max(self.time_step_min, factor*time_step))
+        # The threshold only filters the changes after an accepted step
+        # (with a slack for the rounding of factors at the threshold)
+        if not accepted or \
+            abs(new_time_step - time_step) >= (self.rebuild_threshold - 1e-12)*time_step:
+            self.set_time_step(new_time_step)
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Time {self.time:.4e}, dt {time_step:.3e}, error {error:.3e}, accepted {accepted}")
+
+        return accepted
+
+
+    def _estimate_error(self, state_full, state_half):
+        difference_norm = 0
+        half_norm = 0
+        for kk in range(self.n_fields):
+            with state_full.dat[kk].vec_ro as full_vec, state_half.dat[kk].vec_ro as half_vec:
+                difference = half_vec.copy()
+                difference.axpy(-1, full_vec)
+                difference_norm += difference.norm()**2
+                half_norm += half_vec.norm()**2
+
+        return np.sqrt(difference_norm) / (3*max(np.sqrt(half_norm), np.finfo(float).tiny))
+
+
+    def set_time_step(self, time_step):
+        """
+        Retargets both solvers, the operators are refactorized at the next step
+        """
+        self.time_step = time_step
+        self.full_solver.set_time_step(time_step)
+        self.half_solver.set_time_step(time_step/2)
+        self.n_rebuilds += 1
+
+
+    def integrate_until(self, final_time, callback=None):
+        """
+        Advances the solution up to final_time. The last step is shortened to end at final_time
+        Parameters:
+            final_time (float) : final time
+            callback (callable) : function callback(stepper) called after each accepted step
+        """
+        while final_time - self.time > 1e-12*final_time:
+            if self.time + self.time_step > final_time:
+                self.set_time_step(final_time - self.time)
+
+            if self.step() and callback is not None:
+                callback(self)
+
+
+    def statistics(self):
+        return {"accepted": self.n_accepted, "rejected": self.n_rejected, "rebuilds": self.n_rebuilds}
@@ -0,0 +1,168 @@
+import firedrake as fdrk
+from firedrake.petsc import PETSc
+from pyop2 import op2
+import numpy as np
+from src.operators.utils import boundary_form
+from .linear_system import boundary_rows
+
+
+class EssentialBoundaryConditions:
+    def __init__(self, operators, space_bc, value_bc, list_id_bc, projection=False):
+        """
+        Evaluator of time dependent essential boundary conditions. The boundary nodes,
+        the interpolation kernel (restricted to the cells touching the boundary) or the
+        boundary mass matrix of the projection are set up once. At each update the data
+        are evaluated on the boundary facets only. 
+        If the data are separable, sum_k g_k(x) f_k(t), the spatial parts are evaluated
+        once and an update is a linear combination of the boundary values
+        Parameters:
+            operators (SystemOperators) : the operators of the system
+            space_bc (FunctionSpace) : the space of the essential boundary conditions
+            value_bc (ufl.Expr or list) : the boundary data (depending on a time Constant)
+                or a list of separable terms (spatial expression, time function of a float)
+            list_id_bc (list) : ids of the boundary subdomains
+            projection (bool) : if True the data are projected on the boundary traces
+                (used when the trace space does not support interpolation)
+        """
+
+        self.operators = operators
+        self.space_bc = space_bc
+        self.value_bc = value_bc
+        self.list_id_bc = list_id_bc
+        self.projection = projection
+        self.separable = isinstance(value_bc, list)
+
+        self.bc_function = fdrk.Function(space_bc)
+        self.bcs = [fdrk.DirichletBC(space_bc, self.bc_function, id_bc) for id_bc in list_id_bc]
+
+        if not self.list_id_bc:
+            return
+
+        self.boundary_mask, self.boundary_is = boundary_rows(self.space_bc, self.bcs)
+
+        if self.projection:
+            self._set_projection()
+
+        if self.separable:
+            self._set_separable()
+        elif self.projection:
+            self.l_functional = self._projection_functional(self.value_bc)
+        else:
+            self.interpolator = self._interpolator(self.value_bc)
+
+
+    def _boundary_cells(self):
+        domain = self.operators.domain
+        exterior_facets = domain.exterior_facets
+
+        if "on_boundary" in self.list_id_bc:
+            facet_indices = np.arange(exterior_facets.set.size)
+        else:
+            facet_indices = exterior_facets.subset(self.list_id_bc).indices
+
+        cells = np.unique(exterior_facets.facet_cell[facet_indices])
+        return op2.Subset(domain.cell_set, cells)
+
+
+    def _interpolator(self, value):
+        if self.operators.domain.extruded:
+            # Cell subsets of extruded meshes are not supported by the interpolation
+            subset = None
+        else:
+            subset = self._boundary_cells()
+
+        return fdrk.Interpolator(value, self.bc_function, subset=subset)
+
+
+    def _set_projection(self):
+        trial_function = fdrk.TrialFunction(self.space_bc)
+        test_function = fdrk.TestFunction(self.space_bc)
+
+        # Only the bilinear part is used here, the data enter in _projection_functional
+        a_integrand, _ = self.operators.boundary_projection_integrands(test_function, \
+                                                                 trial_function, self.bc_function)
+        a_operator = boundary_form(a_integrand, self.list_id_bc, self.operators.domain.extruded)
+
+        mass_matrix = fdrk.assemble(a_operator).petscmat
+        self.boundary_mass = mass_matrix.createSubMatrix(self.boundary_is, self.boundary_is)
+
+        self.ksp = PETSc.KSP().create(comm=self.boundary_mass.getComm())
+        self.ksp.setOperators(self.boundary_mass)
+        self.ksp.setType("cg")
+        self.ksp.getPC().setType("jacobi")
+        self.ksp.setTolerances(rtol=1e-12)
+
+        self.boundary_rhs, self.boundary_solution = self.boundary_mass.createVecs()
+        self.rhs = None
+
+
+    def _projection_functional(self, value):
+        trial_function = fdrk.TrialFunction(self.space_bc)
+        test_function = fdrk.TestFunction(self.space_bc)
+
+        _, l_integrand = self.operators.boundary_projection_integrands(test_function, \
+                                                                 trial_function, value)
+        return boundary_form(l_integrand, self.list_id_bc, self.operators.domain.extruded)
+
+
+    def _project(self):
+        if self.rhs is None:
+            self.rhs = fdrk.assemble(self.l_functional)
+        else:
+            fdrk.assemble(self.l_functional, tensor=self.rhs)
+
+        with self.rhs.dat.vec_ro as rhs_vec:
+            boundary_rhs_vec = rhs_vec.getSubVector(self.boundary_is)
+            boundary_rhs_vec.copy(self.boundary_rhs)
+            rhs_vec.restoreSubVector(self.boundary_is, boundary_rhs_vec)
+
+        self.ksp.solve(self.boundary_rhs, self.boundary_solution)
+
+        with self.bc_function.dat.vec as bc_vec:
+            bc_vec.array[self.boundary_mask] = self.boundary_solution.array_r
+
+
+    def _set_separable(self):
+        """
+        Evaluates once the spatial part of each separable term on the boundary
+        """
+        self.list_time_functions = []
+        list_boundary_values = []
+
+        if not self.value_bc:
+            # Homogeneous data, the boundary values stay zero
+            self.boundary_values = np.zeros((0, np.count_nonzero(self.boundary_mask)))
+            return
+
+        for spatial_value, time_function in self.value_bc:
+            if self.projection:
+                self.l_functional = self._projection_functional(spatial_value)
+                self.rhs = None
+                self._project()
+            else:
+                self._interpolator(spatial_value).interpolate()
+
+            with self.bc_function.dat.vec_ro as bc_vec:
+                list_boundary_values.append(bc_vec.array_r[self.boundary_mask].copy())
+            self.list_time_functions.append(time_function)
+
+        self.boundary_values = np.array(list_boundary_values).reshape(len(self.value_bc), -1)
+        self.bc_function.dat.zero()
+
+
+    def update(self, time=None):
+        """
+        Evaluates the boundary data at the current value of the time Constant.
+        Separable data are evaluated at the float time
+        """
+        if not self.list_id_bc:
+            return
+
+        if self.separable:
+            coefficients = np.array([time_function(time) for time_function in self.list_time_functions])
+            with self.bc_function.dat.vec as bc_vec:
+                bc_vec.array[self.boundary_mask] = coefficients @ self.boundary_values
+        elif self.projection:
+            self._project()
+        else:
+            self.interpolator.interpolate()
@@ -0,0 +1,127 @@
+import firedrake as fdrk
+import numpy as np
+
+
+class CellwiseLocalSolver:
+    def __init__(self, local_operator, space_local):
+        """
+        Inverse of a cell local (block diagonal) operator on a broken mixed space.
+        The inverse of each cell block is computed once and stored as a contiguous
+        array of dense blocks, so that local solves become a batched gather, matvec
+        and scatter over the cells
+        Parameters:
+            local_operator (slate.TensorBase or list) : local block of the operator (cell local),
+                or a list of terms (local block, callable returning the coefficient). The cell 
+                blocks of the terms are computed once and combined at each assembly
+            space_local (MixedFunctionSpace) : the broken mixed space
+        """
+
+        self.local_operator = local_operator
+        self.space_local = space_local
+
+        self._set_cell_dofs()
+        self.term_blocks = None
+        self.is_dirty = True
+
+
+    def _set_cell_dofs(self):
+        """
+        Indices of the owned dofs of each cell in the (owned) vector of the local space,
+        ordered as the concatenation of the subspaces. On extruded meshes the cell node map
+        only covers the bottom layer, the nodes of the other layers are shifted by the map offset
+        """
+        domain = self.space_local.mesh()
+        if domain.extruded and domain.variable_layers:
+            raise NotImplementedError("The cellwise local solver does not support variable layers")
+
+        list_cell_dofs = []
+        self.field_slices = []
+        self.field_dofs = []
+        offset = 0
+        counter_cell_dofs = 0
+        for subspace in self.space_local:
+            cdim = subspace.dof_dset.cdim
+            cell_node_map = subspace.cell_node_map()
+            cell_nodes = cell_node_map.values
+            if domain.extruded:
+                n_layers = domain.layers - 1
+                cell_nodes = (cell_nodes[:, None, :] + np.arange(n_layers)[None, :, None]*cell_node_map.offset)\
+                                .reshape(-1, cell_nodes.shape[1])
+            cell_dofs = (cdim * cell_nodes[:, :, None] + np.arange(cdim)).reshape(cell_nodes.shape[0], -1)
+
+            self.field_dofs.append(cell_dofs)
+            self.field_slices.append(slice(counter_cell_dofs, counter_cell_dofs + cell_dofs.shape[1]))
+            list_cell_dofs.append(offset + cell_dofs)
+
+            offset += cdim * subspace.dof_dset.size
+            counter_cell_dofs += cell_dofs.shape[1]
+
+        self.cell_dofs = np.hstack(list_cell_dofs)
+        self.n_cells, self.n_dofs_cell = self.cell_dofs.shape
+
+        assert self.n_cells * self.n_dofs_cell == offset, "The local space is not broken"
+
+        self.cell_of_dof = np.empty(offset, dtype=int)
+        self.position_of_dof = np.empty(offset, dtype=int)
+        self.cell_of_dof[self.cell_dofs] = np.arange(self.n_cells)[:, None]
+        self.position_of_dof[self.cell_dofs] = np.arange(self.n_dofs_cell)[None, :]
+
+
+    def invalidate(self):
+        self.is_dirty = True
+
+
+    def assemble(self):
+        if isinstance(self.local_operator, list):
+            if self.term_blocks is None:
+                self.term_blocks = [self._assemble_blocks(term) for term, _ in self.local_operator]
+            blocks = sum(coefficient()*term_blocks for (_, coefficient), term_blocks \
+                         in zip(self.local_operator, self.term_blocks))
+        else:
+            blocks = self._assemble_blocks(self.local_operator)
+
+        self.inverse_blocks = np.linalg.inv(blocks)
+        self.is_dirty = False
+
+
+    def _assemble_blocks(self, local_tensor):
+        """
+        Dense cell blocks of shape (n_cells, n_dofs_cell, n_dofs_cell) of a cell local tensor
+        """
+        local_matrix = fdrk.assemble(local_tensor, mat_type="aij").petscmat
+        row_start = local_matrix.getOwnershipRange()[0]
+        indptr, indices, values = local_matrix.getValuesCSR()
+
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        columns = indices - row_start
+
+        blocks = np.zeros((self.n_cells, self.n_dofs_cell, self.n_dofs_cell))
+        blocks[self.cell_of_dof[rows], self.position_of_dof[rows], self.position_of_dof[columns]] = values
+        return blocks
+
+
+    def gather(self, function):
+        """
+        Returns the coefficients of a function (or cofunction) on the local space
+        as an array of shape (n_cells, n_dofs_cell)
+        """
+        with function.dat.vec_ro as function_vec:
+            return function_vec.array_r[self.cell_dofs]
+
+
+    def scatter(self, cell_values, target_dats):
+        """
+        Writes the cell values into the owned entries of the dats of each local field
+        """
+        for field_slice, field_dofs, target_dat in zip(self.field_slices, self.field_dofs, target_dats):
+            target_dat.data.reshape(-1)[field_dofs] = cell_values[:, field_slice]
+
+
+    def solve(self, cell_rhs):
+        """
+        Batched local solve for the cell right hand sides of shape (n_cells, n_dofs_cell)
+        """
+        if self.is_dirty:
+            self.assemble()
+
+        return np.einsum('cij,cj->ci', self.inverse_blocks, cell_rhs)
@@ -0,0 +1,139 @@
+from src.problems.problem import Problem
+from .hamiltonian_solver import HamiltonianWaveSolver
+from .linear_system import BlockDiagonalSystem
+from firedrake.petsc import PETSc
+
+
+class DualFieldSolver:
+    def __init__(self,
+                 problem: Problem,
+                 system,
+                 time_step,
+                 pol_degree=1,
+                 discretization="hybrid",
+                 solver_parameters={},
+                 block_solve=False,
+                 verbose=False,
+                 **solver_options
+                ):
+        """
+        Primal and dual formulations of the same problem advanced together. The two
+        solvers share the mesh and the problem data, the time step and the time Constants,
+        which are updated once per step. The operators, the spaces and the boundary data
+        are not shared: the two formulations are discretized in different spaces, and the
+        data imposed as essential in one formulation enter the other one as natural (e.g.
+        for the wave equation the Neumann data are essential in the primal formulation, 
+        the Dirichlet data in the dual one). The de Rham spaces of the mesh are cached by
+        Firedrake, so building them twice does not duplicate the numbering of the dofs
+        Parameters:
+            problem (Problem) : a problem instance
+            system (string) : "Wave" or "Maxwell"
+            time_step (float) : the time step
+            pol_degree (int) : integer for the polynomial degree of the finite elements
+            discretization (string) : "hybrid" or "mixed"
+            solver_parameters (dictionary) : PETSc options of both linear systems
+            block_solve (bool) : if True the two global systems are solved as one block
+                diagonal system (it requires constant_operator or direct_solver)
+            solver_options : other options of HamiltonianWaveSolver (e.g. constant_operator)
+        """
+
+        self.problem = problem
+        self.time_step = time_step
+        self.block_solve = block_solve
+        self.verbose = verbose
+
+        self.primal_solver = HamiltonianWaveSolver(problem, system, time_step, pol_degree=pol_degree, \
+                                                   discretization=discretization, formulation="primal", \
+                                                   solver_parameters=solver_parameters, \
+                                                   verbose=verbose, **solver_options)
+
+        self.dual_solver = HamiltonianWaveSolver(problem, system, time_step, pol_degree=pol_degree, \
+                                                 discretization=discretization, formulation="dual", \
+                                                 solver_parameters=solver_parameters, \
+                                                 shared_time=self.primal_solver, \
+                                                 verbose=verbose, **solver_options)
+
+        self.solvers = (self.primal_solver, self.dual_solver)
+
+        self.time_old = self.primal_solver.time_old
+        self.time_midpoint = self.primal_solver.time_midpoint
+        self.time_new = self.primal_solver.time_new
+        self.actual_time = self.primal_solver.actual_time
+
+        if self.block_solve:
+            if not self.primal_solver.constant_operator:
+                raise ValueError("The block solve requires constant_operator")
+            self.block_system = BlockDiagonalSystem([solver.linear_system() for solver in self.solvers])
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Dual field solver set")
+
+
+    def integrate(self):
+        self._solve_step()
+
+        for solver in self.solvers:
+            solver.state_midpoint.assign(0.5*(solver.state_new + solver.state_old))
+        self.actual_time.assign(self.time_new)
+
+
+    def update_variables(self):
+        for solver in self.solvers:
+            solver.state_old.assign(solver.state_new)
+
+        self.primal_solver._set_time(float(self.actual_time))
+
+
+    def integrate_n(self, n_steps, callback=None, callback_every=1):
+        """
+        Performs n_steps time steps of both formulations, see HamiltonianWaveSolver.integrate_n.
+        The callback is called as callback(dual_field_solver, step)
+        """
+        time_start = float(self.time_old)
+
+        for step in range(1, n_steps+1):
+            self._solve_step()
+
+            call_back = callback is not None and step % callback_every == 0
+            for solver in self.solvers:
+                if call_back or step==n_steps:
+                    solver.state_midpoint.assign(0.5*(solver.state_new + solver.state_old))
+                solver.state_new.dat.copy(solver.state_old.dat)
+
+            self.primal_solver._set_time(time_start + step*self.time_step)
+
+            if call_back:
+                callback(self, step)
+
+
+    def _solve_step(self):
+        for solver in self.solvers:
+            solver._prepare_step()
+
+        if self.block_solve:
+            self.block_system.solve()
+        else:
+            for solver in self.solvers:
+                solver.linear_system().solve()
+
+        for solver in self.solvers:
+            solver._finish_step()
+
+
+    def set_time_step(self, time_step):
+        """
+        Retargets both formulations to a new time step (the time Constants are shared)
+        """
+        self.time_step = time_step
+        for solver in self.solvers:
+            solver.set_time_step(time_step)
+
+
+    def invalidate_operator(self):
+        for solver in self.solvers:
+            solver.invalidate_operator()
+
+
+    def reset(self):
+        for solver in self.solvers:
+            solver.reset()
@@ -0,0 +1,108 @@
+import firedrake as fdrk
+from src.problems.problem import Problem
+from .load_contributions import SeparableLoad, FormLoad
+
+
+class ForcingAssembler:
+    def __init__(self, problem: Problem, tests, time_step, time_midpoint: fdrk.Constant, separable=False):
+        """
+        Load vector of the forcing at the midpoint of the time step. Depending on what 
+        the problem provides, the forcing is
+            - separable (separable=True): the spatial parts are assembled once
+            - piecewise constant in time: one vector is assembled once for each time window
+            - a generic form: assembled at each step, reusing the memory of the vector
+        Outside of the time support declared by the problem no assembly takes place
+        Parameters:
+            problem (Problem) : a problem instance with forcing
+            tests (tuple) : test functions of the full space
+            time_step (float or Constant) : the time step, scaling the load
+            time_midpoint (Constant) : midpoint time used by the generic form
+            separable (bool) : if True the separable forcing of the problem is used
+        """
+
+        self.problem = problem
+        self.tests = tests
+        self.time_step = time_step
+        self.time_support = problem.get_forcing_time_support()
+
+        if separable:
+            tuple_forcing = problem.get_separable_forcing()
+            if tuple_forcing is None:
+                raise ValueError(f"The problem {str(problem)} does not provide a separable forcing")
+            self.mode = "separable"
+
+            self.separable_load = SeparableLoad(scale=time_step)
+            for counter, list_forcing_terms in enumerate(tuple_forcing):
+                if list_forcing_terms is None:
+                    continue
+                for spatial_force, time_function in list_forcing_terms:
+                    self.separable_load.add_term(self._forcing_functional({counter: spatial_force}), time_function)
+            return
+
+        list_windows = problem.get_piecewise_constant_forcing()
+        if list_windows is not None:
+            self.mode = "piecewise"
+
+            self.list_windows = []
+            for t_start, t_end, tuple_forcing in list_windows:
+                functional = self._forcing_functional(dict(enumerate(tuple_forcing)))
+                if functional is None:
+                    continue
+                with fdrk.assemble(functional).dat.vec_ro as window_vec:
+                    self.list_windows.append((t_start, t_end, window_vec.copy()))
+        else:
+            self.mode = "form"
+
+            functional = self._forcing_functional(dict(enumerate(problem.get_forcing(time_midpoint))))
+            self.form_load = None if functional is None else FormLoad(functional, scale=time_step)
+
+
+    def _forcing_functional(self, dict_forcing):
+        """
+        Linear form of the forcing (not scaled by the time step). 
+        The keys of the dictionary are the indices of the test functions
+        """
+        functional = None
+        for counter, force in dict_forcing.items():
+            if force is None:
+                continue
+            force_term = fdrk.inner(self.tests[counter], force)*fdrk.dx
+            functional = force_term if functional is None else functional + force_term
+
+        return functional
+
+
+    def is_active(self, time):
+        if self.time_support is None:
+            return True
+        
+        t_start, t_end = self.time_support
+        return t_start <= time < t_end
+
+
+    def add_to(self, load_vec, time):
+        """
+        Adds the forcing load at a given (float) midpoint time to a PETSc vector
+        Returns:
+            active (bool) : False if the forcing is zero at this time
+        """
+        if not self.is_active(time):
+            return False
+
+        if self.mode=="separable":
+            self.separable_load.add_to(load_vec, time)
+
+        elif self.mode=="piecewise":
+            for t_start, t_end, window_vec in self.list_windows:
+                if t_start <= time < t_end:
+                    load_vec.axpy(float(self.time_step), window_vec)
+                    return True
+            return False
+        
+        else:
+            if self.form_load is None:
+                return False
+            
+            self.form_load.add_to(load_vec)
+
+        return True
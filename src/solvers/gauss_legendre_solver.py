@@ -0,0 +1,240 @@
+import firedrake as fdrk
+from src.problems.problem import Problem
+from .hamiltonian_solver import HamiltonianWaveSolver
+from .linear_system import AssembledLinearSystem
+from .boundary_conditions import EssentialBoundaryConditions
+from firedrake.petsc import PETSc
+from pyop2 import op2
+import numpy as np
+
+
+def gauss_legendre_tableau(n_stages):
+    """
+    Butcher tableau of the Gauss-Legendre collocation method with n_stages stages (order 2 n_stages)
+    Returns:
+        a_matrix (array) : coefficients a_ij
+        b_weights (array) : weights b_j
+        c_nodes (array) : nodes c_i in (0, 1)
+    """
+    nodes, _ = np.polynomial.legendre.leggauss(n_stages)
+    c_nodes = np.sort(0.5*(nodes + 1))
+
+    a_matrix = np.zeros((n_stages, n_stages))
+    b_weights = np.zeros(n_stages)
+    for jj in range(n_stages):
+        # Lagrange polynomial of the node c_j
+        other_nodes = np.delete(c_nodes, jj)
+        lagrange_poly = np.polynomial.Polynomial.fromroots(other_nodes) / np.prod(c_nodes[jj] - other_nodes)
+        lagrange_integral = lagrange_poly.integ()
+
+        a_matrix[:, jj] = lagrange_integral(c_nodes) - lagrange_integral(0)
+        b_weights[jj] = lagrange_integral(1) - lagrange_integral(0)
+
+    return a_matrix, b_weights, c_nodes
+
+
+class GaussLegendreSolver(HamiltonianWaveSolver):
+    def __init__(self,
+                 problem: Problem,
+                 system,
+                 time_step,
+                 n_stages=2,
+                 pol_degree=1,
+                 discretization="hybrid",
+                 formulation="primal",
+                 solver_parameters={},
+                 verbose=False
+                ):
+        """
+        Gauss-Legendre collocation (implicit Runge-Kutta) of order 2 n_stages, symplectic
+        and energy preserving for the linear port-Hamiltonian systems. The unknowns are
+        the stage values X_i, solution of
+            M (X_i - x_old) = dt sum_j a_ij (J X_j + u(t_j) + f(t_j))
+        and x_new = x_old + b^T A^{-1} (X - x_old), with the essential boundary data at the end
+        of the step imposed again on x_new. With n_stages=1 it is the implicit
+        midpoint (with the essential boundary conditions imposed at the midpoint).
+        In the hybrid discretization the stage system is statically condensed on the traces
+        of all the stages. The operator (and its factorization) is assembled once
+        Parameters:
+            problem (Problem) : a problem instance
+            system (string) : "Wave" or "Maxwell"
+            time_step (float) : the time step
+            n_stages (int) : number of stages
+            pol_degree (int) : integer for the polynomial degree of the finite elements
+            discretization (string) : "hybrid" or "mixed"
+            formulation (string) :  "primal" or "dual"
+            solver_parameters (dictionary) : PETSc options of the stage (or trace) system
+        """
+        self.n_stages = n_stages
+        self.a_matrix, self.b_weights, self.c_nodes = gauss_legendre_tableau(n_stages)
+
+        # x_new = w_0 x_old + sum_i w_i X_i
+        self.stage_weights = np.linalg.solve(self.a_matrix.T, self.b_weights)
+        self.old_weight = 1 - np.sum(self.stage_weights)
+
+        self.stage_times = [fdrk.Constant(node*time_step) for node in self.c_nodes]
+
+        super().__init__(problem, system, time_step, pol_degree=pol_degree, \
+                         discretization=discretization, formulation=formulation, \
+                         solver_parameters=solver_parameters, constant_operator=True, \
+                         verbose=verbose)
+
+
+    def _set_spaces(self):
+        super()._set_spaces()
+
+        self.n_fields = len(self.space_operators)
+        self.stage_space = fdrk.MixedFunctionSpace([space for _ in range(self.n_stages) \
+                                                    for space in self.space_operators])
+        self.stage_solution = fdrk.Function(self.stage_space)
+
+        stage_tests = fdrk.TestFunctions(self.stage_space)
+        stage_trials = fdrk.TrialFunctions(self.stage_space)
+        self.stage_tests = [stage_tests[ii*self.n_fields:(ii+1)*self.n_fields] for ii in range(self.n_stages)]
+        self.stage_trials = [stage_trials[ii*self.n_fields:(ii+1)*self.n_fields] for ii in range(self.n_stages)]
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Dimension of stage space: {self.stage_space.dim()} ")
+
+
+    def _set_boundary_conditions(self):
+        if self.operators.discretization=="hybrid":
+            n_block_loc = self.operators.mixedspace_local.num_sub_spaces()
+            self.global_indices = [ii*self.n_fields + n_block_loc for ii in range(self.n_stages)]
+            self.local_indices = [ii*self.n_fields + kk for ii in range(self.n_stages) \
+                                  for kk in range(n_block_loc)]
+            self.global_space = fdrk.MixedFunctionSpace([self.operators.space_global]*self.n_stages)
+            list_space_bc = [self.global_space.sub(ii) for ii in range(self.n_stages)]
+        else:
+            index_bc = self.operators.essential_boundary_conditions(self.problem, \
+                                                                    time=self.stage_times[0])["space"].index
+            list_space_bc = [self.stage_space.sub(ii*self.n_fields + index_bc) for ii in range(self.n_stages)]
+
+        projection_bc = self.operators.discretization=="hybrid" and \
+                        "quadrilateral" in self.operators.cell_name and self.pol_degree>1
+
+        # Boundary data of each stage, at the stage time
+        self.list_bc_evaluators = []
+        self.list_natural_bcs = []
+        for stage_time, space_bc in zip(self.stage_times, list_space_bc):
+            dict_essential_bcs = self.operators.essential_boundary_conditions(self.problem, time=stage_time)
+            self.list_bc_evaluators.append(EssentialBoundaryConditions(self.operators, space_bc, \
+                                                                       dict_essential_bcs["value"], \
+                                                                       dict_essential_bcs["list_id"], \
+                                                                       projection=projection_bc))
+            self.list_natural_bcs.append(self.operators.natural_boundary_conditions(self.problem, time=stage_time))
+
+        self.essential_bcs = [bc for bc_evaluator in self.list_bc_evaluators for bc in bc_evaluator.bcs]
+
+        # The stage combination of the traces (hybrid) or of the essential field (mixed) does not
+        # match the boundary data at the end of the step, they are imposed again on x_new
+        dict_essential_bcs = self.operators.essential_boundary_conditions(self.problem, time=self.time_new)
+        if self.operators.discretization=="hybrid":
+            space_bc_new = self.space_operators.sub(self.n_fields - 1)
+        else:
+            space_bc_new = dict_essential_bcs["space"]
+        self.bc_evaluator_new = EssentialBoundaryConditions(self.operators, space_bc_new, \
+                                                            dict_essential_bcs["value"], \
+                                                            dict_essential_bcs["list_id"], \
+                                                            projection=projection_bc)
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Boundary conditions set")
+
+
+    def _set_solver(self):
+        self.load = None
+
+        A_operator = 0
+        b_functional = 0
+        for ii, tests in enumerate(self.stage_tests):
+            mass_operator, _ = self.operators.dynamics(tests, self.stage_trials[ii])
+            mass_functional, _ = self.operators.dynamics(tests, self.state_old.subfunctions)
+            A_operator += mass_operator
+            b_functional += mass_functional
+
+            for jj, trials in enumerate(self.stage_trials):
+                a_coefficient = self.a_matrix[ii, jj] * self.time_step_constant
+                _, dynamics_operator = self.operators.dynamics(tests, trials)
+                A_operator -= a_coefficient * dynamics_operator
+
+                if self.list_natural_bcs[jj] is not None:
+                    b_functional += a_coefficient * self.operators.control(tests, self.list_natural_bcs[jj])
+
+                if self.problem.forcing:
+                    tuple_forcing = self.problem.get_forcing(self.stage_times[jj])
+                    for counter, force in enumerate(tuple_forcing):
+                        if force is not None:
+                            b_functional += a_coefficient * fdrk.inner(tests[counter], force) * fdrk.dx
+
+        if self.operators.discretization=="mixed":
+            self.stage_system = AssembledLinearSystem(A_operator, b_functional, self.stage_solution, \
+                                                      bcs=self.essential_bcs, \
+                                                      solver_parameters=self.solver_parameters)
+        else:
+            A_blocks = fdrk.Tensor(A_operator).blocks
+            F_blocks = fdrk.Tensor(b_functional).blocks
+
+            A_local_inverse = A_blocks[self.local_indices, self.local_indices].inv
+            A_local_global = A_blocks[self.local_indices, self.global_indices]
+            A_global_local = A_blocks[self.global_indices, self.local_indices]
+
+            global_operator = A_blocks[self.global_indices, self.global_indices] \
+                            - A_global_local * A_local_inverse * A_local_global
+            global_functional = F_blocks[self.global_indices] \
+                            - A_global_local * A_local_inverse * F_blocks[self.local_indices]
+
+            # The global and local solutions share the memory of the stage solution
+            self.global_multiplier = fdrk.Function(self.global_space, \
+                                    val=op2.MixedDat([self.stage_solution.dat[index] for index in self.global_indices]))
+            local_space = fdrk.MixedFunctionSpace([self.stage_space.sub(index).collapse() \
+                                                   for index in self.local_indices])
+            self.local_solution = fdrk.Function(local_space, \
+                                    val=op2.MixedDat([self.stage_solution.dat[index] for index in self.local_indices]))
+
+            self.stage_system = AssembledLinearSystem(global_operator, global_functional, self.global_multiplier, \
+                                                      bcs=self.essential_bcs, \
+                                                      solver_parameters=self.solver_parameters)
+            self.local_recovery = A_local_inverse * (F_blocks[self.local_indices] - A_local_global \
+                                                    * fdrk.AssembledVector(self.global_multiplier))
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Gauss-Legendre solver with {self.n_stages} stages set")
+
+
+    def linear_system(self):
+        return self.stage_system
+
+
+    def invalidate_operator(self):
+        self.stage_system.invalidate()
+
+
+    def _prepare_step(self):
+        for bc_evaluator in self.list_bc_evaluators:
+            bc_evaluator.update()
+
+
+    def _finish_step(self):
+        """
+        Local recovery of the stages (hybrid) and update x_new = w_0 x_old + sum_i w_i X_i
+        """
+        if self.operators.discretization=="hybrid":
+            fdrk.assemble(self.local_recovery, tensor=self.local_solution)
+
+        for kk in range(self.n_fields):
+            new_data = self.old_weight * self.state_old.dat[kk].data_ro
+            for ii, weight in enumerate(self.stage_weights):
+                new_data = new_data + weight * self.stage_solution.dat[ii*self.n_fields + kk].data_ro
+            self.state_new.dat[kk].data[:] = new_data
+
+        self.bc_evaluator_new.update()
+        for bc in self.bc_evaluator_new.bcs:
+            bc.apply(self.state_new)
+
+
+    def _set_time(self, time_old):
+        super()._set_time(time_old)
+
+        for stage_time, node in zip(self.stage_times, self.c_nodes):
+            stage_time.assign(time_old + node*self.time_step)
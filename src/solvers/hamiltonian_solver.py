@@ -3,7 +3,16 @@ from .solver import Solver
 from src.problems.problem import Problem
 from src.operators.maxwell_operators import MaxwellOperators
 from src.operators.wave_operators import WaveOperators
+from .linear_system import AssembledLinearSystem, LinearCombinationMatrix, direct_solver_parameters
+from .cellwise_local_solver import CellwiseLocalSolver
+from .boundary_conditions import EssentialBoundaryConditions
+from .load_contributions import SeparableLoad, FormLoad, MatrixLoad
+from .forcing import ForcingAssembler
+from .staggered_step import StaggeredHybridStep
+from .solver_profiles import solver_profile
+from .p_multigrid import trace_prolongations
 from firedrake.petsc import PETSc
+from pyop2 import op2
 import gc
 
 class HamiltonianWaveSolver(Solver):
@@ -15,6 +24,16 @@ class HamiltonianWaveSolver(Solver):
                  discretization="hybrid",
                  formulation="primal", 
                  solver_parameters={}, 
+                 constant_operator=False,
+                 cache_local_inverse=False,
+                 separable_data=False,
+                 matrix_rhs=False,
+                 direct_solver=None,
+                 shared_time=None,
+                 time_integrator="implicit_midpoint",
+                 recycle_size=0,
+                 extrapolate_guess=False,
+                 global_system=True,
                  verbose=False
                 ):
         """
@@ -25,15 +44,108 @@ class HamiltonianWaveSolver(Solver):
             discretization (string) : "hybrid" or "mixed"
             formulation (string) :  "primal" or "dual" 
             solver_parameter (dictionary) : dictionary containing the solver parameter  
-                polynomial degree (int), time step (float), final time (float)
+                polynomial degree (int), time step (float), final time (float). 
+                It can also be the name of a solver profile, "direct" or "iterative" (see solver_profile),
+                the iterations are logged in verbose mode. With mat_type "matfree" (hybrid, constant
+                operator) the trace operator is applied cell by cell and never assembled. In the mixed
+                discretization (without constant_operator) the mixed operator is applied matrix-free, 
+                the python preconditioners receive the operator and the index of the broken field 
+                in the application context (see mixed_preconditioners)
+            constant_operator (bool) : if True the operator (the condensed trace operator in the 
+                hybrid case) and its factorization are assembled once and reused at each time step. 
+                Only the right hand side is assembled in integrate. Call invalidate_operator 
+                if the time step or the material coefficients change
+            cache_local_inverse (bool) : if True (hybrid only) the inverses of the cell blocks 
+                of the local operator are computed once and stored as dense arrays. The local 
+                solves of the static condensation and of the recovery are then batched NumPy 
+                operations over the cells. The memory cost is the square of the local dofs per cell
+            separable_data (bool) : if True the boundary conditions and the forcing are taken from the 
+                separable (space x time) representation of the problem. Their spatial parts are evaluated
+                and assembled once, a time step only combines them with the scalar time functions.
+                In the mixed discretization it requires constant_operator
+            matrix_rhs (bool) : if True the matrix B = M + dt/2 J is assembled once and the right hand
+                side is computed as B x_old plus the control and forcing loads (a sparse matrix vector 
+                product instead of the assembly of a form). In the mixed discretization it requires 
+                constant_operator
+            direct_solver (string) : if given (e.g. "mumps") the global trace matrix (hybrid) or the 
+                mixed matrix is factorized once with this package, each time step only performs the 
+                forward and backward substitutions. The factorization is repeated when the operator 
+                is invalidated. It implies constant_operator
+            shared_time (HamiltonianWaveSolver) : a solver with the same time step whose time 
+                Constants are shared with this one (used to advance several formulations together)
+            time_integrator (string) : "implicit_midpoint" or "stormer_verlet" (hybrid only). 
+                The Stormer-Verlet scheme updates the field with the strong equation explicitly
+                with two half kicks, applying the inverse of its broken mass matrix cell by cell. 
+                Only the field with the weak equation and the traces are solved for, through a 
+                reduced trace system. The scheme is symplectic and second order but only 
+                conditionally stable: dt < 2/omega_max, with omega_max the largest frequency 
+                of the semi-discrete system (omega_max ~ c p^2/h)
+            recycle_size (int) : for an iterative solver of the assembled (constant) operator, number
+                of previous solutions whose span is used to compute the initial guess of the next solve
+            extrapolate_guess (bool) : for an iterative solver of the assembled (constant) operator, 
+                the initial guess is extrapolated from the solutions of the last two time steps
+            global_system (bool) : if False (hybrid implicit midpoint only) the global trace system
+                of the time step is not set. The solver only provides the spaces, the states, the 
+                boundary conditions and the loads to a step built outside (see StaggeredHybridStep),
+                integrate and linear_system are not available
         """
 
+        if direct_solver is not None:
+            if solver_parameters:
+                raise ValueError("Provide either solver_parameters or direct_solver")
+            solver_parameters = direct_solver_parameters(direct_solver)
+            constant_operator = True
+
         self.problem = problem
         self.pol_degree = pol_degree
         self.solver_parameters = solver_parameters
         self.time_step = time_step
+        # The forms depend on the time step through a Constant (see set_time_step)
+        if shared_time is None:
+            self.time_step_constant = fdrk.Constant(time_step)
+        else:
+            assert shared_time.time_step==time_step, "Solvers sharing the time need the same time step"
+            self.time_step_constant = shared_time.time_step_constant
+        self.shared_time = shared_time
+        self.constant_operator = constant_operator
+        self.cache_local_inverse = cache_local_inverse
+        self.separable_data = separable_data
+        self.matrix_rhs = matrix_rhs
+        self.time_integrator = time_integrator
+        self.recycle_size = recycle_size
+        self.extrapolate_guess = extrapolate_guess
+        self.global_system = global_system
         self.verbose = verbose
 
+        if time_integrator not in ("implicit_midpoint", "stormer_verlet"):
+            raise ValueError(f"Time integrator {time_integrator} is not a valid option")
+
+        if not global_system and (discretization!="hybrid" or time_integrator!="implicit_midpoint"):
+            raise ValueError("Only the hybrid implicit midpoint solver can be set without the global system")
+
+        if cache_local_inverse and discretization!="hybrid":
+            raise ValueError("The cache of the local inverses requires the hybrid discretization")
+
+        if time_integrator=="stormer_verlet":
+            if discretization!="hybrid":
+                raise ValueError("The Stormer-Verlet integrator requires the hybrid discretization")
+            if cache_local_inverse or matrix_rhs:
+                raise ValueError("The Stormer-Verlet integrator does not support cache_local_inverse and matrix_rhs")
+            # The reduced trace system is always assembled once
+            self.constant_operator = True
+
+        if (recycle_size > 0 or extrapolate_guess) and not self.constant_operator:
+            raise ValueError("Recycling and extrapolation of the initial guess require constant_operator")
+
+        if self.separable_data:
+            if problem.get_separable_boundary_conditions() is None:
+                raise ValueError(f"The problem {str(problem)} does not provide separable data")
+            if discretization=="mixed" and not constant_operator:
+                raise ValueError("Separable data in the mixed discretization require constant_operator")
+
+        if self.matrix_rhs and discretization=="mixed" and not constant_operator:
+            raise ValueError("Matrix based right hand side in the mixed discretization requires constant_operator")
+
         if system=="Maxwell":
             if discretization=="hybrid" :
                 self.operators = MaxwellOperators(discretization, formulation, problem, pol_degree)
@@ -47,6 +159,15 @@ class HamiltonianWaveSolver(Solver):
         else:
             ValueError(f"System type {system} is not a valid option")
 
+        if isinstance(solver_parameters, str):
+            self.solver_parameters = solver_profile(solver_parameters, self.operators, log_iterations=verbose)
+
+        if self.solver_parameters.get("mat_type")=="matfree":
+            if discretization=="hybrid" and not self.constant_operator:
+                raise ValueError("The matrix-free trace system requires constant_operator")
+            if discretization=="mixed" and self.constant_operator:
+                raise ValueError("The matrix-free mixed system is not available with constant_operator")
+
         if self.verbose:
             PETSc.Sys.Print(f"{str(self.operators)}")
         self._set_spaces()
@@ -72,6 +193,28 @@ class HamiltonianWaveSolver(Solver):
         """
         Setup spaces, initial values, boundary conditions
         """
+        if self.shared_time is None:
+            self.time_old = fdrk.Constant(0)
+            self.time_midpoint = fdrk.Constant(self.time_step/2)
+            self.time_new = fdrk.Constant(self.time_step)
+            self.actual_time = fdrk.Constant(0)
+        else:
+            self.time_old = self.shared_time.time_old
+            self.time_midpoint = self.shared_time.time_midpoint
+            self.time_new = self.shared_time.time_new
+            self.actual_time = self.shared_time.actual_time
+
+        self.reset()
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Inital conditions set")
+
+
+    def reset(self):
+        """
+        Restores the initial conditions and the initial time. The assembled operators 
+        are kept, e.g. to run the same problem with another time step
+        """
         expression_t0 = self.problem.get_initial_conditions()
 
         tuple_initial_conditions = self.operators.get_initial_conditions(expression_t0)
@@ -82,27 +225,32 @@ class HamiltonianWaveSolver(Solver):
         self.state_midpoint.assign(self.state_old)
         self.state_new.assign(self.state_old)
 
-        self.time_old = fdrk.Constant(0)
-        self.time_midpoint = fdrk.Constant(self.time_step/2)
-        self.time_new = fdrk.Constant(self.time_step)
-        self.actual_time = fdrk.Constant(0)
-
-        if self.verbose:
-            PETSc.Sys.Print(f"Inital conditions set")
+        self._set_time(0)
 
 
     def _set_boundary_conditions(self):
-        dict_essential_bcs = self.operators.essential_boundary_conditions(self.problem, time=self.time_new)
+        dict_essential_bcs = self.operators.essential_boundary_conditions(self.problem, time=self.time_new, \
+                                                                          separable=self.separable_data)
 
         self.space_bc = dict_essential_bcs["space"]
         self.value_bc = dict_essential_bcs["value"]
         self.list_id_bc = dict_essential_bcs["list_id"]
 
-        self.essential_bcs = []
-        for id_bc in self.list_id_bc:
-            self.essential_bcs.append(fdrk.DirichletBC(self.space_bc, self.value_bc, id_bc))            
+        # Trace spaces on quadrilaterals of degree > 1 do not support interpolation
+        projection_bc = self.operators.discretization=="hybrid" and \
+                        "quadrilateral" in self.operators.cell_name and self.pol_degree>1
 
-        self.natural_bcs = self.operators.natural_boundary_conditions(self.problem, time=self.time_midpoint)
+        self.bc_evaluator = EssentialBoundaryConditions(self.operators, self.space_bc, self.value_bc, \
+                                                        self.list_id_bc, projection=projection_bc)
+        self.essential_bcs = self.bc_evaluator.bcs
+
+        if self.separable_data:
+            # The natural bcs enter the load assembled once in _set_load
+            self.natural_bcs = None
+            self.separable_natural_bcs = self.operators.natural_boundary_conditions(self.problem, \
+                                                            time=self.time_midpoint, separable=True)
+        else:
+            self.natural_bcs = self.operators.natural_boundary_conditions(self.problem, time=self.time_midpoint)
 
         if self.verbose:
             PETSc.Sys.Print(f"Boundary conditions set")
@@ -111,24 +259,53 @@ class HamiltonianWaveSolver(Solver):
     def _set_solver(self):
         states_old = self.state_old.subfunctions
 
-        A_operator = self.operators.operator_implicit_midpoint(self.time_step, \
+        A_operator = self.operators.operator_implicit_midpoint(self.time_step_constant, \
                     self.tests, self.trials)
+
+        # Mass and dynamics matrices assembled separately, combined as M - dt/2 J
+        self.mass_operator, self.dynamics_operator = self.operators.dynamics(self.tests, self.trials)
+        self.lhs_matrix = LinearCombinationMatrix([self.mass_operator, self.dynamics_operator], \
+                                                  [lambda: 1, lambda: -0.5*self.time_step])
         
-        b_functional = self.operators.functional_implicit_midpoint(self.time_step, \
-                    self.tests, states_old, control=self.natural_bcs)
+        if self.matrix_rhs:
+            # The right hand side is given by the load only
+            b_functional = None
+        else:
+            b_functional = self.operators.functional_implicit_midpoint(self.time_step_constant, \
+                        self.tests, states_old, control=self.natural_bcs)
         
-        if self.problem.forcing:
+        # The forcing enters the form only if the linear solver does not accept a load vector
+        forcing_in_form = self.operators.discretization=="mixed" and not self.constant_operator
+        self._set_load(forcing_in_load=self.problem.forcing and not forcing_in_form)
+
+        if self.problem.forcing and forcing_in_form:
             if self.verbose:
                 PETSc.Sys.Print("Problem with forcing term")
             tuple_forcing = self.problem.get_forcing(self.time_midpoint)
 
             for counter, force in enumerate(tuple_forcing):
                 if force is not None:
-                    b_functional += self.time_step*fdrk.inner(self.tests[counter], force)*fdrk.dx
+                    b_functional += self.time_step_constant*fdrk.inner(self.tests[counter], force)*fdrk.dx
 
         if self.operators.discretization=="mixed":
-            linear_problem = fdrk.LinearVariationalProblem(A_operator, b_functional, self.state_new, bcs=self.essential_bcs)
-            self.solver =  fdrk.LinearVariationalSolver(linear_problem, solver_parameters=self.solver_parameters)
+            if self.constant_operator:
+                self.solver = AssembledLinearSystem(self.lhs_matrix, b_functional, self.state_new, \
+                                                    bcs=self.essential_bcs, solver_parameters=self.solver_parameters, \
+                                                    rhs_load=self.load, recycle_size=self.recycle_size, \
+                                                    extrapolate_guess=self.extrapolate_guess)
+            else:
+                linear_problem = fdrk.LinearVariationalProblem(A_operator, b_functional, self.state_new, bcs=self.essential_bcs)
+                _, broken_index = self.operators.staggered_indices()
+                self.solver =  fdrk.LinearVariationalSolver(linear_problem, solver_parameters=self.solver_parameters, \
+                                                            appctx={"mixed_operator": A_operator, \
+                                                                    "broken_index": broken_index})
+
+        elif self.time_integrator=="stormer_verlet":
+            self._set_stormer_verlet()
+
+        elif not self.global_system:
+            if self.verbose:
+                PETSc.Sys.Print(f"Solver set without the global system")
 
         else:
             self.n_block_loc = self.operators.mixedspace_local.num_sub_spaces()
@@ -138,63 +315,209 @@ class HamiltonianWaveSolver(Solver):
             self.A_global_operator = self.A_blocks[self.n_block_loc, self.n_block_loc] - self.A_blocks[self.n_block_loc, :self.n_block_loc] \
                 * self.A_blocks[:self.n_block_loc, :self.n_block_loc].inv * self.A_blocks[:self.n_block_loc, self.n_block_loc]
             
-            _F = fdrk.Tensor(b_functional)
+            if b_functional is None:
+                _F = fdrk.AssembledVector(self.load)
+            else:
+                _F = fdrk.Tensor(b_functional)
+                if self.load is not None:
+                    _F = _F + fdrk.AssembledVector(self.load)
             self.F_blocks = _F.blocks
 
-            self.b_global_functional = self.F_blocks[self.n_block_loc] - self.A_blocks[self.n_block_loc, :self.n_block_loc] \
-                * self.A_blocks[:self.n_block_loc, :self.n_block_loc].inv * self.F_blocks[:self.n_block_loc]
-
-            # Global solver
-            self.global_multiplier = fdrk.Function(self.operators.space_global)
+            if self.cache_local_inverse:
+                local_terms = [(fdrk.Tensor(self.mass_operator).blocks[:self.n_block_loc, :self.n_block_loc], lambda: 1), 
+                               (fdrk.Tensor(self.dynamics_operator).blocks[:self.n_block_loc, :self.n_block_loc], \
+                                lambda: -0.5*self.time_step)]
+                self.local_solver = CellwiseLocalSolver(local_terms, self.operators.mixedspace_local)
+                # Local solution for the right hand side only, A_ll^{-1} F_l
+                self.local_rhs_solution = fdrk.Function(self.operators.mixedspace_local)
 
-            linear_global_problem = fdrk.LinearVariationalProblem(self.A_global_operator, self.b_global_functional,\
-                                                                      self.global_multiplier, bcs=self.essential_bcs)
-            self.global_solver =  fdrk.LinearVariationalSolver(linear_global_problem, solver_parameters=self.solver_parameters)
+                self.b_global_functional = self.F_blocks[self.n_block_loc] - self.A_blocks[self.n_block_loc, :self.n_block_loc] \
+                    * fdrk.AssembledVector(self.local_rhs_solution)
+            else:
+                self.b_global_functional = self.F_blocks[self.n_block_loc] - self.A_blocks[self.n_block_loc, :self.n_block_loc] \
+                    * self.A_blocks[:self.n_block_loc, :self.n_block_loc].inv * self.F_blocks[:self.n_block_loc]
+
+            # Global solver. The multiplier and the local solution share the memory of state_new
+            self.global_multiplier = fdrk.Function(self.operators.space_global, \
+                                                   val=self.state_new.dat[self.n_block_loc])
+            self.local_solution = fdrk.Function(self.operators.mixedspace_local, \
+                                                val=op2.MixedDat(self.state_new.dat[:self.n_block_loc]))
+            self._assembled_tensors = {}
+
+            if self.constant_operator:
+                # p-multigrid on the trace spaces of lower degree
+                if self.solver_parameters.get("pc_type")=="mg":
+                    prolongations = trace_prolongations(self.operators)
+                else:
+                    prolongations = None
+
+                self.global_solver = AssembledLinearSystem(self.A_global_operator, self.b_global_functional, \
+                                                           self.global_multiplier, bcs=self.essential_bcs, \
+                                                           solver_parameters=self.solver_parameters, \
+                                                           recycle_size=self.recycle_size, \
+                                                           extrapolate_guess=self.extrapolate_guess, \
+                                                           prolongations=prolongations)
+            else:
+                linear_global_problem = fdrk.LinearVariationalProblem(self.A_global_operator, self.b_global_functional,\
+                                                                          self.global_multiplier, bcs=self.essential_bcs)
+                self.global_solver =  fdrk.LinearVariationalSolver(linear_global_problem, solver_parameters=self.solver_parameters)
                 
             if self.verbose:
                 PETSc.Sys.Print(f"Solver set")
 
-            
 
-    def integrate(self):
+
+    def _set_stormer_verlet(self):
         """
-        Time step of the implicit midpoint (non linear)
+        Stormer-Verlet step of the hybrid discretization. First half kick of the field
+        with the strong equation (cell by cell), 
+            x_s^{n+1/2} = x_s^n + dt/2 M_ss^{-1} (J x^n + f)_s,
+        then the field with the weak equation and the traces from the reduced trace system 
+        driven by x_s^{n+1/2}. The recovery of the field with the strong equation from the 
+        midpoint of the step completes the second half kick
+        """
+        _, strong_index = self.operators.staggered_indices()
 
-        Parameters
-            log_invariants (Boolean): if True logs all the invariants
-            log_variables (Boolean): if True logs all the variables
+        self.half_step_field = fdrk.Function(self.operators.fullspace.sub(strong_index).collapse())
+        self.verlet_step = StaggeredHybridStep(self, self.half_step_field)
+
+        mass_functional, dynamics_functional = self.operators.dynamics(self.tests, self.state_old.subfunctions)
+        _F_half = fdrk.Tensor(mass_functional + 0.5*self.time_step_constant*dynamics_functional)
+        if self.load is not None:
+            # Half of the load of the step, filled in _prepare_step
+            self.half_load = fdrk.Function(self.space_operators)
+            _F_half = _F_half + fdrk.AssembledVector(self.half_load)
+
+        self.half_step_update = fdrk.Tensor(self.mass_operator).blocks[strong_index, strong_index].inv \
+                                * _F_half.blocks[strong_index]
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Stormer-Verlet solver set")
+
+
+    def _set_load(self, forcing_in_load):
+        """
+        Load vector added to the right hand side, made of the contributions of the
+        separable natural boundary conditions and of the forcing at the midpoint.
+        For the matrix based right hand side it contains the whole right hand side
+        """
+        self.load_contributions = []
+
+        if self.matrix_rhs:
+            # B = M + dt/2 J, sharing the mass and dynamics matrices of the left hand side
+            self.rhs_matrix_load = MatrixLoad(self.lhs_matrix.combination([lambda: 1, lambda: 0.5*self.time_step]), \
+                                              self.state_old)
+            self.load_contributions.append(self.rhs_matrix_load)
+
+            if not self.separable_data:
+                self.load_contributions.append(FormLoad(self.operators.control(self.tests, self.natural_bcs), \
+                                                        scale=self.time_step_constant))
+
+        if self.separable_data:
+            natural_bcs_load = SeparableLoad(scale=self.time_step_constant)
+            for spatial_bc, time_function in self.separable_natural_bcs:
+                natural_bcs_load.add_term(self.operators.control(self.tests, spatial_bc), time_function)
+            self.load_contributions.append(natural_bcs_load)
+
+        if forcing_in_load:
+            if self.verbose:
+                PETSc.Sys.Print("Problem with forcing term")
+            self.forcing_assembler = ForcingAssembler(self.problem, self.tests, self.time_step_constant, \
+                                                      self.time_midpoint, separable=self.separable_data)
+            self.load_contributions.append(self.forcing_assembler)
+
+        if self.load_contributions:
+            self.load = fdrk.Function(self.space_operators)
+        else:
+            self.load = None
+
+
+    def _update_load(self):
+        if self.load is None:
+            return
+
+        time_midpoint = float(self.time_midpoint)
+        with self.load.dat.vec_wo as load_vec:
+            load_vec.zeroEntries()
+            for contribution in self.load_contributions:
+                contribution.add_to(load_vec, time_midpoint)
+
+
+    def set_time_step(self, time_step):
         """
+        Retargets the solver to a new time step, from the current time. The forms depend on 
+        the time step through a Constant, so no kernel is generated again. The mixed operator,
+        the matrix of the right hand side and the cached local blocks are linear combinations 
+        of mass and dynamics matrices assembled once. The condensed trace operator is 
+        reassembled (and refactorized) at the next time step
+        """
+        self.time_step = time_step
+        self.time_step_constant.assign(time_step)
+
+        self._set_time(float(self.time_old))
+
+        self.invalidate_operator()
+
+
+    def linear_system(self):
+        """
+        Returns the solver of the global linear system: the mixed system or the 
+        trace system of the hybrid discretization
+        """
+        if not self.global_system:
+            raise ValueError("The solver has been set without the global system")
 
         if self.operators.discretization=="mixed":
-            interpolated_value_bc = fdrk.interpolate(self.value_bc, self.space_bc)
-            for iii in range(len(self.list_id_bc)):    
-                self.essential_bcs[iii].function_arg = interpolated_value_bc
+            return self.solver
+        elif self.time_integrator=="stormer_verlet":
+            return self.verlet_step.global_system
+        else:
+            return self.global_solver
+
+
+    def linear_solver_statistics(self):
+        """
+        Number of factorizations (assemblies of the operator), of solves and of Krylov 
+        iterations of the assembled linear system (constant operator only)
+        """
+        if not self.constant_operator:
+            raise ValueError("Statistics available only for a constant operator")
+        
+        linear_solver = self.linear_system()
+
+        return {"factorizations": linear_solver.n_factorizations, "solves": linear_solver.n_solves, \
+                "iterations": linear_solver.n_iterations}
 
-            self.solver.solve()
+
+    def invalidate_operator(self):
+        """
+        Forces the reassembly of the operator (and of its factorization) at the next 
+        time step. To be called when the time step or the material coefficients change
+        """
+        linear_solver = self.linear_system()
+
+        if self.constant_operator:
+            linear_solver.invalidate()
         else:
-            if "quadrilateral" in self.operators.cell_name and self.pol_degree>1:
+            linear_solver.invalidate_jacobian()
 
-                if isinstance(self.operators, WaveOperators):
-                    if self.operators.formulation=="primal":
-                        projected_value_bc = self.operators.project_RT_facet(self.value_bc, broken=False)
-                    else:
-                        projected_value_bc = self.operators.project_CG_facet(self.value_bc, broken=False)
-                else:
-                    projected_value_bc = self.operators.project_NED_facet(self.value_bc, broken=False)
+        if self.operators.discretization=="hybrid" and self.cache_local_inverse:
+            self.local_solver.invalidate()
 
-                for iii in range(len(self.list_id_bc)):    
-                    self.essential_bcs[iii].function_arg = projected_value_bc
+        if self.matrix_rhs:
+            self.rhs_matrix_load.invalidate()
 
-            else:
-                interpolated_value_bc = fdrk.interpolate(self.value_bc, self.space_bc)
 
-                for iii in range(len(self.list_id_bc)):    
-                    self.essential_bcs[iii].function_arg = interpolated_value_bc
+    def integrate(self):
+        """
+        Time step of the implicit midpoint (non linear)
 
-                
-            self.global_solver.solve()
+        Parameters
+            log_invariants (Boolean): if True logs all the invariants
+            log_variables (Boolean): if True logs all the variables
+        """
 
-            self._assemble_solution_hybrid()
+        self._solve_step()
 
         self.state_midpoint.assign(0.5*(self.state_new + self.state_old))
         self.actual_time.assign(self.time_new)
@@ -203,27 +526,141 @@ class HamiltonianWaveSolver(Solver):
     def update_variables(self):
         self.state_old.assign(self.state_new)
         
-        self.time_old.assign(self.actual_time)
-        self.time_midpoint.assign(float(self.time_old) + self.time_step/2)
-        self.time_new.assign(float(self.time_old) + self.time_step)
+        self._set_time(float(self.actual_time))
         
 
+    def integrate_n(self, n_steps, callback=None, callback_every=1):
+        """
+        Performs n_steps time steps, including the update of the variables. The midpoint 
+        state is computed only when the callback is called and at the last step, the new 
+        state is copied in the old one without generating kernels
+        Parameters:
+            n_steps (int) : number of time steps
+            callback (callable) : function callback(solver, step) called every callback_every 
+                steps, after the update of the variables (state_old is the new state and 
+                state_midpoint the midpoint of the last step)
+            callback_every (int) : number of steps between two calls of the callback
+        """
+        time_start = float(self.time_old)
+
+        for step in range(1, n_steps+1):
+            self._solve_step()
+
+            call_back = callback is not None and step % callback_every == 0
+            if call_back or step==n_steps:
+                self.state_midpoint.assign(0.5*(self.state_new + self.state_old))
+
+            self.state_new.dat.copy(self.state_old.dat)
+            self._set_time(time_start + step*self.time_step)
+
+            if call_back:
+                callback(self, step)
+
+
+    def _solve_step(self):
+        """
+        Solution of the linear system of the time step, stored in state_new
+        """
+        self._prepare_step()
+        self.linear_system().solve()
+        self._finish_step()
+
+
+    def _prepare_step(self):
+        """
+        Boundary data, loads and local right hand side of the time step
+        """
+        if self.separable_data:
+            self.bc_evaluator.update(float(self.time_new))
+        else:
+            self.bc_evaluator.update()
+
+        self._update_load()
+
+        if self.time_integrator=="stormer_verlet":
+            self._half_kick()
+        elif self.operators.discretization=="hybrid" and self.cache_local_inverse:
+            self._solve_local_rhs()
+
+
+    def _half_kick(self):
+        """
+        First half kick of the Stormer-Verlet step, stored in half_step_field
+        """
+        if self.load is not None:
+            with self.load.dat.vec_ro as load_vec, self.half_load.dat.vec_wo as half_load_vec:
+                load_vec.copy(half_load_vec)
+                half_load_vec.scale(0.5)
+
+        fdrk.assemble(self.half_step_update, tensor=self.half_step_field)
+
+
+    def _finish_step(self):
+        """
+        Local recovery of the hybrid discretization after the global solve
+        """
+        if self.time_integrator=="stormer_verlet":
+            self.verlet_step.recover()
+        elif self.operators.discretization=="hybrid":
+            self._assemble_solution_hybrid()
+
+
+    def _set_time(self, time_old):
+        """
+        Sets the time Constants for the step starting at time_old (float)
+        """
+        self.time_old.assign(time_old)
+        self.actual_time.assign(time_old)
+        self.time_midpoint.assign(time_old + self.time_step/2)
+        self.time_new.assign(time_old + self.time_step)
+
 
     def _assemble_solution_hybrid(self):
         if self.operators.discretization=="mixed":
             raise ValueError("Global to local assembly only valid for Hybrid system")
 
+        if self.cache_local_inverse:
+            self._assemble_solution_hybrid_cellwise()
+            return
+
         # Intermediate expressions
         Lambda = fdrk.AssembledVector(self.global_multiplier)  # Local coefficient vector for Λ
-        # Local solve expressions
-        x_h = fdrk.assemble(self.A_blocks[:self.n_block_loc, :self.n_block_loc].inv *
-                        (self.F_blocks[:self.n_block_loc] - self.A_blocks[:self.n_block_loc, self.n_block_loc] * Lambda))
+        # Local solve expressions, assembled directly in the local part of state_new
+        fdrk.assemble(self.A_blocks[:self.n_block_loc, :self.n_block_loc].inv *
+                        (self.F_blocks[:self.n_block_loc] - self.A_blocks[:self.n_block_loc, self.n_block_loc] * Lambda), \
+                        tensor=self.local_solution)
+
+
+    def _solve_local_rhs(self):
+        """
+        Batched local solve A_ll^{-1} F_l with the cached cell inverses
+        """
+        local_rhs = self._assemble_cached("local_rhs", self.F_blocks[:self.n_block_loc])
+
+        self.cell_rhs_solution = self.local_solver.solve(self.local_solver.gather(local_rhs))
+        self.local_solver.scatter(self.cell_rhs_solution, self.local_rhs_solution.dat)
 
-        for ii in range(self.n_block_loc):
-            coeff_ii = x_h.sub(ii).vector().get_local()
-            self.state_new.sub(ii).vector().set_local(coeff_ii)
 
-        self.state_new.sub(self.n_block_loc).assign(self.global_multiplier)
+    def _assemble_solution_hybrid_cellwise(self):
+        """
+        Local recovery x_l = A_ll^{-1} F_l - A_ll^{-1} A_lg Lambda with the cached cell inverses
+        """
+        local_coupling = self._assemble_cached("local_coupling", self.A_blocks[:self.n_block_loc, self.n_block_loc] \
+                                       * fdrk.AssembledVector(self.global_multiplier))
+
+        cell_solution = self.cell_rhs_solution - self.local_solver.solve(self.local_solver.gather(local_coupling))
+        self.local_solver.scatter(cell_solution, self.state_new.dat)
+
+
+    def _assemble_cached(self, key, expression):
+        """
+        Assembles a vector expression reusing the memory of the previous assembly
+        """
+        if key in self._assembled_tensors:
+            return fdrk.assemble(expression, tensor=self._assembled_tensors[key])
+        
+        self._assembled_tensors[key] = fdrk.assemble(expression)
+        return self._assembled_tensors[key]
 
 
     def dofs_essential_natural_bcs(self):
@@ -0,0 +1,486 @@
+import firedrake as fdrk
+from firedrake.petsc import PETSc, OptionsManager
+from firedrake.solving_utils import DEFAULT_KSP_PARAMETERS
+from firedrake.slate.slate import TensorBase, DiagonalTensor
+import numpy as np
+from contextlib import ExitStack
+from pyop2 import op2
+from .p_multigrid import set_p_multigrid
+
+
+def direct_solver_parameters(solver_type="mumps"):
+    """
+    PETSc options of a sparse direct solver (LU factorization and substitution only)
+    Parameters:
+        solver_type (string) : the factorization package, e.g. "mumps", "superlu_dist", "petsc"
+    """
+    parameters = {"mat_type": "aij",
+                  "ksp_type": "preonly",
+                  "pc_type": "lu",
+                  "pc_factor_mat_solver_type": solver_type}
+    if solver_type=="mumps":
+        # Extra workspace to avoid failures of the numerical factorization
+        parameters["mat_mumps_icntl_14"] = 200
+    return parameters
+
+
+def boundary_rows(space, bcs):
+    """
+    Rows of the global (owned) vector constrained by a list of DirichletBC 
+    Returns:
+        mask (array) : boolean mask of the owned entries 
+        rows (PETSc.IS) : global indices of the constrained rows
+    """
+    marker = fdrk.Function(space)
+    for bc in bcs:
+        # Subspace of a mixed space (an indexed subspace has a single dat)
+        index = bc.function_space().index
+        if index is not None and isinstance(marker.dat, op2.MixedDat):
+            marker_dat = marker.dat[index]
+        else:
+            marker_dat = marker.dat
+        marker_dat.data_with_halos[bc.nodes] = 1
+
+    with marker.dat.vec_ro as marker_vec:
+        mask = marker_vec.array_r != 0
+        rows = PETSc.IS().createGeneral(np.flatnonzero(mask).astype(PETSc.IntType) \
+                                        + marker_vec.getOwnershipRange()[0], comm=marker_vec.getComm())
+    return mask, rows
+
+
+class OperatorAction:
+    def __init__(self, a_operator, space, bc_mask=None):
+        """
+        Python context of a matrix-free operator. The action y = A x is assembled from the
+        expression of A applied to x (for a Slate tensor, the local solves and the traces
+        of each cell), so that A is never stored. The rows and columns of the essential
+        boundary conditions are replaced by the identity
+        Parameters:
+            a_operator (Form or slate.TensorBase) : operator
+            space (FunctionSpace) : space of the solution
+            bc_mask (array) : boolean mask of the owned constrained entries (None if unconstrained)
+        """
+        self.argument = fdrk.Function(space)
+        if isinstance(a_operator, TensorBase):
+            self.action = a_operator * fdrk.AssembledVector(self.argument)
+        else:
+            self.action = fdrk.action(a_operator, self.argument)
+        self.result = None
+        self.bc_mask = bc_mask
+
+
+    def mult(self, mat, x, y):
+        with self.argument.dat.vec_wo as argument_vec:
+            x.copy(argument_vec)
+            if self.bc_mask is not None:
+                argument_vec.array[self.bc_mask] = 0
+
+        if self.result is None:
+            self.result = fdrk.assemble(self.action)
+        else:
+            fdrk.assemble(self.action, tensor=self.result)
+
+        with self.result.dat.vec_ro as result_vec:
+            result_vec.copy(y)
+        if self.bc_mask is not None:
+            y.array[self.bc_mask] = x.array_r[self.bc_mask]
+
+
+def operator_diagonal(a_operator):
+    """
+    Assembled diagonal of an operator, the sum of the diagonals of its cell contributions
+    (for a Slate tensor, of the dense local Schur complements)
+    """
+    if isinstance(a_operator, TensorBase):
+        return fdrk.assemble(DiagonalTensor(a_operator, vec=True))
+    else:
+        return fdrk.assemble(a_operator, diagonal=True)
+
+
+class LinearCombinationMatrix:
+    def __init__(self, list_forms, list_coefficients, term_matrices=None):
+        """
+        Matrix sum_k c_k A_k, where the matrices A_k of the bilinear forms are assembled 
+        once. The coefficients are read at each assembly, so that a change of the 
+        coefficients (e.g. of the time step) only costs a sparse linear combination
+        Parameters:
+            list_forms (list) : bilinear forms of the terms
+            list_coefficients (list) : callables returning the (float) coefficients
+            term_matrices (list) : assembled matrices of the terms shared with another combination
+        """
+        self.list_forms = list_forms
+        self.list_coefficients = list_coefficients
+        self.term_matrices = [] if term_matrices is None else term_matrices
+        self.matrix = None
+
+
+    def combination(self, list_coefficients):
+        """
+        Returns a combination of the same terms with other coefficients, sharing the term matrices
+        """
+        return LinearCombinationMatrix(self.list_forms, list_coefficients, term_matrices=self.term_matrices)
+
+
+    def assemble(self):
+        if not self.term_matrices:
+            for form in self.list_forms:
+                self.term_matrices.append(fdrk.assemble(form, mat_type="aij").petscmat)
+
+        if self.matrix is None:
+            self.matrix = self.term_matrices[0].duplicate(copy=True)
+            self.matrix.zeroEntries()
+            for term_matrix in self.term_matrices:
+                self.matrix.axpy(1, term_matrix, structure=PETSc.Mat.Structure.DIFFERENT_NONZERO_PATTERN)
+
+        self.matrix.zeroEntries()
+        for coefficient, term_matrix in zip(self.list_coefficients, self.term_matrices):
+            self.matrix.axpy(coefficient(), term_matrix, structure=PETSc.Mat.Structure.SUBSET_NONZERO_PATTERN)
+
+        return self.matrix
+
+
+class AssembledLinearSystem:
+    def __init__(self, a_operator, l_functional, solution, bcs=[], solver_parameters={}, rhs_load=None, \
+                 recycle_size=0, extrapolate_guess=False, prolongations=None):
+        """
+        Linear system A x = b whose matrix (and its factorization) is assembled once
+        and reused for all the subsequent solves. Only the right hand side is assembled
+        at each call of solve. Essential boundary conditions are imposed by symmetric
+        elimination, the lifting of the right hand side uses the unconstrained matrix.
+        Parameters:
+            a_operator (Form, slate.TensorBase or LinearCombinationMatrix) : operator of the system
+            l_functional (Form or slate.TensorBase) : linear form of the right hand side 
+                (None if the right hand side is given by rhs_load only)
+            solution (Function) : function where the solution is stored
+            bcs (list) : list of DirichletBC (their values may change between solves)
+            solver_parameters (dictionary) : PETSc options for the KSP (direct solver if empty).
+                With mat_type "matfree" the operator is applied matrix-free (see OperatorAction)
+                and preconditioned with its assembled diagonal, the memory is linear in the dofs
+            rhs_load (Function) : optional vector added to the assembled right hand side
+            recycle_size (int) : for iterative solvers, number of previous solutions kept to
+                compute the initial guess, by minimizing the residual on their span
+            extrapolate_guess (bool) : for iterative solvers, the initial guess is extrapolated
+                from the last two solutions, 2 x_{n-1} - x_{n-2}
+            prolongations (list) : prolongation matrices of a multigrid preconditioner (pc_type mg),
+                from the coarsest to the finest level
+        """
+
+        self.a_operator = a_operator
+        self.l_functional = l_functional
+        self.solution = solution
+        self.bcs = bcs
+        self.rhs_load = rhs_load
+        self.prolongations = prolongations
+
+        if not solver_parameters:
+            solver_parameters = DEFAULT_KSP_PARAMETERS
+        self.solver_parameters = solver_parameters
+        self.options = OptionsManager(self.solver_parameters, options_prefix=None)
+
+        self.matrix_free = self.solver_parameters.get("mat_type")=="matfree"
+        if self.matrix_free and isinstance(a_operator, LinearCombinationMatrix):
+            raise ValueError("A linear combination of assembled matrices cannot be applied matrix-free")
+
+        self.space = solution.function_space()
+        self.rhs = None
+        self.matrix = None
+        self.ksp = None
+        self.is_dirty = True
+
+        self.n_factorizations = 0
+        self.n_solves = 0
+        self.n_iterations = 0
+
+        self.recycle_size = recycle_size
+        self.extrapolate_guess = extrapolate_guess
+        if (recycle_size > 0 or extrapolate_guess) and self.solver_parameters.get("ksp_type")=="preonly":
+            raise ValueError("Recycling and extrapolation require an iterative solver")
+        self._clear_history()
+
+
+    def invalidate(self):
+        """
+        Flags the operator as outdated (e.g. after a change of the time step or
+        of the material coefficients). It is reassembled at the next solve
+        """
+        self.is_dirty = True
+
+
+    def assemble(self, setup_ksp=True):
+        """
+        Parameters:
+            setup_ksp (bool) : if False the factorization is left to an external solver
+        """
+        first_assembly = self.matrix is None
+
+        if self.matrix_free:
+            self._assemble_matrix_free()
+        elif isinstance(self.a_operator, LinearCombinationMatrix):
+            self.free_matrix = self.a_operator.assemble()
+        else:
+            # "is" keeps the subdomain matrices unassembled (e.g. for BDDC)
+            mat_type = self.solver_parameters.get("mat_type", "aij")
+            self.free_matrix = fdrk.assemble(self.a_operator, mat_type=mat_type).petscmat
+
+        if first_assembly:
+            if not self.matrix_free:
+                self._set_boundary_rows()
+
+                self.matrix = self.free_matrix.duplicate(copy=True)
+                self.matrix.setOption(PETSc.Mat.Option.KEEP_NONZERO_PATTERN, True)
+                self.matrix.zeroRowsColumns(self.bc_rows, diag=1.0)
+                self.preconditioner_matrix = self.matrix
+
+            self.lifting = self.matrix.createVecLeft()
+        elif not self.matrix_free:
+            # The sparsity does not change: the values are updated in place, 
+            # so that a direct solver only repeats the numerical factorization
+            # (the shell matrices read the coefficients of the forms, only their diagonal changes)
+            self.free_matrix.copy(self.matrix, structure=PETSc.Mat.Structure.SAME_NONZERO_PATTERN)
+            self.matrix.zeroRowsColumns(self.bc_rows, diag=1.0)
+
+        # The recycled subspace depends on the operator
+        self._clear_history()
+
+        # Factorization (or setup of the preconditioner), reused by all the solves.
+        # The KSP is only created if this system solves itself
+        if setup_ksp:
+            if self.ksp is None:
+                self._set_ksp()
+            else:
+                self.ksp.setOperators(self.matrix, self.preconditioner_matrix)
+
+            with self.options.inserted_options():
+                self.ksp.setUp()
+            self.n_factorizations += 1
+        self.is_dirty = False
+
+
+    def _set_ksp(self):
+        self.ksp = PETSc.KSP().create(comm=self.matrix.getComm())
+        self.ksp.setOperators(self.matrix, self.preconditioner_matrix)
+        self.options.set_from_options(self.ksp)
+        self._set_fieldsplit()
+        if self.prolongations:
+            set_p_multigrid(self.ksp, self.prolongations)
+            # Options of the levels
+            self.options.set_from_options(self.ksp)
+        if self.recycle_size > 0 or self.extrapolate_guess:
+            self.ksp.setInitialGuessNonzero(True)
+
+
+    def _assemble_matrix_free(self):
+        """
+        Shell matrices applying the operator with and without the boundary conditions,
+        the preconditioner matrix is the assembled diagonal of the operator
+        """
+        if self.matrix is None:
+            self._set_boundary_rows()
+
+            with self.bc_function.dat.vec_ro as bc_vec:
+                sizes = bc_vec.getSizes()
+                comm = bc_vec.getComm()
+
+            self.free_matrix, self.matrix = [PETSc.Mat().createPython((sizes, sizes), \
+                                                                      context=OperatorAction(self.a_operator, self.space, \
+                                                                                             bc_mask=bc_mask), comm=comm) \
+                                             for bc_mask in [None, self.bc_mask]]
+            for shell_matrix in [self.free_matrix, self.matrix]:
+                shell_matrix.setUp()
+
+        diagonal_function = operator_diagonal(self.a_operator)
+        with diagonal_function.dat.vec_ro as diagonal_vec:
+            diagonal = diagonal_vec.copy()
+        diagonal.array[self.bc_mask] = 1
+        self.preconditioner_matrix = PETSc.Mat().createDiagonal(diagonal)
+
+
+    def _set_fieldsplit(self):
+        """
+        The KSP has no DM: the fields of a mixed space are given to a fieldsplit preconditioner
+        """
+        pc = self.ksp.getPC()
+        if pc.getType()=="fieldsplit" and len(self.space) > 1:
+            pc.setFieldSplitIS(*[(str(counter), field_is) for counter, field_is \
+                                 in enumerate(self.space.dof_dset.field_ises)])
+
+
+    def _set_boundary_rows(self):
+        self.bc_function = fdrk.Function(self.space)
+        self.bc_mask, self.bc_rows = boundary_rows(self.space, self.bcs)
+
+
+    def _assemble_rhs(self):
+        if self.l_functional is None:
+            if self.rhs is None:
+                self.rhs = fdrk.Function(self.space)
+            self.rhs.dat.zero()
+        elif self.rhs is None:
+            self.rhs = fdrk.assemble(self.l_functional)
+        else:
+            fdrk.assemble(self.l_functional, tensor=self.rhs)
+
+        if self.rhs_load is not None:
+            with self.rhs_load.dat.vec_ro as load_vec, self.rhs.dat.vec as rhs_vec:
+                rhs_vec.axpy(1, load_vec)
+
+
+    def _lift_rhs(self):
+        self.bc_function.dat.zero()
+        for bc in self.bcs:
+            bc.apply(self.bc_function)
+
+        with self.bc_function.dat.vec_ro as bc_vec, self.rhs.dat.vec as rhs_vec:
+            self.free_matrix.mult(bc_vec, self.lifting)
+            rhs_vec.axpy(-1, self.lifting)
+            rhs_vec.array[self.bc_mask] = bc_vec.array_r[self.bc_mask]
+
+
+    def prepare(self, setup_ksp=True):
+        """
+        Assembles the operator (if outdated) and the lifted right hand side
+        """
+        if self.is_dirty:
+            self.assemble(setup_ksp=setup_ksp)
+
+        self._assemble_rhs()
+        self._lift_rhs()
+
+
+    def solve(self):
+        self.prepare()
+
+        with self.rhs.dat.vec_ro as rhs_vec, self.solution.dat.vec as solution_vec:
+            self._initial_guess(rhs_vec, solution_vec)
+            self.ksp.solve(rhs_vec, solution_vec)
+            self._update_history(solution_vec)
+        self.n_solves += 1
+        self.n_iterations += self.ksp.getIterationNumber()
+
+
+    def _clear_history(self):
+        # Recycled basis V and orthonormal basis Q = A V, previous solutions
+        self.recycled_basis = []
+        self.recycled_images = []
+        self.previous_solutions = []
+
+
+    def _initial_guess(self, rhs_vec, solution_vec):
+        """
+        Extrapolated guess (or zero), corrected by the minimal residual projection on the
+        recycled subspace, x_0 += V Q^T (b - A x_0)
+        """
+        if not (self.recycle_size > 0 or self.extrapolate_guess):
+            return
+
+        if self.extrapolate_guess and len(self.previous_solutions)==2:
+            solution_vec.axpby(-1, 0, self.previous_solutions[0])
+            solution_vec.axpy(2, self.previous_solutions[1])
+        elif self.extrapolate_guess and len(self.previous_solutions)==1:
+            self.previous_solutions[0].copy(solution_vec)
+        else:
+            solution_vec.zeroEntries()
+
+        if self.recycled_basis:
+            residual = rhs_vec.copy()
+            self.matrix.mult(solution_vec, self.lifting)
+            residual.axpy(-1, self.lifting)
+            coefficients = [image.dot(residual) for image in self.recycled_images]
+            solution_vec.maxpy(coefficients, self.recycled_basis)
+
+
+    def _update_history(self, solution_vec):
+        if self.extrapolate_guess:
+            self.previous_solutions = self.previous_solutions[-1:] + [solution_vec.copy()]
+
+        if self.recycle_size == 0:
+            return
+
+        if len(self.recycled_basis) == self.recycle_size:
+            # Restart from the last solution
+            self.recycled_basis, self.recycled_images = [], []
+
+        new_basis = solution_vec.copy()
+        new_image = self.matrix.createVecLeft()
+        self.matrix.mult(new_basis, new_image)
+
+        # Gram-Schmidt of A x against Q, the same combination is applied to x
+        for basis, image in zip(self.recycled_basis, self.recycled_images):
+            coefficient = image.dot(new_image)
+            new_image.axpy(-coefficient, image)
+            new_basis.axpy(-coefficient, basis)
+
+        image_norm = new_image.norm()
+        if image_norm > 1e-12*solution_vec.norm():
+            new_basis.scale(1/image_norm)
+            new_image.scale(1/image_norm)
+            self.recycled_basis.append(new_basis)
+            self.recycled_images.append(new_image)
+
+
+class BlockDiagonalSystem:
+    def __init__(self, list_systems):
+        """
+        Independent assembled linear systems solved together as one block diagonal system. 
+        The KSP uses an additive fieldsplit, each block is solved with the parameters 
+        of its own system (e.g. its direct solver)
+        Parameters:
+            list_systems (list) : list of AssembledLinearSystem
+        """
+        self.list_systems = list_systems
+        self.ksp = None
+
+
+    def invalidate(self):
+        for system in self.list_systems:
+            system.invalidate()
+
+
+    def _set_ksp(self):
+        n_blocks = len(self.list_systems)
+        list_blocks = [[system.matrix if ii==jj else None for jj, system in enumerate(self.list_systems)] \
+                       for ii in range(n_blocks)]
+        comm = self.list_systems[0].matrix.getComm()
+        self.matrix = PETSc.Mat().createNest(list_blocks, comm=comm)
+
+        if self.ksp is None:
+            self.ksp = PETSc.KSP().create(comm=comm)
+        self.ksp.setOperators(self.matrix)
+        self.ksp.setType("preonly")
+
+        pc = self.ksp.getPC()
+        pc.setType("fieldsplit")
+        pc.setFieldSplitType(PETSc.PC.CompositeType.ADDITIVE)
+        row_is, _ = self.matrix.getNestISs()
+        pc.setFieldSplitIS(*[(str(counter), block_is) for counter, block_is in enumerate(row_is)])
+        self.ksp.setUp()
+
+        for sub_ksp, system in zip(pc.getFieldSplitSubKSP(), self.list_systems):
+            system.options.set_from_options(sub_ksp)
+            with system.options.inserted_options():
+                sub_ksp.setUp()
+            system.n_factorizations += 1
+
+
+    def solve(self):
+        is_dirty = self.ksp is None or any(system.is_dirty for system in self.list_systems)
+
+        for system in self.list_systems:
+            system.prepare(setup_ksp=False)
+
+        if is_dirty:
+            self._set_ksp()
+
+        with ExitStack() as stack:
+            list_rhs = [stack.enter_context(system.rhs.dat.vec_ro) for system in self.list_systems]
+            list_solutions = [stack.enter_context(system.solution.dat.vec) for system in self.list_systems]
+
+            comm = self.matrix.getComm()
+            rhs_vec = PETSc.Vec().createNest(list_rhs, comm=comm)
+            solution_vec = PETSc.Vec().createNest(list_solutions, comm=comm)
+            self.ksp.solve(rhs_vec, solution_vec)
+
+        n_iterations = self.ksp.getIterationNumber()
+        for system in self.list_systems:
+            system.n_solves += 1
+            system.n_iterations += n_iterations
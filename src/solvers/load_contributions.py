@@ -0,0 +1,96 @@
+import firedrake as fdrk
+from .linear_system import LinearCombinationMatrix
+
+
+class SeparableLoad:
+    def __init__(self, scale=1):
+        """
+        Load vector of separable data, b(t) = s sum_k f_k(t) b_k. The vectors b_k of the 
+        spatial parts are assembled once, an update is a linear combination of them
+        Parameters:
+            scale (float or Constant) : scaling s of the load (e.g. the time step)
+        """
+        self.scale = scale
+        self.list_vectors = []
+        self.list_time_functions = []
+
+
+    def add_term(self, form, time_function):
+        """
+        Parameters:
+            form (Form) : linear form of the spatial part
+            time_function (callable) : time function of a float
+        """
+        assembled_form = fdrk.assemble(form)
+        with assembled_form.dat.vec_ro as form_vec:
+            self.list_vectors.append(form_vec.copy())
+        self.list_time_functions.append(time_function)
+
+
+    def add_to(self, load_vec, time):
+        """
+        Adds the load at a given (float) time to a PETSc vector
+        """
+        if not self.list_vectors:
+            return
+
+        scale = float(self.scale)
+        coefficients = [scale*time_function(time) for time_function in self.list_time_functions]
+        load_vec.maxpy(coefficients, self.list_vectors)
+
+
+class FormLoad:
+    def __init__(self, form, scale=1):
+        """
+        Load vector of a linear form assembled at each update, reusing its memory
+        Parameters:
+            form (Form) : linear form (it may depend on time Constants and Functions)
+            scale (float or Constant) : scaling of the load (e.g. the time step)
+        """
+        self.form = form
+        self.scale = scale
+        self.vector = None
+
+
+    def add_to(self, load_vec, time=None):
+        if self.vector is None:
+            self.vector = fdrk.assemble(self.form)
+        else:
+            fdrk.assemble(self.form, tensor=self.vector)
+
+        with self.vector.dat.vec_ro as vector_vec:
+            load_vec.axpy(float(self.scale), vector_vec)
+
+
+class MatrixLoad:
+    def __init__(self, operator, state):
+        """
+        Load vector B x of a matrix assembled once applied to a state, 
+        computed as a sparse matrix vector product
+        Parameters:
+            operator (Form or LinearCombinationMatrix) : the matrix B
+            state (Function) : the state x
+        """
+        self.operator = operator
+        self.state = state
+        self.is_dirty = True
+
+
+    def invalidate(self):
+        self.is_dirty = True
+
+
+    def assemble(self):
+        if isinstance(self.operator, LinearCombinationMatrix):
+            self.matrix = self.operator.assemble()
+        else:
+            self.matrix = fdrk.assemble(self.operator, mat_type="aij").petscmat
+        self.is_dirty = False
+
+
+    def add_to(self, load_vec, time=None):
+        if self.is_dirty:
+            self.assemble()
+
+        with self.state.dat.vec_ro as state_vec:
+            self.matrix.multAdd(state_vec, load_vec, load_vec)
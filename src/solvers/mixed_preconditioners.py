@@ -0,0 +1,93 @@
+import firedrake as fdrk
+from firedrake.petsc import PETSc
+
+
+class BrokenBlockInversePC(fdrk.PCBase):
+    """
+    Exact inverse of the block of the broken field of a mixed system (e.g. the mass of
+    broken Nedelec or Raviart-Thomas elements). The block is cell local, its inverse is
+    applied cell by cell with Slate. To be used on a matrix-free (python) block
+    """
+    needs_python_pmat = True
+
+    def initialize(self, pc):
+        _, P = pc.getOperators()
+        block_operator = P.getPythonContext().a
+
+        self.argument = fdrk.Function(block_operator.arguments()[1].function_space())
+        block_tensor = fdrk.Tensor(block_operator)
+        self.local_actions = {"inverse": block_tensor.inv * fdrk.AssembledVector(self.argument),
+                              "transpose": block_tensor.T.inv * fdrk.AssembledVector(self.argument)}
+        self.results = {}
+
+
+    def update(self, pc):
+        # The Slate kernel reads the coefficients (e.g. the time step) at each application
+        pass
+
+
+    def _apply_local(self, action_name, x, y):
+        with self.argument.dat.vec_wo as argument_vec:
+            x.copy(argument_vec)
+
+        local_action = self.local_actions[action_name]
+        if action_name not in self.results:
+            self.results[action_name] = fdrk.assemble(local_action)
+        else:
+            fdrk.assemble(local_action, tensor=self.results[action_name])
+
+        with self.results[action_name].dat.vec_ro as result_vec:
+            result_vec.copy(y)
+
+
+    def apply(self, pc, x, y):
+        self._apply_local("inverse", x, y)
+
+
+    def applyTranspose(self, pc, x, y):
+        self._apply_local("transpose", x, y)
+
+
+class BrokenSchurComplementPC(fdrk.PCBase):
+    """
+    Preconditioner of the Schur complement on the conforming field c, after the
+    elimination of the broken field b of the mixed system
+        S = A_cc - A_cb A_bb^{-1} A_bc
+    Since A_bb^{-1} is cell local, S is exact and sparse (the stencil of A_cc): it is
+    assembled with Slate and solved with the options of the prefix "schur_".
+    The mixed operator and the index of the broken field are read from the application
+    context ("mixed_operator", "broken_index")
+    """
+    needs_python_pmat = True
+
+    def initialize(self, pc):
+        _, P = pc.getOperators()
+        context = P.getPythonContext()
+
+        broken_index = context.appctx["broken_index"]
+        conforming_index = 1 - broken_index
+        A_blocks = fdrk.Tensor(context.appctx["mixed_operator"]).blocks
+        self.schur_operator = A_blocks[conforming_index, conforming_index] \
+                            - A_blocks[conforming_index, broken_index] * A_blocks[broken_index, broken_index].inv \
+                            * A_blocks[broken_index, conforming_index]
+
+        self.bcs = context.row_bcs
+        self.schur_matrix = fdrk.assemble(self.schur_operator, bcs=self.bcs, mat_type="aij")
+
+        self.ksp = PETSc.KSP().create(comm=pc.comm)
+        self.ksp.incrementTabLevel(1, parent=pc)
+        self.ksp.setOptionsPrefix(pc.getOptionsPrefix() + "schur_")
+        self.ksp.setOperators(self.schur_matrix.petscmat)
+        self.ksp.setFromOptions()
+
+
+    def update(self, pc):
+        fdrk.assemble(self.schur_operator, bcs=self.bcs, tensor=self.schur_matrix)
+
+
+    def apply(self, pc, x, y):
+        self.ksp.solve(x, y)
+
+
+    def applyTranspose(self, pc, x, y):
+        self.ksp.solveTranspose(x, y)
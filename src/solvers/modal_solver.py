@@ -0,0 +1,441 @@
+import firedrake as fdrk
+from firedrake.petsc import PETSc
+from src.problems.problem import Problem
+from src.operators.maxwell_operators import MaxwellOperators
+from src.operators.wave_operators import WaveOperators
+from .linear_system import boundary_rows, direct_solver_parameters
+from .boundary_conditions import EssentialBoundaryConditions
+import numpy as np
+
+try:
+    from slepc4py import SLEPc
+except ImportError:
+    SLEPc = None
+
+
+class _ShiftInvertOperator:
+    """
+    Python context of the shell matrix (K + s M_r)^{-1} M_r on the reduced field,
+    K = J_ro M_o^{-1} J_ro^T, applied through the saddle point matrix
+        [[s M_r, J_ro], [J_or, M_o]]
+    """
+    def __init__(self, modal_solver):
+        self.modal_solver = modal_solver
+
+    def mult(self, mat, x, y):
+        modal_solver = self.modal_solver
+        modal_solver.mass_reduced.mult(x, modal_solver.reduced_work)
+        modal_solver._solve_saddle(modal_solver.reduced_work)
+
+        solution_reduced = modal_solver.saddle_solution.getSubVector(modal_solver.reduced_is)
+        solution_reduced.copy(y)
+        modal_solver.saddle_solution.restoreSubVector(modal_solver.reduced_is, solution_reduced)
+
+
+class ModalSolver:
+    def __init__(self,
+                 problem: Problem,
+                 system,
+                 n_modes,
+                 pol_degree=1,
+                 formulation="primal",
+                 reduced_index=0,
+                 shift=1,
+                 tol=1e-10,
+                 direct_solver="mumps",
+                 n_quadrature=8,
+                 verbose=False
+                ):
+        """
+        Modal propagation of the semi-discrete system M dx/dt = J x + q(t) with separable
+        boundary conditions and forcing. The n_modes lowest non zero frequencies omega_k 
+        and their modes are computed once with SLEPc, on the pencil of one field 
+        (the reduced field r, the other one is o) with homogeneous boundary conditions
+            J_ro M_o^{-1} J_ro^T P_k = omega_k^2 M_r P_k,    U_k = M_o^{-1} J_ro^T P_k / omega_k
+        using the shift-invert operator (K + s M_r)^{-1} M_r, applied by a factorized saddle
+        point matrix. The essential data sum_j g_j phi_j(t) are lifted on the boundary dofs,
+        x = sum_j L_j phi_j(t) + y, and the homogeneous part y is driven by the loads of the 
+        natural data, of the forcing and of the lifting (J L_j phi_j - M L_j phi_j'). 
+        The complex modal coefficients c_k = a_k + i b_k of y evolve as
+            c_k(t) = exp(-i omega_k t) c_k(0) + int_0^t exp(-i omega_k (t - s)) g_k(s) ds,
+        the Duhamel integrals of the time functions of the data are computed by quadrature
+        (by parts for phi_j'). The part not represented by the modes is propagated as static
+        (omega=0), which is exact for the static modes.
+        The mixed operators are used: the hybrid discretization gives the same semi-discrete
+        solution
+        Parameters:
+            problem (Problem) : a problem instance with separable data
+            system (string) : "Wave" or "Maxwell"
+            n_modes (int) : number of modes
+            pol_degree (int) : integer for the polynomial degree of the finite elements
+            formulation (string) : "primal" or "dual"
+            reduced_index (int) : index of the reduced field r. The static modes (omega=0)
+                of this field are discarded, so it should be the field with the smaller kernel
+                (e.g. the pressure for the wave equation)
+            shift (float) : positive shift s of the spectral transformation
+            tol (float) : tolerance of the eigensolver
+            direct_solver (string) : factorization package of the saddle point and mass matrices
+            n_quadrature (int) : number of Gauss-Legendre points of each panel of the Duhamel integrals
+        """
+        if SLEPc is None:
+            raise ImportError("The modal solver requires slepc4py")
+        if problem.get_separable_boundary_conditions() is None:
+            raise ValueError(f"The problem {str(problem)} does not provide separable boundary conditions")
+        if problem.forcing and problem.get_separable_forcing() is None:
+            raise ValueError(f"The problem {str(problem)} does not provide a separable forcing")
+
+        self.problem = problem
+        self.n_modes = n_modes
+        self.shift = shift
+        self.n_quadrature = n_quadrature
+        self.verbose = verbose
+
+        if system=="Maxwell":
+            self.operators = MaxwellOperators("mixed", formulation, problem, pol_degree)
+        elif system=="Wave":
+            self.operators = WaveOperators("mixed", formulation, problem, pol_degree)
+        else:
+            raise ValueError(f"System type {system} is not a valid option")
+
+        self.space_operators = self.operators.fullspace
+        self.state = fdrk.Function(self.space_operators)
+        self.state_initial = fdrk.Function(self.space_operators)
+
+        expression_t0 = self.problem.get_initial_conditions()
+        for counter, field in enumerate(self.operators.get_initial_conditions(expression_t0)):
+            self.state_initial.sub(counter).assign(field)
+
+        field_ises = self.space_operators.dof_dset.field_ises
+        self.reduced_is = field_ises[reduced_index]
+        self.other_is = field_ises[1 - reduced_index]
+
+        self.dict_essential_bcs = self.operators.essential_boundary_conditions(self.problem, time=None, \
+                                                                               separable=True)
+
+        self._set_matrices(direct_solver)
+        self._compute_modes(tol)
+        self._set_data()
+        self._project_initial_conditions()
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Modal solver set with {len(self.frequencies)} modes")
+
+
+    def _set_matrices(self, direct_solver):
+        tests = fdrk.TestFunctions(self.space_operators)
+        trials = fdrk.TrialFunctions(self.space_operators)
+        mass_operator, dynamics_operator = self.operators.dynamics(tests, trials)
+
+        self.mass_matrix = fdrk.assemble(mass_operator, mat_type="aij").petscmat
+        self.dynamics_matrix = fdrk.assemble(dynamics_operator, mat_type="aij").petscmat
+
+        self.mass_reduced = self.mass_matrix.createSubMatrix(self.reduced_is, self.reduced_is)
+        self.mass_other = self.mass_matrix.createSubMatrix(self.other_is, self.other_is)
+
+        # Saddle point matrix: mass of the reduced field scaled by the shift, plus J
+        scaling = self.mass_matrix.createVecLeft()
+        scaling.set(1)
+        reduced_scaling = scaling.getSubVector(self.reduced_is)
+        reduced_scaling.set(self.shift)
+        scaling.restoreSubVector(self.reduced_is, reduced_scaling)
+
+        self.saddle_matrix = self.mass_matrix.duplicate(copy=True)
+        self.saddle_matrix.diagonalScale(L=scaling)
+        self.saddle_matrix.axpy(1, self.dynamics_matrix, structure=PETSc.Mat.Structure.DIFFERENT_NONZERO_PATTERN)
+
+        # The modes satisfy homogeneous essential boundary conditions
+        space_bc = self.dict_essential_bcs["space"]
+        homogeneous_bcs = [fdrk.DirichletBC(space_bc, fdrk.Function(space_bc), id_bc) \
+                           for id_bc in self.dict_essential_bcs["list_id"]]
+        self.bc_mask, self.bc_rows = boundary_rows(self.space_operators, homogeneous_bcs)
+        self.saddle_matrix.zeroRowsColumns(self.bc_rows, diag=1.0)
+
+        # Mass matrix of the constrained dofs, for the loads of the data
+        self.mass_constrained = self.mass_matrix.duplicate(copy=True)
+        self.mass_constrained.zeroRowsColumns(self.bc_rows, diag=1.0)
+
+        factor_solver_type = direct_solver_parameters(direct_solver)["pc_factor_mat_solver_type"]
+        self.ksp, self.mass_ksp = [self._direct_ksp(matrix, factor_solver_type) \
+                                   for matrix in [self.saddle_matrix, self.mass_constrained]]
+
+        self.saddle_rhs, self.saddle_solution = self.saddle_matrix.createVecs()
+        self.reduced_work = self.mass_reduced.createVecLeft()
+
+
+    def _direct_ksp(self, matrix, factor_solver_type):
+        ksp = PETSc.KSP().create(comm=matrix.getComm())
+        ksp.setOperators(matrix)
+        ksp.setType("preonly")
+        ksp.getPC().setType("lu")
+        ksp.getPC().setFactorSolverType(factor_solver_type)
+        ksp.setUp()
+        return ksp
+
+
+    def _solve_mass(self, load_vec):
+        """
+        Vector s with M s = q on the constrained dofs and s = 0 on the boundary dofs
+        """
+        rhs = load_vec.copy()
+        rhs.array[self.bc_mask] = 0
+        solution = rhs.duplicate()
+        self.mass_ksp.solve(rhs, solution)
+        return solution
+
+
+    def _solve_saddle(self, reduced_rhs):
+        """
+        Solves the saddle point system with right hand side (reduced_rhs, 0)
+        """
+        self.saddle_rhs.zeroEntries()
+        rhs_reduced = self.saddle_rhs.getSubVector(self.reduced_is)
+        reduced_rhs.copy(rhs_reduced)
+        self.saddle_rhs.restoreSubVector(self.reduced_is, rhs_reduced)
+        self.saddle_rhs.setValues(self.bc_rows.getIndices(), np.zeros(self.bc_rows.getLocalSize()))
+        self.saddle_rhs.assemble()
+
+        self.ksp.solve(self.saddle_rhs, self.saddle_solution)
+
+
+    def _compute_modes(self, tol):
+        n_reduced = self.mass_reduced.getSizes()
+        n_reduced_global = n_reduced[0][1]
+        shell_matrix = PETSc.Mat().createPython(n_reduced, context=_ShiftInvertOperator(self), \
+                                                comm=self.mass_reduced.getComm())
+        shell_matrix.setUp()
+
+        eps = SLEPc.EPS().create(comm=self.mass_reduced.getComm())
+        eps.setOperators(shell_matrix)
+        eps.setProblemType(SLEPc.EPS.ProblemType.NHEP)
+        eps.setWhichEigenpairs(SLEPc.EPS.Which.LARGEST_MAGNITUDE)
+        # Some more pairs, the static modes are discarded
+        eps.setDimensions(nev=min(self.n_modes + max(5, self.n_modes//5), n_reduced_global))
+        eps.setTolerances(tol=tol)
+        eps.solve()
+
+        list_frequencies = []
+        self.list_reduced_modes = []
+        self.list_other_modes = []
+        mass_mode = self.mass_reduced.createVecLeft()
+
+        for counter in range(eps.getConverged()):
+            mode = self.mass_reduced.createVecRight()
+            eigenvalue = eps.getEigenpair(counter, mode).real
+            frequency_squared = 1/eigenvalue - self.shift
+            if frequency_squared <= tol*self.shift:
+                continue
+
+            # Orthonormalization in the mass inner product (repeated frequencies)
+            for previous_mode in self.list_reduced_modes:
+                self.mass_reduced.mult(previous_mode, mass_mode)
+                mode.axpy(-mode.dot(mass_mode), previous_mode)
+            self.mass_reduced.mult(mode, mass_mode)
+            mode.scale(1/np.sqrt(mode.dot(mass_mode)))
+
+            frequency = np.sqrt(frequency_squared)
+            # U_k = M_o^{-1} J_ro^T P_k / omega_k, from the saddle point system
+            self.mass_reduced.mult(mode, mass_mode)
+            mass_mode.scale(frequency_squared + self.shift)
+            self._solve_saddle(mass_mode)
+            solution_other = self.saddle_solution.getSubVector(self.other_is)
+            other_mode = solution_other.copy()
+            self.saddle_solution.restoreSubVector(self.other_is, solution_other)
+            other_mode.scale(1/frequency)
+
+            list_frequencies.append(frequency)
+            self.list_reduced_modes.append(mode)
+            self.list_other_modes.append(other_mode)
+
+            if len(list_frequencies)==self.n_modes:
+                break
+
+        self.frequencies = np.array(list_frequencies)
+
+
+    def _set_data(self):
+        """
+        Liftings L_j of the essential data and vectors s_j = M^{-1} q_j of the loads on 
+        the constrained dofs, each with its time function. The loads are the natural data,
+        the forcing, J L_j (driven by phi_j) and - M L_j (driven by phi_j')
+        """
+        tests = fdrk.TestFunctions(self.space_operators)
+        self.list_liftings = []
+        self.list_load_terms = []
+
+        list_id_bc = self.dict_essential_bcs["list_id"]
+        if list_id_bc:
+            bc_evaluator = EssentialBoundaryConditions(self.operators, self.dict_essential_bcs["space"], \
+                                                       self.dict_essential_bcs["value"], list_id_bc)
+
+            for counter, time_function in enumerate(bc_evaluator.list_time_functions):
+                with bc_evaluator.bc_function.dat.vec as bc_vec:
+                    bc_vec.array[bc_evaluator.boundary_mask] = bc_evaluator.boundary_values[counter]
+                lifting = fdrk.Function(self.space_operators)
+                for bc in bc_evaluator.bcs:
+                    bc.apply(lifting)
+
+                with lifting.dat.vec_ro as lifting_vec:
+                    lifting_copy = lifting_vec.copy()
+                self.list_liftings.append((lifting_copy, time_function))
+
+                load_vec = self.mass_matrix.createVecLeft()
+                self.dynamics_matrix.mult(lifting_copy, load_vec)
+                self.list_load_terms.append((self._solve_mass(load_vec), time_function, False))
+                self.mass_matrix.mult(lifting_copy, load_vec)
+                load_vec.scale(-1)
+                self.list_load_terms.append((self._solve_mass(load_vec), time_function, True))
+
+        list_separable_forms = [(self.operators.control(tests, spatial_value), time_function) for \
+                        spatial_value, time_function in self.operators.natural_boundary_conditions(self.problem, \
+                                                                                time=None, separable=True)]
+
+        # Discontinuities of the time functions, used as panel edges of the quadrature
+        self.list_breakpoints = []
+        if self.problem.forcing:
+            time_support = self.problem.get_forcing_time_support()
+            if time_support is not None:
+                self.list_breakpoints.extend(time_support)
+
+            for counter, list_forcing_terms in enumerate(self.problem.get_separable_forcing()):
+                if list_forcing_terms is None:
+                    continue
+                for spatial_force, time_function in list_forcing_terms:
+                    list_separable_forms.append((fdrk.inner(tests[counter], spatial_force)*fdrk.dx, \
+                                                 self._restrict_to_support(time_function, time_support)))
+
+        for functional, time_function in list_separable_forms:
+            with fdrk.assemble(functional).dat.vec_ro as load_vec:
+                self.list_load_terms.append((self._solve_mass(load_vec), time_function, False))
+
+        # Modal coefficients g_j = a_j + i b_j and remainders of the loads
+        self.list_load_coefficients = []
+        self.list_load_remainders = []
+        for load_vec, _, _ in self.list_load_terms:
+            a_coefficients, b_coefficients = self._modal_coefficients(load_vec)
+            self.list_load_coefficients.append(a_coefficients + 1j*b_coefficients)
+            self.list_load_remainders.append(self._remainder(load_vec, a_coefficients, b_coefficients))
+
+
+    def _restrict_to_support(self, time_function, time_support):
+        if time_support is None:
+            return time_function
+
+        t_start, t_end = time_support
+        return lambda time: time_function(time) if t_start <= time < t_end else 0.
+
+
+    def _modal_coefficients(self, vec):
+        """
+        Modal coefficients a_k = (P_k, r)_M, b_k = (U_k, o)_M of a vector
+        """
+        reduced_vec = vec.getSubVector(self.reduced_is)
+        other_vec = vec.getSubVector(self.other_is)
+
+        mass_reduced_vec = self.mass_reduced.createVecLeft()
+        mass_other_vec = self.mass_other.createVecLeft()
+        self.mass_reduced.mult(reduced_vec, mass_reduced_vec)
+        self.mass_other.mult(other_vec, mass_other_vec)
+
+        vec.restoreSubVector(self.reduced_is, reduced_vec)
+        vec.restoreSubVector(self.other_is, other_vec)
+
+        a_coefficients = np.array([mode.dot(mass_reduced_vec) for mode in self.list_reduced_modes])
+        b_coefficients = np.array([mode.dot(mass_other_vec) for mode in self.list_other_modes])
+        return a_coefficients, b_coefficients
+
+
+    def _add_modes(self, vec, a_coefficients, b_coefficients):
+        """
+        Adds sum_k a_k P_k to the reduced field and sum_k b_k U_k to the other field
+        """
+        for field_is, list_modes, coefficients in [(self.reduced_is, self.list_reduced_modes, a_coefficients),
+                                                   (self.other_is, self.list_other_modes, b_coefficients)]:
+            if not list_modes:
+                continue
+            field_vec = vec.getSubVector(field_is)
+            field_vec.maxpy(coefficients, list_modes)
+            vec.restoreSubVector(field_is, field_vec)
+
+
+    def _remainder(self, vec, a_coefficients, b_coefficients):
+        """
+        Part of a vector not represented by the modes
+        """
+        remainder = vec.copy()
+        self._add_modes(remainder, -a_coefficients, -b_coefficients)
+        return remainder
+
+
+    def _project_initial_conditions(self):
+        """
+        Modal coefficients c_k(0) and remainder of the homogeneous part y_0 = x_0 - sum_j L_j phi_j(0)
+        """
+        with self.state_initial.dat.vec_ro as initial_vec:
+            homogeneous_initial = initial_vec.copy()
+        for lifting_vec, time_function in self.list_liftings:
+            homogeneous_initial.axpy(-time_function(0), lifting_vec)
+
+        a_coefficients, b_coefficients = self._modal_coefficients(homogeneous_initial)
+        self.initial_coefficients = a_coefficients + 1j*b_coefficients
+        self.initial_remainder = self._remainder(homogeneous_initial, a_coefficients, b_coefficients)
+
+
+    def _duhamel_integrals(self, time):
+        """
+        Integrals int_0^t exp(-i w (t - s)) phi_j(s) ds of the time functions of the loads, for
+        the frequencies of the modes and w=0 (last column), computed with a composite Gauss-Legendre
+        rule with panels shorter than half a period
+        """
+        frequencies = np.append(self.frequencies, 0)
+        integrals = np.zeros((len(self.list_load_terms), len(frequencies)), dtype=complex)
+        if time <= 0 or not self.list_load_terms:
+            return integrals
+
+        n_panels = int(np.ceil(np.max(frequencies)*time/np.pi)) + 1
+        edges = np.union1d(np.linspace(0, time, n_panels + 1), \
+                           [point for point in self.list_breakpoints if 0 < point < time])
+        half_widths = np.diff(edges)/2
+
+        points, weights = np.polynomial.legendre.leggauss(self.n_quadrature)
+        nodes = (edges[:-1, None] + half_widths[:, None]*(points + 1)).ravel()
+        node_weights = (half_widths[:, None]*weights).ravel()
+
+        kernel = np.exp(-1j*np.outer(time - nodes, frequencies))
+        for counter, (_, time_function, _) in enumerate(self.list_load_terms):
+            values = np.array([time_function(node) for node in nodes])
+            integrals[counter] = (values*node_weights) @ kernel
+        return integrals
+
+
+    def solution_at(self, time):
+        """
+        Solution at a given (float) time, stored in state
+            x(t) = sum_j L_j phi_j(t) + y_rem(t) + sum_k (Re(c_k(t)) P_k + Im(c_k(t)) U_k)
+        where for the loads driven by phi_j' the Duhamel integral is integrated by parts
+            int_0^t exp(-i w (t - s)) phi_j'(s) ds = phi_j(t) - exp(-i w t) phi_j(0) - i w int_0^t exp(-i w (t - s)) phi_j(s) ds
+        """
+        rotation = np.exp(-1j*self.frequencies*time)
+        integrals = self._duhamel_integrals(time)
+
+        coefficients = rotation*self.initial_coefficients
+        remainder = self.initial_remainder.copy()
+
+        for counter, (_, time_function, derivative) in enumerate(self.list_load_terms):
+            if derivative:
+                increment = time_function(time) - rotation*time_function(0) \
+                            - 1j*self.frequencies*integrals[counter, :-1]
+                remainder_increment = time_function(time) - time_function(0)
+            else:
+                increment = integrals[counter, :-1]
+                remainder_increment = integrals[counter, -1].real
+
+            coefficients += self.list_load_coefficients[counter]*increment
+            remainder.axpy(remainder_increment, self.list_load_remainders[counter])
+
+        with self.state.dat.vec_wo as state_vec:
+            remainder.copy(state_vec)
+            for lifting_vec, time_function in self.list_liftings:
+                state_vec.axpy(time_function(time), lifting_vec)
+            self._add_modes(state_vec, coefficients.real, coefficients.imag)
+
+        return self.state
@@ -0,0 +1,108 @@
+import firedrake as fdrk
+from firedrake.petsc import PETSc
+import numpy as np
+from src.operators.utils import facet_form
+
+
+def trace_spaces_hierarchy(operators, coarse_degree=1):
+    """
+    Global trace spaces of the hybrid discretization at the degrees coarse_degree, ..., k
+    (the operators are built again at the lower degrees, from the same de Rham elements)
+    Parameters:
+        operators (SystemOperators) : the operators of degree k of the hybrid discretization
+        coarse_degree (int) : the degree of the coarsest level
+    """
+    if operators.discretization!="hybrid":
+        raise ValueError("The p-multigrid hierarchy is defined for the trace space of the hybrid discretization")
+
+    list_spaces = []
+    for degree in range(coarse_degree, operators.pol_degree):
+        coarse_operators = type(operators)(operators.discretization, operators.formulation, \
+                                           operators.problem, degree)
+        list_spaces.append(coarse_operators.space_global)
+    list_spaces.append(operators.space_global)
+
+    return list_spaces
+
+
+def trace_prolongations(operators, coarse_degree=1):
+    """
+    Prolongations between the nested trace spaces of consecutive degrees, from the coarsest
+    to the finest level. The fine degrees of freedom are evaluated on the coarse traces
+    (interpolation in the fine trace space, exact since the spaces are nested). The trace 
+    spaces of degree > 1 on quadrilaterals and hexahedra do not support interpolation, there
+    the prolongation is the L2 projection on the traces (see trace_projection)
+    Returns:
+        list_prolongations (list) : PETSc matrices from the level l-1 to the level l
+    """
+    list_spaces = trace_spaces_hierarchy(operators, coarse_degree=coarse_degree)
+    projection = "quadrilateral" in operators.cell_name and operators.pol_degree>1
+
+    list_prolongations = []
+    for coarse_space, fine_space in zip(list_spaces[:-1], list_spaces[1:]):
+        if projection:
+            list_prolongations.append(trace_projection(operators, coarse_space, fine_space))
+        else:
+            interpolator = fdrk.Interpolator(fdrk.TestFunction(coarse_space), fine_space)
+            list_prolongations.append(interpolator.callable().handle)
+
+    return list_prolongations
+
+
+def trace_projection(operators, coarse_space, fine_space, tol=1e-10):
+    """
+    Prolongation P = M_ff^{-1} M_fc of the L2 projection of the coarse traces on the fine 
+    trace space, with the facet inner product of the essential boundary conditions. 
+    The fine facet mass is factorized once and solved for each column of M_fc. Since the 
+    spaces are nested the projection is the embedding, the entries below tol are dropped
+    Parameters:
+        operators (SystemOperators) : the operators of the finest level
+        coarse_space (FunctionSpace) : the coarse trace space
+        fine_space (FunctionSpace) : the fine trace space
+        tol (float) : threshold of the dropped entries
+    """
+    extruded = operators.domain.extruded
+    a_integrand, l_integrand = operators.boundary_projection_integrands(fdrk.TestFunction(fine_space), \
+                                                                        fdrk.TrialFunction(fine_space), \
+                                                                        fdrk.TrialFunction(coarse_space))
+    mass_fine = fdrk.assemble(facet_form(a_integrand, extruded), mat_type="aij").petscmat
+    mass_transfer = fdrk.assemble(facet_form(l_integrand, extruded), mat_type="aij").petscmat
+
+    ksp = PETSc.KSP().create(comm=mass_fine.getComm())
+    ksp.setOperators(mass_fine)
+    ksp.setType("preonly")
+    ksp.getPC().setType("lu")
+    ksp.getPC().setFactorSolverType("mumps")
+    ksp.setUp()
+
+    prolongation = PETSc.Mat().createAIJ(mass_transfer.getSizes(), comm=mass_transfer.getComm())
+    prolongation.setUp()
+    prolongation.setOption(PETSc.Mat.Option.NEW_NONZERO_ALLOCATION_ERR, False)
+    row_start = prolongation.getOwnershipRange()[0]
+
+    column_vec = mass_transfer.createVecLeft()
+    solution_vec = mass_fine.createVecRight()
+    for column in range(mass_transfer.getSize()[1]):
+        mass_transfer.getColumnVector(column, column_vec)
+        ksp.solve(column_vec, solution_vec)
+
+        values = solution_vec.array_r
+        rows = np.flatnonzero(np.abs(values) > tol)
+        prolongation.setValues(row_start + rows, [column], values[rows][:, None])
+    prolongation.assemble()
+
+    return prolongation
+
+
+def set_p_multigrid(ksp, list_prolongations):
+    """
+    Sets the levels and the prolongations of a PCMG preconditioner. The operators of the
+    coarse levels are the Galerkin products P^T A P (pc_mg_galerkin in the options)
+    """
+    pc = ksp.getPC()
+    if pc.getType()!="mg" or not list_prolongations:
+        return
+
+    pc.setMGLevels(len(list_prolongations) + 1)
+    for level, prolongation in enumerate(list_prolongations, start=1):
+        pc.setMGInterpolation(level, prolongation)
@@ -0,0 +1,150 @@
+import firedrake as fdrk
+from .hamiltonian_solver import HamiltonianWaveSolver
+from firedrake.petsc import PETSc
+from mpi4py import MPI
+
+
+class PararealSolver:
+    def __init__(self,
+                 problem_factory,
+                 system,
+                 final_time,
+                 fine_time_step,
+                 coarse_time_step,
+                 ranks_per_slice=1,
+                 pol_degree=1,
+                 discretization="hybrid",
+                 formulation="primal",
+                 solver_parameters={},
+                 fine_options={},
+                 coarse_options={},
+                 tol=1e-8,
+                 max_iterations=None,
+                 verbose=False
+                ):
+        """
+        Parareal iteration over time slices. COMM_WORLD is split in an ensemble of spatial
+        communicators of ranks_per_slice ranks, one per time slice. On each slice the fine
+        propagator F (fine time step) and the coarse propagator G (coarse time step, or
+        e.g. the Stormer-Verlet integrator through coarse_options) are HamiltonianWaveSolver
+        instances. The iteration
+            U_{j+1}^{k+1} = G(U_j^{k+1}) + F(U_j^k) - G(U_j^k)
+        is pipelined: the fine propagations run concurrently on all slices, the coarse
+        correction is passed from a slice to the next one.
+        The iteration stops when the largest correction of the slice end states is below tol
+        Parameters:
+            problem_factory (callable) : function problem_factory(comm) returning the problem
+                with its mesh distributed on the spatial communicator comm
+            system (string) : "Wave" or "Maxwell"
+            final_time (float) : final time, divided in slices of equal length
+            fine_time_step, coarse_time_step (float) : time steps of the propagators
+            ranks_per_slice (int) : number of ranks of each spatial communicator
+            fine_options, coarse_options (dictionary) : other options of the solvers
+            tol (float) : tolerance on the correction of the end states
+            max_iterations (int) : maximum number of iterations (default: the number of slices,
+                after which parareal equals the sequential fine solution)
+        """
+        self.ensemble = fdrk.Ensemble(fdrk.COMM_WORLD, ranks_per_slice)
+        self.n_slices = self.ensemble.ensemble_comm.size
+        self.slice_index = self.ensemble.ensemble_comm.rank
+        self.tol = tol
+        self.max_iterations = self.n_slices if max_iterations is None else max_iterations
+        self.verbose = verbose
+
+        self.slice_length = final_time/self.n_slices
+        self.time_start = self.slice_index*self.slice_length
+
+        self.n_fine_steps = round(self.slice_length/fine_time_step)
+        self.n_coarse_steps = round(self.slice_length/coarse_time_step)
+        if abs(self.n_fine_steps*fine_time_step - self.slice_length) > 1e-12*final_time or \
+            abs(self.n_coarse_steps*coarse_time_step - self.slice_length) > 1e-12*final_time:
+            raise ValueError("The time steps must divide the length of the time slices")
+
+        self.problem = problem_factory(self.ensemble.comm)
+
+        self.fine_solver, self.coarse_solver = [HamiltonianWaveSolver(self.problem, system, time_step, \
+                                                    pol_degree=pol_degree, discretization=discretization, \
+                                                    formulation=formulation, solver_parameters=solver_parameters, \
+                                                    **options) \
+                                                for time_step, options in [(fine_time_step, fine_options), \
+                                                                           (coarse_time_step, coarse_options)]]
+
+        space = self.fine_solver.space_operators
+        # State at the start of the slice, fine and coarse propagations of the previous iteration
+        self.state_start = fdrk.Function(space)
+        self.state_start.assign(self.fine_solver.state_old)
+        self.state_end = fdrk.Function(space)
+        self.fine_end = fdrk.Function(space)
+        self.coarse_end = fdrk.Function(space)
+        self.coarse_new = fdrk.Function(space)
+        self.correction = fdrk.Function(space)
+
+        self.n_iterations = 0
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Parareal with {self.n_slices} slices of {self.n_fine_steps} fine and "
+                            f"{self.n_coarse_steps} coarse steps", comm=self.ensemble.comm)
+
+
+    def _propagate(self, solver, n_steps, state_end):
+        """
+        Propagates state_start over the slice, the result is stored in state_end
+        """
+        self.state_start.dat.copy(solver.state_old.dat)
+        solver._set_time(self.time_start)
+        solver.integrate_n(n_steps)
+        solver.state_old.dat.copy(state_end.dat)
+
+
+    def _receive_start(self):
+        if self.slice_index > 0:
+            self.ensemble.recv(self.state_start, source=self.slice_index - 1, tag=self.slice_index)
+
+
+    def _send_end(self):
+        if self.slice_index < self.n_slices - 1:
+            self.ensemble.send(self.state_end, dest=self.slice_index + 1, tag=self.slice_index + 1)
+
+
+    def solve(self):
+        """
+        Runs the parareal iteration. At the end state_end contains the solution at the end of the slice
+        """
+        # Initial sequential coarse sweep
+        self._receive_start()
+        self._propagate(self.coarse_solver, self.n_coarse_steps, self.coarse_end)
+        self.state_end.assign(self.coarse_end)
+        self._send_end()
+
+        for iteration in range(1, self.max_iterations + 1):
+            self._propagate(self.fine_solver, self.n_fine_steps, self.fine_end)
+
+            # Correction sweep, U_end = G(U_start) + F_old - G_old
+            self.correction.assign(self.state_end)
+            self._receive_start()
+            self._propagate(self.coarse_solver, self.n_coarse_steps, self.coarse_new)
+            self.state_end.assign(self.coarse_new + self.fine_end - self.coarse_end)
+            self.coarse_end.assign(self.coarse_new)
+            self._send_end()
+            self.n_iterations = iteration
+
+            with self.state_end.dat.vec_ro as end_vec, self.correction.dat.vec as correction_vec:
+                correction_vec.aypx(-1, end_vec)
+                local_correction = correction_vec.norm()/max(end_vec.norm(), 1e-300)
+            max_correction = self.ensemble.ensemble_comm.allreduce(local_correction, op=MPI.MAX)
+
+            if self.verbose:
+                PETSc.Sys.Print(f"Parareal iteration {iteration}, correction {max_correction:.3e}", \
+                                comm=self.ensemble.comm)
+            if max_correction < self.tol:
+                break
+
+
+    def final_state(self):
+        """
+        Solution at the final time, broadcast from the last slice to all the slices
+        """
+        final_state = fdrk.Function(self.state_end.function_space())
+        final_state.assign(self.state_end)
+        self.ensemble.bcast(final_state, root=self.n_slices - 1)
+        return final_state
@@ -0,0 +1,202 @@
+from firedrake.petsc import PETSc
+from src.operators.wave_operators import WaveOperators
+from .linear_system import direct_solver_parameters
+
+
+def solver_profile(profile, operators, log_iterations=False):
+    """
+    PETSc options of a named solver profile for the global system of the given operators
+    Parameters:
+        profile (string) : "direct" (sparse LU), "iterative" (Krylov method with a multilevel
+            preconditioner chosen according to the system, the formulation and the discretization)
+            "bddc" (hybrid only, non overlapping domain decomposition of the trace system) or
+            "pmg" (hybrid only, p-multigrid on the trace spaces of degree k, ..., 1) or
+            "matfree" (the operator is applied without assembling it: for the hybrid discretization
+            the trace operator with the local Slate kernels, for the mixed discretization the
+            mixed operator, with a Schur complement preconditioner eliminating the broken field)
+        operators (SystemOperators) : the operators of the system
+        log_iterations (bool) : if True the number of iterations of each solve is printed
+    """
+    if profile=="direct":
+        parameters = direct_solver_parameters()
+    elif profile=="iterative":
+        if operators.discretization=="hybrid":
+            parameters = _trace_parameters(operators)
+        else:
+            parameters = _mixed_parameters(operators)
+    elif profile=="bddc":
+        if operators.discretization!="hybrid":
+            raise ValueError("The BDDC profile is available for the hybrid discretization only")
+        parameters = _bddc_parameters(operators)
+    elif profile=="pmg":
+        if operators.discretization!="hybrid":
+            raise ValueError("The p-multigrid profile is available for the hybrid discretization only")
+        parameters = _pmg_parameters()
+    elif profile=="matfree":
+        if operators.discretization=="hybrid":
+            parameters = _matfree_trace_parameters()
+        else:
+            parameters = _matfree_mixed_parameters(operators)
+    else:
+        raise ValueError(f"Solver profile {profile} is not a valid option")
+
+    if log_iterations:
+        parameters["ksp_converged_reason"] = None
+    return parameters
+
+
+def _amg_parameters():
+    """
+    Algebraic multigrid for H1-like operators: BoomerAMG if hypre is available, otherwise GAMG
+    """
+    if PETSc.Sys.hasExternalPackage("hypre"):
+        return {"pc_type": "hypre",
+                "pc_hypre_type": "boomeramg"}
+    else:
+        return {"pc_type": "gamg",
+                "mg_levels_ksp_type": "chebyshev",
+                "mg_levels_pc_type": "sor"}
+
+
+def _trace_parameters(operators):
+    """
+    Trace system of the hybrid discretization. The operator is M_tt - dt/2 J_tt condensed on
+    the facets: nonsymmetric, so that GMRES is used. The facet trace spaces have no discrete
+    de Rham sequence on the cells, so that auxiliary space methods (AMS, ADS) do not apply:
+    smoothed aggregation AMG is used, with GMRES and additive Schwarz (ILU) smoothing
+    for the H(curl) and H(div) traces
+    """
+    parameters = {"mat_type": "aij",
+                  "ksp_type": "gmres",
+                  "ksp_gmres_restart": 100,
+                  "ksp_rtol": 1e-10}
+
+    if isinstance(operators, WaveOperators) and operators.formulation=="dual":
+        # Continuous facet trace of the dual wave formulation
+        parameters.update(_amg_parameters())
+    else:
+        parameters.update({"pc_type": "gamg",
+                           "pc_gamg_threshold": 0.01,
+                           "mg_levels_ksp_type": "gmres",
+                           "mg_levels_ksp_max_it": 3,
+                           "mg_levels_pc_type": "asm",
+                           "mg_levels_sub_pc_type": "ilu"})
+    return parameters
+
+
+def _bddc_parameters(operators):
+    """
+    Trace system assembled as a MATIS: each rank keeps its subdomain contribution, i.e.
+    the sum of the Slate Schur complements of its cells, and BDDC builds the coarse space
+    from the vertex (and in 3D edge and face) constraints of the subdomain interfaces.
+    The condensed operator is nonsymmetric (dt J), hence GMRES
+    """
+    parameters = {"mat_type": "is",
+                  "ksp_type": "gmres",
+                  "ksp_gmres_restart": 100,
+                  "ksp_rtol": 1e-10,
+                  "pc_type": "bddc",
+                  "pc_bddc_symmetric": False,
+                  "pc_bddc_use_vertices": True,
+                  "pc_bddc_use_deluxe_scaling": True,
+                  "pc_bddc_dirichlet_pc_type": "lu",
+                  "pc_bddc_neumann_pc_type": "lu",
+                  "pc_bddc_coarse_pc_type": "lu"}
+
+    if operators.domain.geometric_dimension()==3:
+        parameters.update({"pc_bddc_use_edges": True,
+                           "pc_bddc_use_faces": True})
+    return parameters
+
+
+def _pmg_parameters():
+    """
+    p-multigrid V-cycle on the trace spaces (the prolongations are set by the solver), with
+    Galerkin coarse operators, GMRES/SOR smoothing and a direct solve on the lowest degree
+    """
+    return {"mat_type": "aij",
+            "ksp_type": "gmres",
+            "ksp_gmres_restart": 100,
+            "ksp_rtol": 1e-10,
+            "pc_type": "mg",
+            "pc_mg_type": "multiplicative",
+            "pc_mg_galerkin": "both",
+            "mg_levels_ksp_type": "gmres",
+            "mg_levels_ksp_max_it": 3,
+            "mg_levels_pc_type": "sor",
+            "mg_coarse_ksp_type": "preonly",
+            "mg_coarse_pc_type": "lu"}
+
+
+def _matfree_trace_parameters():
+    """
+    Matrix-free trace system: each Krylov iteration applies the Schur complement through
+    the local solves of the cells, the preconditioner is the Jacobi of its assembled diagonal
+    """
+    return {"mat_type": "matfree",
+            "ksp_type": "gmres",
+            "ksp_gmres_restart": 100,
+            "ksp_rtol": 1e-10,
+            "pc_type": "jacobi"}
+
+
+def _matfree_mixed_parameters(operators):
+    """
+    Matrix-free mixed system, full Schur complement factorization with the broken field b
+    (the field with the strong equation, e.g. broken NED in the dual wave or broken RT in the 
+    primal Maxwell formulation) eliminated first. Its block is inverted cell by cell and 
+    the Schur complement on the conforming field, exact and sparse, is assembled with 
+    Slate and preconditioned as the trace system
+    """
+    _, broken_index = operators.staggered_indices()
+    schur_prefix = "fieldsplit_1_schur_"
+
+    parameters = {"mat_type": "matfree",
+                  "ksp_type": "fgmres",
+                  "ksp_rtol": 1e-10,
+                  "pc_type": "fieldsplit",
+                  "pc_fieldsplit_type": "schur",
+                  "pc_fieldsplit_schur_fact_type": "full",
+                  "pc_fieldsplit_schur_precondition": "a11",
+                  "pc_fieldsplit_0_fields": str(broken_index),
+                  "pc_fieldsplit_1_fields": str(1 - broken_index),
+                  "fieldsplit_0_ksp_type": "preonly",
+                  "fieldsplit_0_pc_type": "python",
+                  "fieldsplit_0_pc_python_type": "src.solvers.mixed_preconditioners.BrokenBlockInversePC",
+                  "fieldsplit_1_ksp_type": "preonly",
+                  "fieldsplit_1_pc_type": "python",
+                  "fieldsplit_1_pc_python_type": "src.solvers.mixed_preconditioners.BrokenSchurComplementPC",
+                  schur_prefix + "ksp_type": "preonly"}
+
+    if isinstance(operators, WaveOperators) and operators.formulation=="dual":
+        # Continuous pressure
+        parameters.update({schur_prefix + key: value for key, value in _amg_parameters().items()})
+    else:
+        parameters.update({schur_prefix + "pc_type": "gamg",
+                           schur_prefix + "mg_levels_ksp_type": "gmres",
+                           schur_prefix + "mg_levels_ksp_max_it": 3,
+                           schur_prefix + "mg_levels_pc_type": "asm",
+                           schur_prefix + "mg_levels_sub_pc_type": "ilu"})
+    return parameters
+
+
+def _mixed_parameters(operators):
+    """
+    Mixed system [[M_0, -dt/2 J_01], [-dt/2 J_10, M_1]]: Schur complement factorization,
+    the mass block is approximated by its block Jacobi ILU and the Schur complement,
+    preconditioned by its diagonal approximation (selfp), by AMG
+    """
+    parameters = {"mat_type": "aij",
+                  "ksp_type": "fgmres",
+                  "ksp_rtol": 1e-10,
+                  "pc_type": "fieldsplit",
+                  "pc_fieldsplit_type": "schur",
+                  "pc_fieldsplit_schur_fact_type": "full",
+                  "pc_fieldsplit_schur_precondition": "selfp",
+                  "fieldsplit_0_ksp_type": "preonly",
+                  "fieldsplit_0_pc_type": "bjacobi",
+                  "fieldsplit_0_sub_pc_type": "ilu",
+                  "fieldsplit_1_ksp_type": "preonly"}
+
+    parameters.update({"fieldsplit_1_" + key: value for key, value in _amg_parameters().items()})
+    return parameters
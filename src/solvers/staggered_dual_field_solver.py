@@ -0,0 +1,116 @@
+import firedrake as fdrk
+from src.problems.problem import Problem
+from .hamiltonian_solver import HamiltonianWaveSolver
+from .staggered_step import StaggeredHybridStep
+from firedrake.petsc import PETSc
+
+
+class StaggeredDualFieldSolver:
+    def __init__(self,
+                 problem: Problem,
+                 system,
+                 time_step,
+                 pol_degree=1,
+                 solver_parameters={},
+                 verbose=False
+                ):
+        """
+        Staggered dual field integrator. The primal formulation is advanced at integer
+        steps t_n, the dual formulation at half steps t_{n+1/2}. In each step, the field
+        with the weak equation of one formulation is driven by the field of the other
+        formulation, known at the midpoint of the step. Each implicit solve is a reduced
+        hybrid system, whose operator only contains the mass of one field and the trace
+        couplings, the other field is updated cell by cell.
+        The dual formulation is started with an implicit midpoint half step
+        Parameters:
+            problem (Problem) : a problem instance
+            system (string) : "Wave" or "Maxwell"
+            time_step (float) : the time step
+            pol_degree (int) : integer for the polynomial degree of the finite elements
+            solver_parameters (dictionary) : PETSc options of the trace systems
+        """
+
+        self.problem = problem
+        self.time_step = time_step
+        self.verbose = verbose
+
+        # The primal formulation only advances with the staggered step: its implicit midpoint 
+        # system is not set. The dual one needs it for the starting half step
+        self.primal_solver = HamiltonianWaveSolver(problem, system, time_step, pol_degree=pol_degree, \
+                                                   discretization="hybrid", formulation="primal", \
+                                                   solver_parameters=solver_parameters, \
+                                                   global_system=False)
+
+        self.dual_solver = HamiltonianWaveSolver(problem, system, time_step, pol_degree=pol_degree, \
+                                                 discretization="hybrid", formulation="dual", \
+                                                 solver_parameters=solver_parameters)
+
+        self.solvers = (self.primal_solver, self.dual_solver)
+
+        self._start_dual()
+
+        # The primal step uses the dual field at t_{n+1/2}, the dual step the primal field at t_{n+1}
+        _, primal_strong_index = self.primal_solver.operators.staggered_indices()
+        _, dual_strong_index = self.dual_solver.operators.staggered_indices()
+
+        self.primal_step = StaggeredHybridStep(self.primal_solver, \
+                                               self.dual_solver.state_old.subfunctions[primal_strong_index])
+        self.dual_step = StaggeredHybridStep(self.dual_solver, \
+                                             self.primal_solver.state_new.subfunctions[dual_strong_index])
+        self.steps = (self.primal_step, self.dual_step)
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Staggered dual field solver set")
+
+
+    def _start_dual(self):
+        """
+        Half step of the dual formulation, from t_0 to t_{1/2}, with the implicit midpoint
+        """
+        self.dual_solver.set_time_step(self.time_step/2)
+        self.dual_solver.integrate()
+        self.dual_solver.update_variables()
+        self.dual_solver.set_time_step(self.time_step)
+
+
+    def integrate(self):
+        """
+        Advances the primal formulation from t_n to t_{n+1} and the dual one
+        from t_{n+1/2} to t_{n+3/2}
+        """
+        for step, solver in zip(self.steps, self.solvers):
+            step.solve()
+            solver.state_midpoint.assign(0.5*(solver.state_new + solver.state_old))
+            solver.actual_time.assign(solver.time_new)
+
+
+    def update_variables(self):
+        for solver in self.solvers:
+            solver.update_variables()
+
+
+    def integrate_n(self, n_steps, callback=None, callback_every=1):
+        """
+        Performs n_steps staggered steps, see HamiltonianWaveSolver.integrate_n.
+        The callback is called as callback(staggered_solver, step)
+        """
+        list_time_start = [float(solver.time_old) for solver in self.solvers]
+
+        for step in range(1, n_steps+1):
+            for staggered_step in self.steps:
+                staggered_step.solve()
+
+            call_back = callback is not None and step % callback_every == 0
+            for solver, time_start in zip(self.solvers, list_time_start):
+                if call_back or step==n_steps:
+                    solver.state_midpoint.assign(0.5*(solver.state_new + solver.state_old))
+                solver.state_new.dat.copy(solver.state_old.dat)
+                solver._set_time(time_start + step*self.time_step)
+
+            if call_back:
+                callback(self, step)
+
+
+    def invalidate_operator(self):
+        for step in self.steps:
+            step.invalidate()
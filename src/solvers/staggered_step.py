@@ -0,0 +1,110 @@
+import firedrake as fdrk
+from .linear_system import AssembledLinearSystem
+from pyop2 import op2
+
+
+class StaggeredHybridStep:
+    def __init__(self, solver, source):
+        """
+        Time step of one hybrid formulation in which the field with the weak equation
+        is driven by a known source from the other formulation.
+        The field with the weak equation and the traces are computed by a reduced hybrid
+        system (local operator made of the mass of this field and of the trace couplings).
+        The field with the strong equation is then updated cell by cell
+        Parameters:
+            solver (HamiltonianWaveSolver) : hybrid solver providing spaces, states, boundary
+                conditions and loads
+            source (Function) : field of the other formulation replacing the field
+                with the strong equation in the weak equation
+        """
+
+        self.solver = solver
+        operators = solver.operators
+        self.weak_index, self.strong_index = operators.staggered_indices()
+
+        n_block_loc = operators.mixedspace_local.num_sub_spaces()
+        # Local unknowns: field with the weak equation and the broken normal trace
+        local_indices = [self.weak_index, n_block_loc - 1]
+
+        time_step = solver.time_step_constant
+        tests, trials = solver.tests, solver.trials
+
+        # The field with the strong equation enters the weak equation only through the
+        # term dt/2 J x. Setting it to twice the source gives the coupling dt J x_source
+        states_old = list(solver.state_old.subfunctions)
+        states_old[self.strong_index] = 2*source
+
+        A_operator = operators.operator_implicit_midpoint(time_step, tests, trials)
+        b_functional = operators.functional_implicit_midpoint(time_step, tests, states_old, \
+                                                              control=solver.natural_bcs)
+
+        _F = fdrk.Tensor(b_functional)
+        if solver.load is not None:
+            _F = _F + fdrk.AssembledVector(solver.load)
+
+        A_blocks = fdrk.Tensor(A_operator).blocks
+        F_blocks = _F.blocks
+
+        A_local_inverse = A_blocks[local_indices, local_indices].inv
+        A_local_global = A_blocks[local_indices, n_block_loc]
+        A_global_local = A_blocks[n_block_loc, local_indices]
+
+        global_operator = A_blocks[n_block_loc, n_block_loc] - A_global_local * A_local_inverse * A_local_global
+        global_functional = F_blocks[n_block_loc] - A_global_local * A_local_inverse * F_blocks[local_indices]
+
+        state_new = solver.state_new
+        self.global_multiplier = fdrk.Function(operators.space_global, val=state_new.dat[n_block_loc])
+        self.global_system = AssembledLinearSystem(global_operator, global_functional, self.global_multiplier, \
+                                                   bcs=solver.essential_bcs, \
+                                                   solver_parameters=solver.solver_parameters, \
+                                                   recycle_size=solver.recycle_size, \
+                                                   extrapolate_guess=solver.extrapolate_guess)
+
+        space_local = fdrk.MixedFunctionSpace([operators.mixedspace_local.sub(index).collapse() \
+                                               for index in local_indices])
+        self.local_solution = fdrk.Function(space_local, \
+                                            val=op2.MixedDat([state_new.dat[index] for index in local_indices]))
+        self.local_recovery = A_local_inverse * (F_blocks[local_indices] - A_local_global \
+                                                 * fdrk.AssembledVector(self.global_multiplier))
+
+        # Strong equation: M x_new = M x_old + dt J x_midpoint, J only involves the field with the weak equation
+        states_midpoint = [0.5*(field_old + field_new) for field_old, field_new \
+                           in zip(solver.state_old.subfunctions, state_new.subfunctions)]
+        mass_functional, _ = operators.dynamics(tests, solver.state_old.subfunctions)
+        _, dynamics_functional = operators.dynamics(tests, states_midpoint)
+        mass_operator, _ = operators.dynamics(tests, trials)
+
+        _F_strong = fdrk.Tensor(mass_functional + time_step * dynamics_functional)
+        if solver.load is not None:
+            _F_strong = _F_strong + fdrk.AssembledVector(solver.load)
+
+        self.strong_update = fdrk.Tensor(mass_operator).blocks[self.strong_index, self.strong_index].inv \
+                            * _F_strong.blocks[self.strong_index]
+        self.strong_solution = fdrk.Function(operators.fullspace.sub(self.strong_index).collapse(), \
+                                             val=state_new.dat[self.strong_index])
+
+
+    def invalidate(self):
+        self.global_system.invalidate()
+
+
+    def solve(self, prepare=True):
+        """
+        Parameters:
+            prepare (bool) : if False the boundary data and the loads of the solver
+                are assumed to be already updated
+        """
+        if prepare:
+            self.solver._prepare_step()
+
+        self.global_system.solve()
+        self.recover()
+
+
+    def recover(self):
+        """
+        Local recovery of the field with the weak equation and cell by cell update
+        of the field with the strong equation, after the global solve
+        """
+        fdrk.assemble(self.local_recovery, tensor=self.local_solution)
+        fdrk.assemble(self.strong_update, tensor=self.strong_solution)
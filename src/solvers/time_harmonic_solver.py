@@ -0,0 +1,245 @@
+import firedrake as fdrk
+from src.problems.problem import Problem
+from src.operators.maxwell_operators import MaxwellOperators
+from src.operators.wave_operators import WaveOperators
+from .linear_system import AssembledLinearSystem
+from .boundary_conditions import EssentialBoundaryConditions
+from firedrake.petsc import PETSc
+from pyop2 import op2
+import numpy as np
+
+
+class TimeHarmonicSolver:
+    def __init__(self,
+                 problem: Problem,
+                 system,
+                 frequency,
+                 pol_degree=1,
+                 discretization="hybrid",
+                 formulation="primal",
+                 solver_parameters={},
+                 n_quadrature=64,
+                 verbose=False
+                ):
+        """
+        Periodic response x(t) = x_c cos(w t) + x_s sin(w t) of M dx/dt = J x + f to
+        data of frequency w, i.e. the real split of (i w M - J) x^ = f^
+            w M x_s - J x_c = f_c,    - w M x_c - J x_s = f_s
+        The cosine and sine components of the data are obtained by the harmonic projection
+        of the time functions of the separable data of the problem (the other frequencies,
+        e.g. constant terms, are discarded). In the hybrid discretization the system is
+        statically condensed on the traces of both components
+        Parameters:
+            problem (Problem) : a problem instance with separable data
+            system (string) : "Wave" or "Maxwell"
+            frequency (float) : angular frequency w
+            pol_degree (int) : integer for the polynomial degree of the finite elements
+            discretization (string) : "hybrid" or "mixed"
+            formulation (string) :  "primal" or "dual"
+            solver_parameters (dictionary) : PETSc options of the (trace) system
+            n_quadrature (int) : number of points of the harmonic projection over a period
+        """
+        if problem.get_separable_boundary_conditions() is None:
+            raise ValueError(f"The problem {str(problem)} does not provide separable data")
+
+        self.problem = problem
+        self.pol_degree = pol_degree
+        self.solver_parameters = solver_parameters
+        self.frequency = frequency
+        self.frequency_constant = fdrk.Constant(frequency)
+        self.n_quadrature = n_quadrature
+        self.verbose = verbose
+
+        if system=="Maxwell":
+            self.operators = MaxwellOperators(discretization, formulation, problem, pol_degree)
+        elif system=="Wave":
+            self.operators = WaveOperators(discretization, formulation, problem, pol_degree)
+        else:
+            raise ValueError(f"System type {system} is not a valid option")
+
+        # Harmonic coefficients (cosine, sine) of each separable term, updated by set_frequency
+        self.list_time_functions = []
+        self.list_harmonic_coefficients = []
+
+        self._set_spaces()
+        self._set_boundary_conditions()
+        self._set_solver()
+        self._update_harmonic_coefficients()
+
+
+    def _set_spaces(self):
+        self.space_operators = self.operators.fullspace
+        self.n_fields = len(self.space_operators)
+
+        # Cosine and sine components
+        self.harmonic_space = fdrk.MixedFunctionSpace([space for _ in range(2) for space in self.space_operators])
+        self.harmonic_solution = fdrk.Function(self.harmonic_space)
+        self.state = fdrk.Function(self.space_operators)
+
+        harmonic_tests = fdrk.TestFunctions(self.harmonic_space)
+        harmonic_trials = fdrk.TrialFunctions(self.harmonic_space)
+        self.harmonic_tests = [harmonic_tests[ii*self.n_fields:(ii+1)*self.n_fields] for ii in range(2)]
+        self.harmonic_trials = [harmonic_trials[ii*self.n_fields:(ii+1)*self.n_fields] for ii in range(2)]
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Dimension of harmonic space: {self.harmonic_space.dim()} ")
+
+
+    def _harmonic_components(self, list_separable_terms):
+        """
+        Cosine and sine components sum_k a_k g_k, sum_k b_k g_k of separable data sum_k g_k f_k(t).
+        Returns None if there are no terms
+        """
+        if not list_separable_terms:
+            return None
+
+        list_components = [0, 0]
+        for spatial_term, time_function in list_separable_terms:
+            coefficients = (fdrk.Constant(0), fdrk.Constant(0))
+            self.list_time_functions.append(time_function)
+            self.list_harmonic_coefficients.append(coefficients)
+
+            for ii in range(2):
+                list_components[ii] = list_components[ii] + coefficients[ii]*spatial_term
+
+        return list_components
+
+
+    def _update_harmonic_coefficients(self):
+        """
+        Harmonic projection a = 2/T int_T f cos(w t) dt, b = 2/T int_T f sin(w t) dt
+        (exact for trigonometric polynomials of degree lower than n_quadrature)
+        """
+        times = 2*np.pi/self.frequency * np.arange(self.n_quadrature)/self.n_quadrature
+        cosine, sine = np.cos(self.frequency*times), np.sin(self.frequency*times)
+
+        for time_function, coefficients in zip(self.list_time_functions, self.list_harmonic_coefficients):
+            values = np.array([time_function(time) for time in times])
+            coefficients[0].assign(2*np.mean(values*cosine))
+            coefficients[1].assign(2*np.mean(values*sine))
+
+        for bc_evaluator in self.list_bc_evaluators:
+            bc_evaluator.update()
+
+
+    def _set_boundary_conditions(self):
+        dict_essential_bcs = self.operators.essential_boundary_conditions(self.problem, time=None, separable=True)
+        value_components = self._harmonic_components(dict_essential_bcs["value"])
+
+        if self.operators.discretization=="hybrid":
+            n_block_loc = self.operators.mixedspace_local.num_sub_spaces()
+            self.global_indices = [ii*self.n_fields + n_block_loc for ii in range(2)]
+            self.local_indices = [ii*self.n_fields + kk for ii in range(2) for kk in range(n_block_loc)]
+            self.global_space = fdrk.MixedFunctionSpace([self.operators.space_global]*2)
+            list_space_bc = [self.global_space.sub(ii) for ii in range(2)]
+        else:
+            index_bc = dict_essential_bcs["space"].index
+            list_space_bc = [self.harmonic_space.sub(ii*self.n_fields + index_bc) for ii in range(2)]
+
+        projection_bc = self.operators.discretization=="hybrid" and \
+                        "quadrilateral" in self.operators.cell_name and self.pol_degree>1
+
+        self.list_bc_evaluators = []
+        if value_components is not None:
+            for value_bc, space_bc in zip(value_components, list_space_bc):
+                self.list_bc_evaluators.append(EssentialBoundaryConditions(self.operators, space_bc, value_bc, \
+                                                                           dict_essential_bcs["list_id"], \
+                                                                           projection=projection_bc))
+        self.essential_bcs = [bc for bc_evaluator in self.list_bc_evaluators for bc in bc_evaluator.bcs]
+
+        self.natural_bcs = self._harmonic_components(self.operators.natural_boundary_conditions(self.problem, \
+                                                                                    time=None, separable=True))
+        if self.verbose:
+            PETSc.Sys.Print(f"Boundary conditions set")
+
+
+    def _set_solver(self):
+        (tests_cos, tests_sin), (trials_cos, trials_sin) = self.harmonic_tests, self.harmonic_trials
+
+        mass_cos_sin, _ = self.operators.dynamics(tests_cos, trials_sin)
+        _, dynamics_cos_cos = self.operators.dynamics(tests_cos, trials_cos)
+        mass_sin_cos, _ = self.operators.dynamics(tests_sin, trials_cos)
+        _, dynamics_sin_sin = self.operators.dynamics(tests_sin, trials_sin)
+
+        A_operator = self.frequency_constant*mass_cos_sin - dynamics_cos_cos \
+                    - self.frequency_constant*mass_sin_cos - dynamics_sin_sin
+
+        b_functional = 0
+        if self.natural_bcs is not None:
+            for tests, natural_bc in zip(self.harmonic_tests, self.natural_bcs):
+                b_functional += self.operators.control(tests, natural_bc)
+
+        separable_forcing = self.problem.get_separable_forcing()
+        if self.problem.forcing and separable_forcing is not None:
+            for counter, list_forcing_terms in enumerate(separable_forcing):
+                forcing_components = self._harmonic_components(list_forcing_terms)
+                if forcing_components is None:
+                    continue
+                for tests, force in zip(self.harmonic_tests, forcing_components):
+                    b_functional += fdrk.inner(tests[counter], force)*fdrk.dx
+
+        if isinstance(b_functional, int):
+            raise ValueError("The problem has no periodic data")
+
+        if self.operators.discretization=="mixed":
+            self.linear_system = AssembledLinearSystem(A_operator, b_functional, self.harmonic_solution, \
+                                                       bcs=self.essential_bcs, \
+                                                       solver_parameters=self.solver_parameters)
+        else:
+            A_blocks = fdrk.Tensor(A_operator).blocks
+            F_blocks = fdrk.Tensor(b_functional).blocks
+
+            A_local_inverse = A_blocks[self.local_indices, self.local_indices].inv
+            A_local_global = A_blocks[self.local_indices, self.global_indices]
+            A_global_local = A_blocks[self.global_indices, self.local_indices]
+
+            global_operator = A_blocks[self.global_indices, self.global_indices] \
+                            - A_global_local * A_local_inverse * A_local_global
+            global_functional = F_blocks[self.global_indices] \
+                            - A_global_local * A_local_inverse * F_blocks[self.local_indices]
+
+            # The global and local solutions share the memory of the harmonic solution
+            self.global_multiplier = fdrk.Function(self.global_space, \
+                                    val=op2.MixedDat([self.harmonic_solution.dat[index] for index in self.global_indices]))
+            local_space = fdrk.MixedFunctionSpace([self.harmonic_space.sub(index).collapse() \
+                                                   for index in self.local_indices])
+            self.local_solution = fdrk.Function(local_space, \
+                                    val=op2.MixedDat([self.harmonic_solution.dat[index] for index in self.local_indices]))
+
+            self.linear_system = AssembledLinearSystem(global_operator, global_functional, self.global_multiplier, \
+                                                       bcs=self.essential_bcs, \
+                                                       solver_parameters=self.solver_parameters)
+            self.local_recovery = A_local_inverse * (F_blocks[self.local_indices] - A_local_global \
+                                                    * fdrk.AssembledVector(self.global_multiplier))
+
+        if self.verbose:
+            PETSc.Sys.Print(f"Time harmonic solver set")
+
+
+    def set_frequency(self, frequency):
+        """
+        Retargets the solver to a new frequency: the data are projected again and the operator
+        is reassembled at the next solve
+        """
+        self.frequency = frequency
+        self.frequency_constant.assign(frequency)
+        self._update_harmonic_coefficients()
+        self.linear_system.invalidate()
+
+
+    def solve(self):
+        self.linear_system.solve()
+
+        if self.operators.discretization=="hybrid":
+            fdrk.assemble(self.local_recovery, tensor=self.local_solution)
+
+
+    def solution_at(self, time):
+        """
+        Periodic solution x_c cos(w t) + x_s sin(w t) at a given (float) time, stored in state
+        """
+        cosine, sine = np.cos(self.frequency*time), np.sin(self.frequency*time)
+        for kk in range(self.n_fields):
+            self.state.dat[kk].data[:] = cosine * self.harmonic_solution.dat[kk].data_ro \
+                                        + sine * self.harmonic_solution.dat[self.n_fields + kk].data_ro
+        return self.state
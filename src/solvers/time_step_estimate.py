@@ -0,0 +1,141 @@
+import firedrake as fdrk
+from firedrake.petsc import PETSc
+from src.problems.problem import Problem
+from src.operators.maxwell_operators import MaxwellOperators
+from src.operators.wave_operators import WaveOperators
+import numpy as np
+
+try:
+    from slepc4py import SLEPc
+except ImportError:
+    SLEPc = None
+
+
+# Estimates of the largest frequency, per problem (mesh and coefficients), system, formulation and degree
+_max_frequency_cache = {}
+
+
+def estimate_max_frequency(problem: Problem, system, pol_degree=1, formulation="primal", \
+                           n_iterations=100, tol=1e-6, use_slepc=True):
+    """
+    Largest frequency omega_max of the semi-discrete system M dx/dt = J x, i.e. the largest
+    modulus of the eigenvalues i omega of the pencil (J, M). The hybrid discretization is
+    equivalent to the mixed one, so that the pencil of the mixed operators is used (the hybrid
+    mass matrix is singular on the traces). The essential boundary conditions are not imposed,
+    which gives an upper bound of the constrained frequency.
+    The estimate uses SLEPc if available, otherwise a power iteration on (M^{-1} J)^2.
+    The result is cached
+    Parameters:
+        problem (Problem) : a problem instance
+        system (string) : "Wave" or "Maxwell"
+        pol_degree (int) : integer for the polynomial degree of the finite elements
+        formulation (string) : "primal" or "dual"
+        n_iterations (int) : maximum number of iterations
+        tol (float) : relative tolerance on the frequency
+        use_slepc (bool) : if False the power iteration is used even if SLEPc is available
+    """
+    key = (problem, system, formulation, pol_degree)
+    if key in _max_frequency_cache:
+        return _max_frequency_cache[key]
+
+    if system=="Maxwell":
+        operators = MaxwellOperators("mixed", formulation, problem, pol_degree)
+    elif system=="Wave":
+        operators = WaveOperators("mixed", formulation, problem, pol_degree)
+    else:
+        raise ValueError(f"System type {system} is not a valid option")
+
+    tests = fdrk.TestFunctions(operators.fullspace)
+    trials = fdrk.TrialFunctions(operators.fullspace)
+    mass_operator, dynamics_operator = operators.dynamics(tests, trials)
+
+    mass_matrix = fdrk.assemble(mass_operator, mat_type="aij").petscmat
+    dynamics_matrix = fdrk.assemble(dynamics_operator, mat_type="aij").petscmat
+
+    if use_slepc and SLEPc is not None:
+        max_frequency = _max_frequency_slepc(mass_matrix, dynamics_matrix, n_iterations, tol)
+    else:
+        max_frequency = _max_frequency_power(mass_matrix, dynamics_matrix, n_iterations, tol)
+
+    _max_frequency_cache[key] = max_frequency
+    return max_frequency
+
+
+def _mass_solver(mass_matrix):
+    ksp = PETSc.KSP().create(comm=mass_matrix.getComm())
+    ksp.setOperators(mass_matrix)
+    ksp.setType("cg")
+    ksp.getPC().setType("jacobi")
+    ksp.setTolerances(rtol=1e-10)
+    return ksp
+
+
+def _max_frequency_power(mass_matrix, dynamics_matrix, n_iterations, tol):
+    """
+    Power iteration on A^2, A = M^{-1} J. The eigenvalues of A^2 are -omega^2,
+    omega_max is estimated by the M-norm ratio |A x|_M / |x|_M
+    """
+    ksp = _mass_solver(mass_matrix)
+
+    iterate, mass_iterate = mass_matrix.createVecs()
+    rhs, a_iterate = mass_matrix.createVecs()
+    iterate.setRandom()
+
+    max_frequency = 0
+    for _ in range(n_iterations):
+        mass_matrix.mult(iterate, mass_iterate)
+        iterate.scale(1/np.sqrt(iterate.dot(mass_iterate)))
+
+        # A x and its M-norm, A is skew-adjoint in the M inner product
+        dynamics_matrix.mult(iterate, rhs)
+        ksp.solve(rhs, a_iterate)
+        new_frequency = np.sqrt(abs(a_iterate.dot(rhs)))
+
+        # A^2 x = A (A x)
+        dynamics_matrix.mult(a_iterate, rhs)
+        ksp.solve(rhs, iterate)
+
+        converged = abs(new_frequency - max_frequency) < tol*new_frequency
+        max_frequency = new_frequency
+        if converged:
+            break
+
+    return max_frequency
+
+
+def _max_frequency_slepc(mass_matrix, dynamics_matrix, n_iterations, tol):
+    eps = SLEPc.EPS().create(comm=mass_matrix.getComm())
+    eps.setOperators(dynamics_matrix, mass_matrix)
+    eps.setProblemType(SLEPc.EPS.ProblemType.GNHEP)
+    eps.setWhichEigenpairs(SLEPc.EPS.Which.LARGEST_MAGNITUDE)
+    eps.setDimensions(nev=1)
+    eps.setTolerances(tol=tol, max_it=n_iterations)
+    eps.solve()
+
+    if eps.getConverged() < 1:
+        raise RuntimeError("The estimate of the largest frequency did not converge")
+    return abs(eps.getEigenvalue(0))
+
+
+def max_stable_time_step(problem: Problem, system, pol_degree=1, formulation="primal", safety=0.9, **kwargs):
+    """
+    Largest time step of the explicit (Stormer-Verlet) time integrator, dt < 2/omega_max,
+    reduced by a safety factor
+    Parameters:
+        safety (float) : safety factor in (0, 1]
+        kwargs : options of estimate_max_frequency
+    """
+    max_frequency = estimate_max_frequency(problem, system, pol_degree=pol_degree, \
+                                           formulation=formulation, **kwargs)
+    return 2*safety/max_frequency
+
+
+def resolution_indicator(problem: Problem, system, time_step, pol_degree=1, formulation="primal", **kwargs):
+    """
+    Phase omega_max dt of the fastest resolved mode in one time step. The implicit midpoint
+    is stable for any time step, values much larger than one mean that the highest frequencies
+    of the spatial discretization are not resolved in time
+    """
+    max_frequency = estimate_max_frequency(problem, system, pol_degree=pol_degree, \
+                                           formulation=formulation, **kwargs)
+    return max_frequency*time_step
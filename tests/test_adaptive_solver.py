@@ -0,0 +1,46 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.adaptive_solver import AdaptiveTimeStepper
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+system = "Wave"
+final_time = 0.1
+
+adaptive_stepper = AdaptiveTimeStepper(problem_wave, system, time_step=0.05, tol=1e-4, \
+                                       pol_degree=pol_degree, discretization="hybrid")
+adaptive_stepper.integrate_until(final_time)
+
+statistics = adaptive_stepper.statistics()
+assert abs(adaptive_stepper.time - final_time) < 1e-12
+assert statistics["accepted"] > 0
+# The operators are rebuilt only when the time step changes
+assert adaptive_stepper.full_solver.linear_solver_statistics()["factorizations"] <= statistics["rebuilds"] + 1
+
+reference_solver = HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                         time_step=final_time/100, \
+                                         discretization="hybrid", \
+                                         system=system)
+reference_solver.integrate_n(100)
+
+tol = 1e-3
+for reference_field, field in zip(reference_solver.state_old.subfunctions[:2], \
+                                  adaptive_stepper.state.subfunctions[:2]):
+    assert fdrk.errornorm(reference_field, field) < tol
+
+# A step much larger than the tolerance allows is rejected and repeated with a smaller time step
+initial_time_step = 0.1
+rejecting_stepper = AdaptiveTimeStepper(problem_wave, system, time_step=initial_time_step, tol=1e-7, \
+                                        pol_degree=pol_degree, discretization="hybrid")
+assert not rejecting_stepper.step()
+assert rejecting_stepper.time == 0
+assert rejecting_stepper.time_step <= (1 - rejecting_stepper.rebuild_threshold)*initial_time_step
+
+rejecting_stepper.integrate_until(final_time)
+statistics = rejecting_stepper.statistics()
+assert abs(rejecting_stepper.time - final_time) < 1e-12
+assert statistics["rejected"] > 0
@@ -0,0 +1,34 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+
+# Run with mpiexec -n N to have N subdomains
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+n_time_iter = 5
+
+system = "Wave"
+
+tol = 1e-7
+for formulation in ["primal", "dual"]:
+    list_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                          time_step=time_step, \
+                                          discretization="hybrid", \
+                                          formulation=formulation, \
+                                          system=system, \
+                                          solver_parameters=profile, \
+                                          constant_operator=True) for profile in ["direct", "bddc"]]
+
+    for solver in list_solvers:
+        solver.integrate_n(n_time_iter)
+
+    direct_solver, bddc_solver = list_solvers
+    assert bddc_solver.linear_system().free_matrix.getType() == "is"
+
+    for direct_field, bddc_field in zip(direct_solver.state_old.subfunctions[:2], \
+                                        bddc_solver.state_old.subfunctions[:2]):
+        assert fdrk.errornorm(direct_field, bddc_field) < tol
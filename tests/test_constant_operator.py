@@ -0,0 +1,82 @@
+import math
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+import numpy as np
+from tqdm import tqdm
+
+n_elements = 3
+pol_degree = 2
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+t_end = 10*time_step
+
+n_time_iter = math.ceil(t_end/time_step)
+
+system = "Wave"
+
+dict_options = {"hybrid": [(False, False, False), (True, False, False), (False, True, False), \
+                           (True, True, False), (True, True, True)], 
+                "mixed": [(False, False, False), (True, False, False), (True, False, True)]}
+
+dict_solvers = {}
+for discretization, list_options in dict_options.items():
+    for formulation in ["primal", "dual"]:
+        dict_solvers[(discretization, formulation)] = \
+            [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                    time_step=time_step, \
+                                    discretization=discretization, \
+                                    formulation=formulation, \
+                                    system=system, \
+                                    constant_operator=constant_operator, \
+                                    cache_local_inverse=cache_local_inverse, \
+                                    matrix_rhs=matrix_rhs) \
+            for constant_operator, cache_local_inverse, matrix_rhs in list_options]
+
+tol = 1e-9
+for ii in tqdm(range(n_time_iter)):
+
+    for key, (reference_solver, *list_other_solvers) in dict_solvers.items():
+        reference_solver.integrate()
+
+        for other_solver in list_other_solvers:
+            other_solver.integrate()
+
+            for reference_field, other_field in zip(reference_solver.state_new.subfunctions, \
+                                                    other_solver.state_new.subfunctions):
+                assert np.max(np.abs(reference_field.dat.data_ro - other_field.dat.data_ro)) < tol
+
+            other_solver.update_variables()
+
+        reference_solver.update_variables()
+
+# Cached local inverses on an extruded mesh (cells of all the layers)
+problem_extruded = AnalyticalWave(2, 2, 2, dim=3, quad=True, bc_type="mixed")
+for formulation in ["primal", "dual"]:
+    reference_solver, cached_solver = [HamiltonianWaveSolver(problem = problem_extruded, pol_degree=1, \
+                                                             time_step=time_step, \
+                                                             discretization="hybrid", \
+                                                             formulation=formulation, \
+                                                             system=system, \
+                                                             constant_operator=True, \
+                                                             cache_local_inverse=cache_local_inverse) \
+                                       for cache_local_inverse in [False, True]]
+    for ii in range(3):
+        for solver in [reference_solver, cached_solver]:
+            solver.integrate()
+
+        for reference_field, cached_field in zip(reference_solver.state_new.subfunctions, \
+                                                 cached_solver.state_new.subfunctions):
+            assert np.max(np.abs(reference_field.dat.data_ro - cached_field.dat.data_ro)) < tol
+
+        for solver in [reference_solver, cached_solver]:
+            solver.update_variables()
+
+# The cache of the local inverses is only defined for the hybrid discretization
+try:
+    HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, time_step=time_step, \
+                          discretization="mixed", system=system, cache_local_inverse=True)
+    raise AssertionError("The mixed discretization accepted cache_local_inverse")
+except ValueError:
+    pass
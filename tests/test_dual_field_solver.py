@@ -0,0 +1,50 @@
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+from src.solvers.dual_field_solver import DualFieldSolver
+import numpy as np
+
+n_elements = 3
+pol_degree = 2
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed", manufactured=True)
+
+time_step = 0.01
+n_time_iter = 10
+
+system = "Wave"
+
+tol = 1e-9
+for discretization in ["hybrid", "mixed"]:
+    dual_field_solver = DualFieldSolver(problem_wave, system, time_step, pol_degree=pol_degree, \
+                                        discretization=discretization, \
+                                        block_solve=True, direct_solver="mumps")
+
+    list_reference_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                                    time_step=time_step, \
+                                                    discretization=discretization, \
+                                                    formulation=formulation, \
+                                                    system=system) for formulation in ["primal", "dual"]]
+    
+    for ii in range(n_time_iter):
+        dual_field_solver.integrate()
+
+        for reference_solver, solver in zip(list_reference_solvers, dual_field_solver.solvers):
+            reference_solver.integrate()
+
+            for reference_field, field in zip(reference_solver.state_new.subfunctions, \
+                                              solver.state_new.subfunctions):
+                assert np.max(np.abs(reference_field.dat.data_ro - field.dat.data_ro)) < tol
+
+            reference_solver.update_variables()
+
+        dual_field_solver.update_variables()
+
+    assert abs(float(dual_field_solver.time_old) - n_time_iter*time_step) < 1e-12
+
+    # The block solve is counted in the statistics of both formulations, 
+    # the subsystems do not set up a KSP of their own
+    for solver in dual_field_solver.solvers:
+        statistics = solver.linear_solver_statistics()
+        assert statistics["solves"] == n_time_iter
+        assert statistics["iterations"] >= n_time_iter
+        assert solver.linear_system().ksp is None
@@ -0,0 +1,71 @@
+import firedrake as fdrk
+import numpy as np
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.gauss_legendre_solver import GaussLegendreSolver, gauss_legendre_tableau
+from src.solvers.time_step_estimate import max_stable_time_step
+
+# Order conditions of the tableau: sum_j b_j c_j^(k-1) = 1/k up to the order 2s
+for n_stages in [1, 2, 3]:
+    a_matrix, b_weights, c_nodes = gauss_legendre_tableau(n_stages)
+    assert np.allclose(a_matrix.sum(axis=1), c_nodes)
+    for power in range(1, 2*n_stages + 1):
+        assert abs(np.dot(b_weights, c_nodes**(power-1)) - 1/power) < 1e-12
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+n_time_iter = 5
+
+system = "Wave"
+
+# The hybrid and mixed discretizations are equivalent
+tol = 1e-9
+for formulation in ["primal", "dual"]:
+    list_solvers = [GaussLegendreSolver(problem_wave, system, time_step, n_stages=2, pol_degree=pol_degree, \
+                                        discretization=discretization, formulation=formulation) \
+                    for discretization in ["mixed", "hybrid"]]
+
+    for solver in list_solvers:
+        solver.integrate_n(n_time_iter)
+
+    mixed_solver, hybrid_solver = list_solvers
+    for mixed_field, hybrid_field in zip(mixed_solver.state_old.subfunctions, \
+                                         hybrid_solver.state_old.subfunctions[:2]):
+        assert fdrk.errornorm(mixed_field, hybrid_field) < tol
+
+    assert hybrid_solver.linear_solver_statistics()["factorizations"] == 1
+
+
+# Order 2s in time on the manufactured solution. As for the other integrators the time error is
+# measured against the semi-discrete solution (three stages with a much smaller time step), with 
+# time steps below the CFL limit so that all the discrete modes are in the asymptotic regime, with
+# errors well above the round off of the high order schemes
+problem_manufactured = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed", manufactured=True)
+
+def fields_error(reference_solver, solver):
+    return np.sqrt(sum(fdrk.errornorm(reference_field, field)**2 for reference_field, field \
+                       in zip(reference_solver.state_old.subfunctions[:2], solver.state_old.subfunctions[:2])))
+
+
+final_time = 0.2
+for formulation in ["primal", "dual"]:
+    time_step_stable = max_stable_time_step(problem_manufactured, system, pol_degree=pol_degree, \
+                                            formulation=formulation)
+    n_time_iter = int(np.ceil(final_time/(0.3*time_step_stable)))
+
+    reference_solver = GaussLegendreSolver(problem_manufactured, system, final_time/(8*n_time_iter), n_stages=3, \
+                                           pol_degree=pol_degree, formulation=formulation)
+    reference_solver.integrate_n(8*n_time_iter)
+
+    for n_stages in [2, 3]:
+        list_errors = []
+        for refinement in [1, 2]:
+            solver = GaussLegendreSolver(problem_manufactured, system, final_time/(refinement*n_time_iter), \
+                                         n_stages=n_stages, pol_degree=pol_degree, formulation=formulation)
+            solver.integrate_n(refinement*n_time_iter)
+            list_errors.append(fields_error(reference_solver, solver))
+
+        assert np.log2(list_errors[0]/list_errors[1]) > 2*n_stages - 0.5
@@ -0,0 +1,45 @@
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+import numpy as np
+
+n_elements = 3
+pol_degree = 2
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed", manufactured=True)
+
+time_step = 0.01
+n_time_iter = 10
+callback_every = 5
+
+system = "Wave"
+
+tol = 1e-12
+for discretization in ["hybrid", "mixed"]:
+    for formulation in ["primal", "dual"]:
+        loop_solver, multistep_solver = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                                            time_step=time_step, \
+                                                            discretization=discretization, \
+                                                            formulation=formulation, \
+                                                            system=system) for _ in range(2)]
+        
+        list_loop_states = []
+        for ii in range(1, n_time_iter+1):
+            loop_solver.integrate()
+            loop_solver.update_variables()
+            if ii % callback_every == 0:
+                list_loop_states.append((loop_solver.state_old.copy(deepcopy=True), \
+                                         loop_solver.state_midpoint.copy(deepcopy=True)))
+
+        list_multistep_states = []
+        def save_states(solver, step):
+            list_multistep_states.append((solver.state_old.copy(deepcopy=True), \
+                                          solver.state_midpoint.copy(deepcopy=True)))
+            assert abs(float(solver.time_old) - step*time_step) < tol
+
+        multistep_solver.integrate_n(n_time_iter, callback=save_states, callback_every=callback_every)
+
+        assert len(list_multistep_states) == n_time_iter // callback_every
+        for loop_states, multistep_states in zip(list_loop_states, list_multistep_states):
+            for loop_state, multistep_state in zip(loop_states, multistep_states):
+                for loop_field, multistep_field in zip(loop_state.subfunctions, multistep_state.subfunctions):
+                    assert np.max(np.abs(loop_field.dat.data_ro - multistep_field.dat.data_ro)) < tol
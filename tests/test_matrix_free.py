@@ -0,0 +1,58 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.problems.analytical_maxwell import AnalyticalMaxwell
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+
+n_elements = 4
+pol_degree = 2
+
+time_step = 0.01
+n_time_iter = 5
+
+tol = 1e-7
+for system, problem in [("Wave", AnalyticalWave(n_elements, n_elements, n_elements, dim=3, bc_type="mixed")),
+                        ("Maxwell", AnalyticalMaxwell(n_elements, n_elements, n_elements, bc_type="mixed"))]:
+    for formulation in ["primal", "dual"]:
+        list_solvers = [HamiltonianWaveSolver(problem = problem, pol_degree=pol_degree, \
+                                              time_step=time_step, \
+                                              discretization="hybrid", \
+                                              formulation=formulation, \
+                                              system=system, \
+                                              solver_parameters=profile, \
+                                              constant_operator=True) for profile in ["direct", "matfree"]]
+
+        for solver in list_solvers:
+            solver.integrate_n(n_time_iter)
+
+        direct_solver, matfree_solver = list_solvers
+        assert matfree_solver.linear_system().matrix.getType() == "python"
+
+        # Change of time step: the shell operator reads the new time step
+        for solver in list_solvers:
+            solver.set_time_step(time_step/2)
+            solver.integrate_n(n_time_iter)
+
+        for direct_field, matfree_field in zip(direct_solver.state_old.subfunctions[:2], \
+                                               matfree_solver.state_old.subfunctions[:2]):
+            assert fdrk.errornorm(direct_field, matfree_field) < tol
+
+# Mixed discretization, matrix-free with the Schur complement of the broken field
+for system, problem in [("Wave", AnalyticalWave(n_elements, n_elements, n_elements, dim=3, bc_type="mixed")),
+                        ("Maxwell", AnalyticalMaxwell(n_elements, n_elements, n_elements, bc_type="mixed"))]:
+    for formulation in ["primal", "dual"]:
+        list_solvers = [HamiltonianWaveSolver(problem = problem, pol_degree=pol_degree, \
+                                              time_step=time_step, \
+                                              discretization="mixed", \
+                                              formulation=formulation, \
+                                              system=system, \
+                                              solver_parameters=profile) for profile in ["direct", "matfree"]]
+
+        for solver in list_solvers:
+            solver.integrate_n(n_time_iter)
+
+        direct_solver, matfree_solver = list_solvers
+        assert matfree_solver.linear_system().snes.ksp.getOperators()[0].getType() == "python"
+
+        for direct_field, matfree_field in zip(direct_solver.state_old.subfunctions, \
+                                               matfree_solver.state_old.subfunctions):
+            assert fdrk.errornorm(direct_field, matfree_field) < tol
@@ -0,0 +1,86 @@
+import firedrake as fdrk
+import numpy as np
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+from src.solvers.modal_solver import ModalSolver, SLEPc
+
+n_elements = 4
+pol_degree = 1
+system = "Wave"
+
+if SLEPc is not None:
+    problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="dirichlet", homogeneous=True)
+
+    n_modes = 20
+    modal_solver = ModalSolver(problem_wave, system, n_modes, pol_degree=pol_degree)
+
+    assert len(modal_solver.frequencies) == n_modes
+    assert np.all(modal_solver.frequencies > 0)
+
+    # At time zero the initial condition is recovered
+    state_zero = modal_solver.solution_at(0)
+    for field_initial, field in zip(modal_solver.state_initial.subfunctions, state_zero.subfunctions):
+        assert fdrk.errornorm(field_initial, field) < 1e-12
+
+    # Energy of the initial condition not represented by the modes (kept constant in time)
+    energy_initial = fdrk.assemble(sum(fdrk.inner(field, field)*fdrk.dx \
+                                       for field in modal_solver.state_initial.subfunctions))
+    energy_modes = np.sum(np.abs(modal_solver.initial_coefficients)**2)
+    truncation = np.sqrt(max(energy_initial - energy_modes, 0))
+
+    # Same semi-discrete system integrated with a small time step
+    final_time = 0.2
+    n_time_iter = 200
+    reference_solver = HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                             time_step=final_time/n_time_iter, \
+                                             discretization="mixed", \
+                                             formulation="primal", \
+                                             system=system)
+    reference_solver.integrate_n(n_time_iter)
+
+    state_final = modal_solver.solution_at(final_time)
+    tol = 2*truncation + 1e-4
+    error = np.sqrt(sum(fdrk.errornorm(reference_field, field)**2 for reference_field, field \
+                        in zip(reference_solver.state_old.subfunctions, state_final.subfunctions)))
+    assert error < tol
+
+    # Inhomogeneous separable boundary conditions and forcing, with all the modes the modal 
+    # solution is the semi-discrete one: the error of implicit midpoint decreases with order 2
+    problem_data = AnalyticalWave(2, 2, 2, dim=2, bc_type="mixed", manufactured=True)
+    n_modes_data = fdrk.FunctionSpace(problem_data.domain, "DG", pol_degree-1).dim()
+    modal_solver_data = ModalSolver(problem_data, system, n_modes_data, pol_degree=pol_degree)
+
+    state_zero = modal_solver_data.solution_at(0)
+    for field_initial, field in zip(modal_solver_data.state_initial.subfunctions, state_zero.subfunctions):
+        assert fdrk.errornorm(field_initial, field) < 1e-10
+
+    final_time = 0.1
+    state_final = modal_solver_data.solution_at(final_time)
+    norm_final = np.sqrt(sum(fdrk.norm(field)**2 for field in state_final.subfunctions))
+
+    list_errors = []
+    for n_time_iter in [50, 100]:
+        reference_solver = HamiltonianWaveSolver(problem = problem_data, pol_degree=pol_degree, \
+                                                 time_step=final_time/n_time_iter, \
+                                                 discretization="mixed", \
+                                                 formulation="primal", \
+                                                 system=system, \
+                                                 constant_operator=True)
+        reference_solver.integrate_n(n_time_iter)
+
+        list_errors.append(np.sqrt(sum(fdrk.errornorm(reference_field, field)**2 for reference_field, field \
+                                       in zip(reference_solver.state_old.subfunctions, state_final.subfunctions))))
+
+    assert list_errors[-1] < 1e-3*norm_final
+    assert list_errors[0]/list_errors[-1] > 3
+
+    # The data must be separable
+    class NonSeparableWave(AnalyticalWave):
+        def get_separable_boundary_conditions(self):
+            return None
+
+    try:
+        ModalSolver(NonSeparableWave(2, 2, 2, dim=2, bc_type="mixed"), system, 5)
+        raise AssertionError("The modal solver accepted non separable boundary conditions")
+    except ValueError:
+        pass
@@ -0,0 +1,36 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.problems.analytical_maxwell import AnalyticalMaxwell
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+
+n_elements = 4
+pol_degree = 3
+
+time_step = 0.01
+n_time_iter = 5
+
+tol = 1e-7
+for system, problem in [("Wave", AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")),
+                        ("Maxwell", AnalyticalMaxwell(n_elements, n_elements, n_elements, bc_type="mixed")),
+                        # Trace spaces without interpolation, prolongation by L2 projection
+                        ("Wave", AnalyticalWave(n_elements, n_elements, n_elements, dim=2, quad=True, bc_type="mixed")),
+                        ("Maxwell", AnalyticalMaxwell(2, 2, 2, quad=True, bc_type="mixed"))]:
+    for formulation in ["primal", "dual"]:
+        list_solvers = [HamiltonianWaveSolver(problem = problem, pol_degree=pol_degree, \
+                                              time_step=time_step, \
+                                              discretization="hybrid", \
+                                              formulation=formulation, \
+                                              system=system, \
+                                              solver_parameters=profile, \
+                                              constant_operator=True) for profile in ["direct", "pmg"]]
+
+        for solver in list_solvers:
+            solver.integrate_n(n_time_iter)
+
+        direct_solver, pmg_solver = list_solvers
+        assert pmg_solver.linear_system().ksp.getPC().getMGLevels() == pol_degree
+        assert pmg_solver.linear_solver_statistics()["iterations"] > 0
+
+        for direct_field, pmg_field in zip(direct_solver.state_old.subfunctions[:2], \
+                                           pmg_solver.state_old.subfunctions[:2]):
+            assert fdrk.errornorm(direct_field, pmg_field) < tol
@@ -0,0 +1,35 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+from src.solvers.parareal import PararealSolver
+
+# Run with mpiexec -n N to use N time slices, in serial parareal reduces to the fine solver
+n_elements = 4
+pol_degree = 1
+
+problem_factory = lambda comm: AnalyticalWave(n_elements, n_elements, n_elements, dim=2, \
+                                              bc_type="mixed", comm=comm)
+system = "Wave"
+
+fine_time_step = 0.01
+final_time = 0.2
+
+parareal_solver = PararealSolver(problem_factory, system, final_time, fine_time_step, \
+                                 coarse_time_step=0.05, pol_degree=pol_degree, tol=1e-10)
+parareal_solver.solve()
+final_state = parareal_solver.final_state()
+
+# The parareal solution converges to the sequential fine solution, computed on each
+# spatial communicator
+assert parareal_solver.n_iterations <= parareal_solver.n_slices
+
+reference_solver = HamiltonianWaveSolver(problem = parareal_solver.problem, pol_degree=pol_degree, \
+                                         time_step=fine_time_step, \
+                                         discretization="hybrid", \
+                                         system=system)
+reference_solver.integrate_n(round(final_time/fine_time_step))
+
+tol = 1e-8
+for reference_field, field in zip(reference_solver.state_old.subfunctions[:2], \
+                                  final_state.subfunctions[:2]):
+    assert fdrk.errornorm(reference_field, field) < tol
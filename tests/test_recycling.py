@@ -0,0 +1,41 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+n_time_iter = 10
+
+system = "Wave"
+
+iterative_parameters = {"ksp_type": "gmres", "pc_type": "jacobi", "ksp_rtol": 1e-12}
+
+list_options = [{}, {"recycle_size": 5}, {"extrapolate_guess": True}, \
+                {"recycle_size": 5, "extrapolate_guess": True}]
+
+list_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                      time_step=time_step, \
+                                      discretization="hybrid", \
+                                      formulation="primal", \
+                                      system=system, \
+                                      solver_parameters=iterative_parameters, \
+                                      constant_operator=True, \
+                                      **options) for options in list_options]
+
+for solver in list_solvers:
+    solver.integrate_n(n_time_iter)
+
+reference_solver = list_solvers[0]
+reference_iterations = reference_solver.linear_solver_statistics()["iterations"]
+
+tol = 1e-8
+for solver in list_solvers[1:]:
+    assert solver.linear_solver_statistics()["iterations"] < reference_iterations
+
+    for reference_field, field in zip(reference_solver.state_old.subfunctions[:2], \
+                                      solver.state_old.subfunctions[:2]):
+        assert fdrk.errornorm(reference_field, field) < tol
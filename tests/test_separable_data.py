@@ -0,0 +1,68 @@
+import math
+from src.problems.analytical_wave import AnalyticalWave
+from src.problems.discontinuous_coefficients_wave import DiscontinuousWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+import numpy as np
+from tqdm import tqdm
+
+n_elements = 3
+pol_degree = 2
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed", manufactured=True)
+
+time_step = 0.01
+t_end = 10*time_step
+
+n_time_iter = math.ceil(t_end/time_step)
+
+system = "Wave"
+
+dict_solvers = {}
+for discretization in ["hybrid", "mixed"]:
+    for formulation in ["primal", "dual"]:
+        dict_solvers[(discretization, formulation)] = \
+            [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                    time_step=time_step, \
+                                    discretization=discretization, \
+                                    formulation=formulation, \
+                                    system=system, \
+                                    constant_operator=True, \
+                                    separable_data=separable_data) \
+            for separable_data in [False, True]]
+
+# The separable data are integrated with a different quadrature degree
+tol = 1e-6
+for ii in tqdm(range(n_time_iter)):
+
+    for key, (reference_solver, separable_solver) in dict_solvers.items():
+        reference_solver.integrate()
+        separable_solver.integrate()
+
+        for reference_field, separable_field in zip(reference_solver.state_new.subfunctions, \
+                                                    separable_solver.state_new.subfunctions):
+            assert np.max(np.abs(reference_field.dat.data_ro - separable_field.dat.data_ro)) < tol
+
+        reference_solver.update_variables()
+        separable_solver.update_variables()
+
+# Homogeneous separable boundary data (empty list of terms) and forcing with a time window
+problem_discontinuous = DiscontinuousWave(n_elements, n_elements)
+n_time_iter_discontinuous = 30
+
+for formulation in ["primal", "dual"]:
+    reference_solver, separable_solver = [HamiltonianWaveSolver(problem = problem_discontinuous, \
+                                                                pol_degree=pol_degree, \
+                                                                time_step=time_step, \
+                                                                discretization="hybrid", \
+                                                                formulation=formulation, \
+                                                                system=system, \
+                                                                constant_operator=True, \
+                                                                separable_data=separable_data) \
+                                          for separable_data in [False, True]]
+
+    reference_solver.integrate_n(n_time_iter_discontinuous)
+    separable_solver.integrate_n(n_time_iter_discontinuous)
+
+    for reference_field, separable_field in zip(reference_solver.state_old.subfunctions, \
+                                                separable_solver.state_old.subfunctions):
+        assert np.max(np.abs(reference_field.dat.data_ro - separable_field.dat.data_ro)) < tol
@@ -0,0 +1,34 @@
+import firedrake as fdrk
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+n_time_iter = 5
+
+system = "Wave"
+
+tol = 1e-7
+for discretization in ["hybrid", "mixed"]:
+    for formulation in ["primal", "dual"]:
+        list_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                              time_step=time_step, \
+                                              discretization=discretization, \
+                                              formulation=formulation, \
+                                              system=system, \
+                                              solver_parameters=profile, \
+                                              constant_operator=True) for profile in ["direct", "iterative"]]
+
+        for solver in list_solvers:
+            solver.integrate_n(n_time_iter)
+
+        direct_solver, iterative_solver = list_solvers
+        assert iterative_solver.linear_solver_statistics()["iterations"] > 0
+
+        for direct_field, iterative_field in zip(direct_solver.state_old.subfunctions[:2], \
+                                                 iterative_solver.state_old.subfunctions[:2]):
+            assert fdrk.errornorm(direct_field, iterative_field) < tol
@@ -0,0 +1,86 @@
+import firedrake as fdrk
+import numpy as np
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+from src.solvers.staggered_dual_field_solver import StaggeredDualFieldSolver
+from src.solvers.time_step_estimate import max_stable_time_step
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+n_time_iter = 10
+
+system = "Wave"
+
+staggered_solver = StaggeredDualFieldSolver(problem_wave, system, time_step, pol_degree=pol_degree)
+
+list_reference_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                                time_step=time_step, \
+                                                discretization="hybrid", \
+                                                formulation=formulation, \
+                                                system=system) for formulation in ["primal", "dual"]]
+
+staggered_solver.integrate_n(n_time_iter)
+
+# The reference dual solution is taken at the half steps of the staggered dual formulation
+for reference_solver, time_step_reference, n_steps_reference in zip(list_reference_solvers, \
+                                                [time_step, time_step/2], [n_time_iter, 2*n_time_iter + 1]):
+    reference_solver.set_time_step(time_step_reference)
+    reference_solver.integrate_n(n_steps_reference)
+
+# Both time integrators are second order accurate
+tol = 1e-3
+for reference_solver, solver in zip(list_reference_solvers, staggered_solver.solvers):
+    assert abs(float(reference_solver.time_old) - float(solver.time_old)) < 1e-12
+
+    for reference_field, field in zip(reference_solver.state_old.subfunctions[:2], \
+                                      solver.state_old.subfunctions[:2]):
+        assert fdrk.errornorm(reference_field, field) < tol
+
+# The primal formulation is advanced by the staggered step only, without its implicit midpoint system
+try:
+    staggered_solver.primal_solver.linear_system()
+    raise AssertionError("The primal solver of the staggered integrator set its global system")
+except ValueError:
+    pass
+
+
+# Order of convergence in time. The error against the analytical solution is dominated by the
+# spatial error for time steps below the CFL limit, so the time error of each formulation is
+# measured against its semi-discrete solution (implicit midpoint with a much smaller time step)
+# at the same time, t_n for the primal and t_{n+1/2} for the dual formulation. The time steps
+# are well below the CFL limit, so that all the discrete modes are in the asymptotic regime
+final_time = 0.2
+time_step_stable = min(max_stable_time_step(problem_wave, system, pol_degree=pol_degree, formulation=formulation) \
+                       for formulation in ["primal", "dual"])
+n_time_iter = int(np.ceil(final_time/(0.1*time_step_stable)))
+n_substeps = 16
+
+list_errors = []
+for refinement in [1, 2]:
+    n_steps = refinement*n_time_iter
+    time_step = final_time/n_steps
+
+    staggered_solver = StaggeredDualFieldSolver(problem_wave, system, time_step, pol_degree=pol_degree)
+    staggered_solver.integrate_n(n_steps)
+
+    # The dual formulation is half a step ahead
+    list_reference_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                                    time_step=time_step/n_substeps, \
+                                                    discretization="hybrid", \
+                                                    formulation=formulation, \
+                                                    system=system, \
+                                                    constant_operator=True) for formulation in ["primal", "dual"]]
+    for reference_solver, n_steps_reference in zip(list_reference_solvers, \
+                                                   [n_substeps*n_steps, n_substeps*n_steps + n_substeps//2]):
+        reference_solver.integrate_n(n_steps_reference)
+
+    list_errors.append([np.sqrt(sum(fdrk.errornorm(reference_field, field)**2 for reference_field, field \
+                                    in zip(reference_solver.state_old.subfunctions[:2], solver.state_old.subfunctions[:2]))) \
+                        for reference_solver, solver in zip(list_reference_solvers, staggered_solver.solvers)])
+
+for error_coarse, error_fine in zip(*list_errors):
+    assert 3.5 < error_coarse/error_fine < 4.5
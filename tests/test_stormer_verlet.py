@@ -0,0 +1,98 @@
+import firedrake as fdrk
+import numpy as np
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+from src.solvers.time_step_estimate import max_stable_time_step
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+
+time_step = 0.01
+n_time_iter = 10
+
+system = "Wave"
+
+# Both time integrators are second order accurate, the time step is below the CFL limit
+tol = 1e-3
+for formulation in ["primal", "dual"]:
+    list_solvers = [HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                          time_step=time_step, \
+                                          discretization="hybrid", \
+                                          formulation=formulation, \
+                                          system=system, \
+                                          time_integrator=time_integrator) \
+                    for time_integrator in ["implicit_midpoint", "stormer_verlet"]]
+
+    for solver in list_solvers:
+        solver.integrate_n(n_time_iter)
+
+    reference_solver, verlet_solver = list_solvers
+    for reference_field, field in zip(reference_solver.state_old.subfunctions[:2], \
+                                      verlet_solver.state_old.subfunctions[:2]):
+        assert fdrk.errornorm(reference_field, field) < tol
+
+    assert verlet_solver.linear_solver_statistics()["factorizations"] == 1
+
+
+# Order of convergence in time. The error against the analytical solution is dominated by the
+# spatial error for time steps below the CFL limit, so the time error is measured against the 
+# semi-discrete solution (implicit midpoint with a much smaller time step). The time steps are 
+# well below the CFL limit, so that all the discrete modes are in the asymptotic regime
+def fields_error(reference_solver, solver):
+    return np.sqrt(sum(fdrk.errornorm(reference_field, field)**2 for reference_field, field \
+                       in zip(reference_solver.state_old.subfunctions[:2], solver.state_old.subfunctions[:2])))
+
+
+final_time = 0.2
+for formulation in ["primal", "dual"]:
+    time_step_stable = max_stable_time_step(problem_wave, system, pol_degree=pol_degree, formulation=formulation)
+    n_time_iter = int(np.ceil(final_time/(0.1*time_step_stable)))
+
+    reference_solver = HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                             time_step=final_time/(16*n_time_iter), \
+                                             discretization="hybrid", \
+                                             formulation=formulation, \
+                                             system=system, \
+                                             constant_operator=True)
+    reference_solver.integrate_n(16*n_time_iter)
+
+    list_errors = []
+    for refinement in [1, 2]:
+        verlet_solver = HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                              time_step=final_time/(refinement*n_time_iter), \
+                                              discretization="hybrid", \
+                                              formulation=formulation, \
+                                              system=system, \
+                                              time_integrator="stormer_verlet")
+        verlet_solver.integrate_n(refinement*n_time_iter)
+        list_errors.append(fields_error(reference_solver, verlet_solver))
+
+    assert 3.5 < list_errors[0]/list_errors[1] < 4.5
+
+
+# The integrator is symplectic: with homogeneous boundary conditions the energy oscillates
+# without drift over many steps
+problem_homogeneous = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="dirichlet", homogeneous=True)
+
+n_time_iter = 1000
+for formulation in ["primal", "dual"]:
+    time_step = 0.5*max_stable_time_step(problem_homogeneous, system, pol_degree=pol_degree, formulation=formulation)
+    verlet_solver = HamiltonianWaveSolver(problem = problem_homogeneous, pol_degree=pol_degree, \
+                                          time_step=time_step, \
+                                          discretization="hybrid", \
+                                          formulation=formulation, \
+                                          system=system, \
+                                          time_integrator="stormer_verlet")
+
+    energy = lambda solver: 0.5*fdrk.assemble(sum(fdrk.inner(field, field)*fdrk.dx \
+                                                  for field in solver.state_old.subfunctions[:2]))
+    energy_initial = energy(verlet_solver)
+    list_energies = []
+    verlet_solver.integrate_n(n_time_iter, callback=lambda solver, step: list_energies.append(energy(solver)))
+
+    deviations = np.abs(np.array(list_energies) - energy_initial)/energy_initial
+    assert np.max(deviations) < 1e-2
+    # No drift: the deviation at the end is of the size of the oscillations at the start
+    assert np.max(deviations[-100:]) < 2*np.max(deviations[:100]) + 1e-12
@@ -0,0 +1,49 @@
+import firedrake as fdrk
+import math
+import numpy as np
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.time_harmonic_solver import TimeHarmonicSolver
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+system = "Wave"
+
+# The eigen solution is periodic, driven by the boundary data of frequency sqrt(2)
+frequency = math.sqrt(2)
+
+# The hybrid and mixed discretizations are equivalent
+tol = 1e-9
+time_output = 0.3
+for formulation in ["primal", "dual"]:
+    list_solvers = [TimeHarmonicSolver(problem_wave, system, frequency, pol_degree=pol_degree, \
+                                       discretization=discretization, formulation=formulation) \
+                    for discretization in ["mixed", "hybrid"]]
+
+    for solver in list_solvers:
+        solver.solve()
+
+    mixed_state, hybrid_state = [solver.solution_at(time_output) for solver in list_solvers]
+    for mixed_field, hybrid_field in zip(mixed_state.subfunctions, hybrid_state.subfunctions[:2]):
+        assert fdrk.errornorm(mixed_field, hybrid_field) < tol
+
+# Periodic exact solution of the problem: first order convergence of both fields
+list_errors = {"primal": [], "dual": []}
+for n_elements_exact in [4, 8]:
+    problem_exact = AnalyticalWave(n_elements_exact, n_elements_exact, n_elements_exact, dim=2, bc_type="mixed")
+    exact_pressure, exact_velocity = problem_exact.get_exact_solution(fdrk.Constant(time_output))
+    norm_exact = np.sqrt(fdrk.assemble(exact_pressure**2*fdrk.dx + fdrk.inner(exact_velocity, exact_velocity)*fdrk.dx))
+
+    for formulation in ["primal", "dual"]:
+        solver = TimeHarmonicSolver(problem_exact, system, frequency, pol_degree=pol_degree, \
+                                    discretization="hybrid", formulation=formulation)
+        solver.solve()
+        pressure, velocity = solver.solution_at(time_output).subfunctions[:2]
+
+        error = np.sqrt(fdrk.errornorm(exact_pressure, pressure)**2 + fdrk.errornorm(exact_velocity, velocity)**2)
+        list_errors[formulation].append(error/norm_exact)
+
+for formulation, errors in list_errors.items():
+    assert errors[-1] < 0.1
+    assert errors[0]/errors[-1] > 1.7
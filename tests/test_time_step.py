@@ -0,0 +1,54 @@
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.hamiltonian_solver import HamiltonianWaveSolver
+import numpy as np
+
+n_elements = 3
+pol_degree = 2
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed", manufactured=True)
+
+list_time_steps = [0.02, 0.01]
+n_time_iter = 5
+
+system = "Wave"
+
+dict_options = {"hybrid": {"direct_solver": "mumps", "cache_local_inverse": True, "matrix_rhs": True}, 
+                "mixed": {"constant_operator": True, "matrix_rhs": True}}
+
+tol = 1e-9
+for discretization, options in dict_options.items():
+    for formulation in ["primal", "dual"]:
+        # Solver retargeted to all the time steps
+        sweep_solver = HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                            time_step=list_time_steps[0], \
+                                            discretization=discretization, \
+                                            formulation=formulation, \
+                                            system=system, **options)
+
+        for time_step in list_time_steps:
+            sweep_solver.set_time_step(time_step)
+            sweep_solver.reset()
+
+            reference_solver = HamiltonianWaveSolver(problem = problem_wave, pol_degree=pol_degree, \
+                                                    time_step=time_step, \
+                                                    discretization=discretization, \
+                                                    formulation=formulation, \
+                                                    system=system)
+            
+            for ii in range(n_time_iter):
+                reference_solver.integrate()
+                sweep_solver.integrate()
+
+                for reference_field, sweep_field in zip(reference_solver.state_new.subfunctions, \
+                                                        sweep_solver.state_new.subfunctions):
+                    assert np.max(np.abs(reference_field.dat.data_ro - sweep_field.dat.data_ro)) < tol
+
+                reference_solver.update_variables()
+                sweep_solver.update_variables()
+
+            assert abs(float(sweep_solver.time_old) - n_time_iter*time_step) < 1e-12
+
+        # One factorization for each time step
+        statistics = sweep_solver.linear_solver_statistics()
+        assert statistics["factorizations"] == len(list_time_steps)
+        assert statistics["solves"] == len(list_time_steps)*n_time_iter
@@ -0,0 +1,23 @@
+from src.problems.analytical_wave import AnalyticalWave
+from src.solvers.time_step_estimate import estimate_max_frequency, max_stable_time_step, \
+    _max_frequency_cache, SLEPc
+
+n_elements = 4
+pol_degree = 1
+
+problem_wave = AnalyticalWave(n_elements, n_elements, n_elements, dim=2, bc_type="mixed")
+system = "Wave"
+
+power_frequency = estimate_max_frequency(problem_wave, system, pol_degree=pol_degree, \
+                                         n_iterations=500, tol=1e-8, use_slepc=False)
+assert power_frequency > 0
+
+# The estimate is cached per problem, system, formulation and degree
+assert (problem_wave, system, "primal", pol_degree) in _max_frequency_cache
+assert abs(max_stable_time_step(problem_wave, system, pol_degree=pol_degree, safety=1) \
+           - 2/power_frequency) < 1e-12
+
+if SLEPc is not None:
+    _max_frequency_cache.clear()
+    slepc_frequency = estimate_max_frequency(problem_wave, system, pol_degree=pol_degree, tol=1e-8)
+    assert abs(slepc_frequency - power_frequency) < 1e-3*slepc_frequency